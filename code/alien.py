@@ -1,6 +1,8 @@
 import pygame
 from pygame.sprite import Sprite
-import random
+
+from collision import solid_mask
+from projectiles import Projectile
 
 
 class Alien(Sprite):
@@ -9,76 +11,76 @@ class Alien(Sprite):
     def __init__(self, ai_game):
         """Initialize the alien and set its starting position."""
         super().__init__()
+        self.ai_game = ai_game
         self.screen = ai_game.screen
         self.settings = ai_game.settings
 
         # Load the alien image and set its rect attribute.
-        self.image = pygame.image.load('images/alien.bmp')
+        self.image = ai_game.assets.image('images/alien.bmp')
         self.rect = self.image.get_rect()
+        self.mask = ai_game.assets.mask('images/alien.bmp')
+        self.shot_timer = None
+        self.reset()
 
-        # Start each new alien near the top left of the screen.
+    def reset(self):
+        """Put a new or recycled alien back at its starting state."""
+        # Start each new alien near the top left of the screen. The fleet
+        # moves it from there; see Fleet.
         self.rect.x = self.rect.width
         self.rect.y = self.rect.height
 
-        # Store the alien's exact horizontal position.
-        self.x = float(self.rect.x)
-        
-        # 添加射击时间跟踪
-        self.last_shot = pygame.time.get_ticks()
-        # 增加射击间隔，降低射击频率 (原来是2000-10000毫秒，现在增加到5000-15000毫秒)
-        self.shoot_delay = random.randint(5000, 15000)  # 随机5-15秒射击一次
+        # 射击由游戏的调度器定时触发；回收时取消上一次的计时器
+        if self.shot_timer is not None:
+            self.shot_timer.cancel()
+            self.shot_timer = None
+        self.pick_shoot_delay()
 
-    def check_edges(self):
-        """Return True if alien is at edge of screen."""
-        screen_rect = self.screen.get_rect()
-        return (self.rect.right >= screen_rect.right) or (self.rect.left <= 0)
-
-    def update(self):
-        """Move the alien right or left."""
-        self.x += self.settings.alien_speed * self.settings.fleet_direction
-        self.rect.x = self.x
-        
-    def can_shoot(self):
-        """检查外星人是否可以射击"""
-        now = pygame.time.get_ticks()
-        if now - self.last_shot > self.shoot_delay:
-            self.last_shot = now
-            # 重新设置下次射击时间，继续保持较低频率
-            self.shoot_delay = random.randint(5000, 15000)  # 随机5-15秒射击一次
-            return True
-        return False
+    def pick_shoot_delay(self):
+        """随机选择距离下一次射击的时间"""
+        # 增加射击间隔，降低射击频率 (原来是2000-10000毫秒，现在增加到5000-15000毫秒)
+        self.shoot_delay = self.ai_game.rng.randint(5000, 15000)  # 随机5-15秒射击一次
         
     def shoot(self):
-        """创建一个子弹"""
-        alien_bullet = AlienBullet(self.screen, self.rect.centerx, self.rect.bottom)
-        return alien_bullet
+        """创建一个子弹（从对象池中取出）"""
+        return self.ai_game.alien_bullet_pool.acquire(
+            self.rect.centerx, self.rect.bottom)
 
 
-class AlienBullet(Sprite):
+class AlienBullet(Projectile):
     """外星人子弹类"""
     
-    def __init__(self, screen, x, y):
+    def __init__(self, ai_game, x, y):
         """初始化子弹"""
         super().__init__()
-        self.screen = screen
+        self.screen = ai_game.screen
+        self.settings = ai_game.settings
         
         # 创建子弹矩形
         self.rect = pygame.Rect(0, 0, 3, 15)
+        self.mask = solid_mask(self.rect.size)
+        self.reset(x, y)
+
+    def reset(self, x, y):
+        """把新建或回收的子弹放到 (x, y)"""
         self.rect.centerx = x
         self.rect.top = y
         
         # 存储子弹位置
         self.y = float(self.rect.y)
         
-        # 子弹颜色和速度
+        # 子弹颜色和速度（每秒像素数，换算成每个模拟步的位移）
         self.color = (255, 0, 0)  # 红色子弹
-        self.speed = 0.5
+        self.speed = self.settings.alien_bullet_speed
+        self.velocity = self.speed / self.settings.sim_rate
         
     def update(self):
         """向下移动子弹"""
-        self.y += self.speed
+        self.y += self.velocity
         self.rect.y = self.y
         
-    def draw_bullet(self):
-        """绘制子弹"""
-        pygame.draw.rect(self.screen, self.color, self.rect)
\ No newline at end of file
+    def draw_bullet(self, alpha=1.0):
+        """绘制子弹，返回绘制区域；alpha 表示两个模拟步之间的位置"""
+        rect = self.rect
+        if alpha != 1.0:
+            rect = rect.move(0, round(self.velocity * (alpha - 1)))
+        return pygame.draw.rect(self.screen, self.color, rect)
\ No newline at end of file
@@ -1,112 +1,503 @@
+import argparse
+import os
 import sys
-from time import sleep
 import random
+import threading
+import time
 import pygame
 
 from settings import Settings
+from assets import AssetManager
+from audio import VoiceManager
 from game_stats import GameStats
-from scoreboard import Scoreboard
+from scoreboard import Scoreboard, NullScoreboard
 from button import Button
-from ship import Ship
+from ship import Ship, interpolated_rect
+from collision import collide_mask
 from bullet import Bullet
 from alien import Alien, AlienBullet
+from projectiles import ProjectileGroup
+from renderer import DirtyRectRenderer, ScaledDisplay
+from fleet import Fleet, formation, shift_at
+from pool import ObjectPool
+from particles import ParticleSystem
+from scheduler import Scheduler
+from input_log import InputRecorder
+from profiler import FrameProfiler, StartupTimer
+from score_store import ScoreStore
+from capture import FrameRecorder
+from threaded import SimulationThread
+import savestate
+
+# Posted when a game ends, so the menu is shown from the main thread.
+GAME_OVER = pygame.event.custom_type()
 
 
 class AlienInvasion:
     """Overall class to manage game assets and behavior."""
 
-    def __init__(self):
-        """Initialize the game, and create game resources."""
-        pygame.init()
-        pygame.mixer.init()
-        self._load_sounds()
-        self.clock = pygame.time.Clock()
+    def __init__(self, seed=None, recorder=None, profile_path=None,
+                 startup_report=False):
+        """Initialize the game, and create game resources.
+
+        With a seed every game uses the same alien shot timing, so a
+        recorder can capture the session for an exact replay. With a
+        profile_path the frame profiler's data is written there when the
+        game exits, and with startup_report the startup timings are
+        printed then.
+        """
+        self.startup = StartupTimer()
+        self.startup_report = startup_report
+        # Only the display is started up front. Fonts start the first time
+        # one is needed and the mixer starts in _start_audio().
+        pygame.display.init()
+        self.startup.lap('pygame')
         self.settings = Settings()
-        self.screen = pygame.display.set_mode(
-            (self.settings.screen_width, self.settings.screen_height))
+        self._init_display()
+        self.startup.lap('display')
+        self._init_state(seed, recorder, profile_path)
+        self.startup.lap('game_objects')
+        self.play_button = Button(self, "Play")
+        self.startup.lap('play_button')
+        self._init_audio()
+
+    def _init_display(self):
+        """Open the window and the renderers that draw into it."""
+        self.clock = pygame.time.Clock()
+        # Gameplay and drawing use screen_width x screen_height logical
+        # units; the display shows them at the current internal resolution.
+        self.display = ScaledDisplay(
+            (self.settings.screen_width, self.settings.screen_height),
+            scales=self.settings.resolution_scales,
+            use_scaled=self.settings.use_scaled_display,
+            window_size=self.settings.window_size,
+            budget=1000 / self.settings.fps)
+        self.screen = self.display.surface
         pygame.display.set_caption("Alien Invasion")
+        self.dirty_renderer = DirtyRectRenderer(
+            self.screen, self.settings.bg_color,
+            present=self.display.present)
+
+    def _init_state(self, seed=None, recorder=None, profile_path=None):
+        """Create everything a game needs apart from the display and sound.
+
+        self.settings and self.screen must be set first. Sound effects
+        stay None, and silent, until _init_audio() loads them.
+        """
+        self.assets = AssetManager()
+        self.shoot_sound = None
+        self.explosion_sound = None
+        self.alien_shoot_sound = None
+        self.shield_hit_sound = None
+        self.seed = seed
+        self.recorder = recorder
+        self.profile_path = profile_path
+        self.frame_recorder = None
+        self.screenshots = None
+        self.screenshot_requested = False
+        # The thread stepping the game when it runs threaded.
+        self.simulation = None
+        # Writes the game's state every autosave_interval seconds while
+        # run_game() runs, so resume() can pick the game up again.
+        self.autosaver = None
+        self._autosave_period = 0
+        self._init_game_objects()
+
+    def _init_audio(self):
+        """Load the sound effects and open the mixer in the background."""
+        self._load_sounds()
+        self.music_loaded = False
+        threading.Thread(target=self._start_audio, name='AudioLoader',
+                         daemon=True).start()
 
+    def _init_game_objects(self):
+        """Create the stats, sprites and fleet shared by every game mode."""
+        # Alien shot timing draws from this generator so runs can be seeded.
+        self.rng = random.Random()
+        # Simulation steps since the current game started.
+        self.ticks = 0
+        # Alien shots and the pause after losing a ship run on game time.
+        self.scheduler = Scheduler(self.get_ticks)
+        self.respawning = False
+        self.audio = VoiceManager(self.settings.sound_categories)
+        self.profiler = FrameProfiler(
+            self.settings.profiler_frames, self.settings.fps)
+        # Times the simulation phases; its own profiler when threaded.
+        self.step_profiler = self.profiler
+        self.score_store = self._create_score_store()
         self.stats = GameStats(self)
-        self.sb = Scoreboard(self)
+        self.sb = self._create_scoreboard()
         self.ship = Ship(self)
-        self.bullets = pygame.sprite.Group()
-        self.aliens = pygame.sprite.Group()
-        self.alien_bullets = pygame.sprite.Group()
+        # A second player's ship, see add_partner(), and the NetHost
+        # that steers it for a remote player.
+        self.partner = None
+        self.net = None
+        self._create_pools()
+        self.bullets = ProjectileGroup(pool=self.bullet_pool)
+        self.aliens = Fleet(cell_size=self.settings.collision_cell_size,
+                            pool=self.alien_pool)
+        self.alien_bullets = ProjectileGroup(pool=self.alien_bullet_pool)
+        self.particles = ParticleSystem(
+            self.settings.particle_budget, self.settings.particle_spawn_limit,
+            sim_rate=self.settings.sim_rate)
 
         self._create_fleet()
         self.game_active = False
-        self.play_button = Button(self, "Play")
+
+    def _create_pools(self):
+        """Create the pools that recycle bullets and aliens."""
+        capacity = self.settings.pool_capacity
+        self.bullet_pool = ObjectPool(
+            lambda ship: Bullet(self, ship), capacity)
+        self.alien_bullet_pool = ObjectPool(
+            lambda x, y: AlienBullet(self, x, y), capacity)
+        self.alien_pool = ObjectPool(lambda: Alien(self), capacity)
+        if self.settings.prewarm_pools:
+            self.bullet_pool.prewarm(
+                self.settings.bullets_allowed, self.ship)
+            self.alien_bullet_pool.prewarm(
+                self.settings.alien_bullet_prewarm, 0, 0)
+
+    def _create_score_store(self):
+        """Return the store that keeps scores between sessions."""
+        return ScoreStore(self.settings.score_db)
+
+    def _create_scoreboard(self):
+        """Return the scoreboard used to draw the HUD."""
+        return Scoreboard(self)
+
+    def start_capture(self, path, every=None):
+        """Save every frame drawn from now on to path, see FrameRecorder."""
+        self.frame_recorder = self._create_frame_recorder(
+            path, every=every or self.settings.capture_every)
+
+    def _create_frame_recorder(self, path, **options):
+        return FrameRecorder(
+            path, self.screen, queue_size=self.settings.capture_queue,
+            policy=self.settings.capture_policy, **options)
+
+    def add_partner(self):
+        """Add a second player's ship, steered by the caller."""
+        self.partner = Ship(self)
+        self._place_partner()
+
+    def _place_partner(self):
+        """Put the partner's ship a quarter of the screen right of centre."""
+        if self.partner is None:
+            return
+        partner = self.partner
+        partner.center_ship()
+        partner.x += self.settings.screen_width // 4
+        partner.previous_x = partner.x
+        partner.rect.x = partner.x
+        partner.activate_shield()
+
+    def _player_ships(self):
+        """Return the ships that the aliens can hit."""
+        if self.partner is None:
+            return (self.ship,)
+        return (self.ship, self.partner)
+
+    def get_ticks(self):
+        """Return the game time in milliseconds.
+
+        Game time counts simulation steps, so timers fire on the same
+        step however fast frames are drawn and a recorded game replays
+        exactly.
+        """
+        return self.ticks * 1000 // self.settings.sim_rate
 
     def _load_sounds(self):
         """Load sound effects."""
+        # Sound effects are only decoded the first time they are played,
+        # or by _start_audio() if that gets to them first.
+        self.shoot_sound = self.assets.sound("sounds/shoot.wav")
+        self.explosion_sound = self.assets.sound("sounds/explosion.wav")
+        self.alien_shoot_sound = self.assets.sound("sounds/alien_shoot.wav")
+        self.shield_hit_sound = self.assets.sound("sounds/shield_hit.wav")
+
+    def _start_audio(self):
+        """Open the mixer, start the music and decode the sound effects.
+
+        This runs on a background thread so that the Play screen does not
+        wait for the audio device. Sound effects asked for before the
+        mixer is open are muted.
+        """
+        start = time.perf_counter()
+        try:
+            pygame.mixer.init()
+        except pygame.error as e:
+            print(f"Warning: No audio device, playing without sound. Error: {e}")
+            return
+        self.audio.reserve_channels()
+        self.startup.record('mixer', time.perf_counter() - start)
+
+        start = time.perf_counter()
         try:
-            self.shoot_sound = pygame.mixer.Sound("sounds/shoot.wav")
-            self.explosion_sound = pygame.mixer.Sound("sounds/explosion.wav")
-            self.alien_shoot_sound = pygame.mixer.Sound("sounds/alien_shoot.wav")
-            self.shield_hit_sound = pygame.mixer.Sound("sounds/shield_hit.wav")
             pygame.mixer.music.load("sounds/background.mp3")
             pygame.mixer.music.play(-1)
             pygame.mixer.music.set_volume(0.3)
+            self.music_loaded = True
         except pygame.error as e:
-            self.shoot_sound = None
-            self.explosion_sound = None
-            self.alien_shoot_sound = None
-            self.shield_hit_sound = None
             print(f"Warning: Sound files missing. Error: {e}")
+        self.startup.record('music', time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for sound in (self.shoot_sound, self.explosion_sound,
+                      self.alien_shoot_sound, self.shield_hit_sound):
+            sound.load()
+        self.startup.record('sounds', time.perf_counter() - start)
 
     def run_game(self):
-        """Start the main loop."""
-        while True:
-            self._check_events()
+        """Start the main loop.
+
+        The simulation moves in fixed steps of 1/sim_rate seconds however
+        fast frames are drawn. Each frame runs as many steps as the time
+        since the last frame covers, and sprites are drawn part of the way
+        between the last two steps by the fraction of a step left over.
+        With threaded_simulation the steps run on their own thread; see
+        _run_threaded().
+        """
+        if self.settings.autosave_interval:
+            self.autosaver = savestate.Autosaver(self.settings.autosave_path)
+        if self.settings.threaded_simulation:
+            self._run_threaded()
+            return
+        profiler = self.profiler
+        step_time = 1 / self.settings.sim_rate
+        max_lag = step_time * self.settings.max_frame_steps
+        lag = 0.0
+        last_time = time.perf_counter()
+        try:
+            while True:
+                profiler.start_frame()
+                self._check_events()
+                if self.net:
+                    self.net.receive()
+                profiler.lap('events')
+                now = time.perf_counter()
+                lag = min(lag + now - last_time, max_lag)
+                last_time = now
+                if self.game_active:
+                    while lag >= step_time and self.game_active:
+                        self._run_simulation_step()
+                        lag -= step_time
+                    self.audio.update()
+                    self._autosave()
+                else:
+                    lag = 0.0
+                if self.net:
+                    self.net.send()
+                alpha = lag / step_time if self.game_active else 1.0
+                self._update_screen(alpha)
+                self.startup.frame_drawn()
+                profiler.lap('screen')
+                self.clock.tick(self.settings.fps)
+                profiler.lap('tick')
+                profiler.end_frame(self)
+                self.display.adapt(profiler.last_work())
+        finally:
+            self._finish_run()
+
+    def _run_threaded(self):
+        """Step the game on a SimulationThread and draw it on this thread.
+
+        This thread handles events, which SDL needs on the main thread,
+        and draws the newest snapshot the simulation has published. Ship
+        controls and the Play button are passed to the simulation thread,
+        so only it changes the game. The scoreboard is only drawn from
+        snapshots; the simulation gets a NullScoreboard.
+        """
+        profiler = self.profiler
+        self.step_profiler = FrameProfiler(
+            self.settings.profiler_frames, self.settings.sim_rate)
+        self.hud = self.sb
+        self.sb = NullScoreboard(self)
+        self.simulation = SimulationThread(self)
+        self.simulation.start()
+        try:
+            while True:
+                profiler.start_frame()
+                self._check_events()
+                profiler.lap('events')
+                snapshot, alpha = self.simulation.latest()
+                self._update_screen(alpha, snapshot)
+                self.startup.frame_drawn()
+                profiler.lap('screen')
+                self.clock.tick(self.settings.fps)
+                profiler.lap('tick')
+                profiler.end_frame(self)
+                self.display.adapt(profiler.last_work())
+        finally:
+            self.simulation.stop()
+            self._finish_run()
+
+    def _finish_run(self):
+        """Save and close everything the main loop wrote to."""
+        if self.recorder:
+            self.recorder.save()
+        if self.autosaver:
             if self.game_active:
-                self.ship.update()
-                self._update_bullets()
-                self._update_aliens()
-                self._update_alien_bullets()
-            self._update_screen()
-            self.clock.tick(60)
+                # Quitting mid-game leaves the game to resume.
+                self.autosaver.submit(savestate.dump(self))
+            self.autosaver.close()
+        if self.profile_path:
+            self.profiler.export(self.profile_path)
+            if self.step_profiler is not self.profiler:
+                root, extension = os.path.splitext(self.profile_path)
+                self.step_profiler.export(f"{root}.sim{extension}")
+        for frame_recorder in (self.frame_recorder, self.screenshots):
+            if frame_recorder:
+                frame_recorder.close()
+        if self.startup_report:
+            print(self.startup.report())
+
+    def _autosave(self):
+        """Hand the game's state to the autosaver once every
+        autosave_interval seconds of game time.
+        """
+        if self.autosaver is None or not self.game_active:
+            return
+        interval = max(round(self.settings.autosave_interval
+                             * self.settings.sim_rate), 1)
+        period = self.ticks // interval
+        if period != self._autosave_period:
+            self._autosave_period = period
+            self.autosaver.submit(savestate.dump(self))
+
+    def resume(self, path=None):
+        """Continue the game saved at path, autosave_path by default.
+
+        Returns True if a game was loaded. A missing or unreadable file
+        leaves the game as it is.
+        """
+        path = path or self.settings.autosave_path
+        if not os.path.exists(path):
+            return False
+        try:
+            savestate.restore(self, path)
+        except (OSError, savestate.StateError) as e:
+            print(f"Warning: Could not resume from {path}. Error: {e}")
+            return False
+        if self.game_active:
+            pygame.mouse.set_visible(False)
+        return True
+
+    def _sim_call(self, function, *args):
+        """Call function now, or on the simulation thread if there is one."""
+        if self.simulation is None:
+            function(*args)
+        else:
+            self.simulation.call(function, *args)
+
+    def _run_simulation_step(self):
+        """Run one simulation step, recording its input if asked to."""
+        if self.recorder:
+            self.recorder.record_input(self)
+        if self.net:
+            self.net.apply_input()
+        self._update_simulation()
+        if self.recorder:
+            self.recorder.record_state(self)
+
+    def _update_simulation(self):
+        """Advance the ship, bullets and aliens by one simulation step."""
+        lap = self.step_profiler.lap
+        self.ticks += 1
+        self.scheduler.advance()
+        lap('scheduler')
+        # Particles keep moving through the pause after losing a ship.
+        self.particles.update()
+        lap('particles')
+        if self.respawning:
+            return
+        for ship in self._player_ships():
+            ship.update()
+        lap('ship')
+        self._update_bullets()
+        lap('bullets')
+        self._update_aliens()
+        lap('aliens')
+        self._update_alien_bullets()
+        lap('alien_bullets')
 
     def _check_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if self.simulation:
+                    self.simulation.stop()
                 self.stats.save_high_score()
                 pygame.quit()
                 sys.exit()
             elif event.type == pygame.KEYDOWN:
                 self._check_keydown_events(event)
             elif event.type == pygame.KEYUP:
-                self._check_keyup_events(event)
+                self._sim_call(self._check_keyup_events, event)
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_pos = pygame.mouse.get_pos()
+                mouse_pos = self.display.to_logical(pygame.mouse.get_pos())
                 self._check_play_button(mouse_pos)
+            elif event.type == GAME_OVER:
+                pygame.mouse.set_visible(True)
+                if pygame.mixer.get_init():
+                    pygame.mixer.music.stop()
 
     def _check_play_button(self, mouse_pos):
         button_clicked = self.play_button.rect.collidepoint(mouse_pos)
         if button_clicked and not self.game_active:
-            self.settings.initialize_dynamic_settings()
-            self.stats.reset_stats()
-            self.sb.prep_score()
-            self.sb.prep_level()
-            self.sb.prep_ships()
-            self.game_active = True
-            self.bullets.empty()
-            self.alien_bullets.empty()
-            self.aliens.empty()
-            self._create_fleet()
-            self.ship.center_ship()
-            self.ship.activate_shield()  # ✅ 关键：每局重置护盾
+            self._sim_call(self._press_play)
             pygame.mouse.set_visible(False)
-            pygame.mixer.music.play(-1)
+            if self.music_loaded:
+                pygame.mixer.music.play(-1)
+
+    def _press_play(self):
+        """Start a new game from the Play button, recording it if asked."""
+        self._start_game()
+        if self.recorder:
+            self.recorder.record_start()
+
+    def _start_game(self):
+        """Reset the statistics and the sprites for a new game."""
+        self.ticks = 0
+        if self.seed is not None:
+            self.rng.seed(self.seed)
+        self.scheduler.clear()
+        self.respawning = False
+        self.settings.initialize_dynamic_settings()
+        self.stats.reset_stats()
+        self.sb.prep_score()
+        self.sb.prep_level()
+        self.sb.prep_ships()
+        self.game_active = True
+        self.bullets.empty()
+        self.alien_bullets.empty()
+        self.aliens.empty()
+        self._create_fleet()
+        self.ship.center_ship()
+        self.ship.activate_shield()  # ✅ 关键：每局重置护盾
+        self.particles.clear()
+        self._place_partner()
 
     def _check_keydown_events(self, event):
+        if event.key in (pygame.K_RIGHT, pygame.K_LEFT, pygame.K_SPACE):
+            self._sim_call(self._check_ship_keydown, event)
+        elif event.key == pygame.K_q:
+            sys.exit()
+        elif event.key == pygame.K_F2:
+            self._toggle_render_mode()
+        elif event.key == pygame.K_F3:
+            self.profiler.overlay = not self.profiler.overlay
+        elif event.key == pygame.K_F12:
+            self.screenshot_requested = True
+
+    def _check_ship_keydown(self, event):
         if event.key == pygame.K_RIGHT:
             self.ship.moving_right = True
         elif event.key == pygame.K_LEFT:
             self.ship.moving_left = True
-        elif event.key == pygame.K_q:
-            sys.exit()
         elif event.key == pygame.K_SPACE:
             self._fire_bullet()
+            if self.recorder:
+                self.recorder.record_fire()
 
     def _check_keyup_events(self, event):
         if event.key == pygame.K_RIGHT:
@@ -114,28 +505,34 @@ class AlienInvasion:
         elif event.key == pygame.K_LEFT:
             self.ship.moving_left = False
 
-    def _fire_bullet(self):
-        if len(self.bullets) < self.settings.bullets_allowed:
-            new_bullet = Bullet(self)
+    def _fire_bullet(self, ship=None):
+        """Fire a bullet from ship, the player's own ship by default."""
+        if ship is None:
+            ship = self.ship
+        if self.partner is None:
+            fired = len(self.bullets)
+        else:
+            # Each player has bullets_allowed bullets of their own.
+            fired = sum(bullet.ship is ship for bullet in self.bullets)
+        if fired < self.settings.bullets_allowed:
+            new_bullet = self.bullet_pool.acquire(ship)
             self.bullets.add(new_bullet)
-            if self.shoot_sound:
-                self.shoot_sound.play()
+            self.audio.play(self.shoot_sound, 'shoot')
 
     def _update_bullets(self):
         self.bullets.update()
-        for bullet in self.bullets.copy():
-            if bullet.rect.bottom <= 0:
-                self.bullets.remove(bullet)
+        self.bullets.remove_outside(0, self.settings.screen_height)
         self._check_bullet_alien_collisions()
 
     def _check_bullet_alien_collisions(self):
-        collisions = pygame.sprite.groupcollide(
-            self.bullets, self.aliens, True, True)
+        collisions = self.bullets.collide_group(
+            self.aliens, True, True, collided=collide_mask)
         if collisions:
             for aliens in collisions.values():
                 self.stats.score += self.settings.alien_points * len(aliens)
-                if self.explosion_sound:
-                    self.explosion_sound.play()
+                self.audio.play(self.explosion_sound, 'explosion')
+                for alien in aliens:
+                    self.particles.emit('explosion', alien.rect.center)
             self.sb.prep_score()
             self.sb.check_high_score()
         if not self.aliens:
@@ -148,115 +545,270 @@ class AlienInvasion:
 
     def _update_alien_bullets(self):
         self.alien_bullets.update()
-        for bullet in self.alien_bullets.copy():
-            if bullet.rect.top >= self.settings.screen_height:
-                self.alien_bullets.remove(bullet)
+        self.alien_bullets.remove_outside(0, self.settings.screen_height)
+        for ship in self._player_ships():
+            if self._check_alien_bullet_hits(ship):
+                break
+
+    def _check_alien_bullet_hits(self, ship):
+        """Let alien bullets hit ship or its shield; return True if the
+        ship was lost.
+        """
         # 检查是否击中飞船/护盾
-        for bullet in self.alien_bullets.copy():
-            # 简化护盾检测：使用 inflate 扩大飞船碰撞区
-            if self.ship.shield_active:
-                # 扩大飞船矩形 60x60 范围作为护盾区域
-                shield_rect = self.ship.rect.inflate(60, 60)
-                if shield_rect.colliderect(bullet.rect):
-                    self.ship.hit_shield()  # ✅ 无参数
-                    self.alien_bullets.remove(bullet)
-                    if self.shield_hit_sound:
-                        self.shield_hit_sound.play()
+        # 先用护盾（或飞船）的外接矩形粗筛，再做精确检测
+        for bullet in self.alien_bullets.collide_rect(ship.collision_bounds()):
+            if ship.shield_active:
+                # 子弹是实心矩形，圆与矩形相交即击中护盾
+                if not ship.shield_touches(bullet.rect):
                     continue
-            # 无护盾或未击中护盾 → 检查是否击中飞船
-            if self.ship.rect.colliderect(bullet.rect):
+                ship.hit_shield()  # ✅ 无参数
+                self.particles.emit('shield', bullet.rect.midbottom)
                 self.alien_bullets.remove(bullet)
+                self.audio.play(self.shield_hit_sound, 'shield')
+                continue
+            # 无护盾或未击中护盾 → 检查是否击中飞船的像素
+            if collide_mask(ship, bullet):
+                self.alien_bullets.remove(bullet)
+                self.particles.emit('ship', ship.rect.center)
                 self._ship_hit()
+                return True
+        return False
 
     def _ship_hit(self):
         if self.stats.ships_left > 0:
             self.stats.ships_left -= 1
             self.sb.prep_ships()
-            if self.explosion_sound:
-                self.explosion_sound.play()
+            self.audio.play(self.explosion_sound, 'explosion')
             self.bullets.empty()
             self.alien_bullets.empty()
             self.aliens.empty()
             self._create_fleet()
             self.ship.center_ship()
             self.ship.activate_shield()  # ✅ 残机重置护盾
-            sleep(0.5)
+            self._place_partner()
+            self._pause_after_hit()
         else:
-            self.game_active = False
-            pygame.mouse.set_visible(True)
-            pygame.mixer.music.stop()
+            self._end_game()
+
+    def _pause_after_hit(self):
+        """Give the player a moment after losing a ship.
+
+        The simulation stands still for half a second of game time while
+        events are still handled and the screen is still drawn.
+        """
+        self.respawning = True
+        self.scheduler.schedule(500, self._end_respawn_pause)
+
+    def _end_respawn_pause(self):
+        self.respawning = False
+
+    def _end_game(self):
+        """Stop play and show the Play button again."""
+        self.game_active = False
+        # Every finished game goes on the leaderboard.
+        self.stats.save_high_score()
+        if self.autosaver:
+            # A finished game has nothing left to resume.
+            self.autosaver.discard()
+        pygame.event.post(pygame.event.Event(GAME_OVER))
 
     def _update_aliens(self):
         self._check_fleet_edges()
-        self.aliens.update()
-        # 外星人随机射击
-        for alien in self.aliens.sprites():
-            if alien.can_shoot():
-                alien_bullet = alien.shoot()
-                self.alien_bullets.add(alien_bullet)
-                if self.alien_shoot_sound:
-                    self.alien_shoot_sound.play()
+        self.aliens.update(
+            self.settings.alien_speed / self.settings.sim_rate,
+            self.settings.fleet_direction)
+        # 外星人随机射击由调度器触发，见 _alien_shoot()
         # 检查外星人撞飞船
-        alien_collisions = pygame.sprite.spritecollide(self.ship, self.aliens, False)
-        if alien_collisions:
-            if not self.ship.hit_shield():  # ✅ 无参数
+        for ship in self._player_ships():
+            alien_collisions = [
+                alien for alien in
+                self.aliens.collide_rect(ship.collision_bounds())
+                if ship.collides(alien)]
+            if not alien_collisions:
+                continue
+            if not ship.hit_shield():  # ✅ 无参数
+                self.particles.emit('ship', ship.rect.center)
                 self._ship_hit()
-            else:
-                for alien in alien_collisions:
-                    alien.kill()
-                if self.shield_hit_sound:
-                    self.shield_hit_sound.play()
+                break
+            for alien in alien_collisions:
+                self.particles.emit('shield', alien.rect.center)
+                alien.kill()
+            self.audio.play(self.shield_hit_sound, 'shield')
         self._check_aliens_bottom()
 
     def _check_aliens_bottom(self):
-        for alien in self.aliens.sprites():
-            if alien.rect.bottom >= self.settings.screen_height:
-                self._ship_hit()
-                break
+        if self.aliens.bottom() >= self.settings.screen_height:
+            self._ship_hit()
 
     def _create_fleet(self):
-        alien = Alien(self)
-        alien_width, alien_height = alien.rect.size
-        current_x, current_y = alien_width, alien_height
-        while current_y < (self.settings.screen_height - 3 * alien_height):
-            while current_x < (self.settings.screen_width - 2 * alien_width):
-                self._create_alien(current_x, current_y)
-                current_x += 2 * alien_width
-            current_x = alien_width
-            current_y += 2 * alien_height
+        alien_width, alien_height = self.assets.image(
+            'images/alien.bmp').get_size()
+        for x_position, y_position in formation(
+                self.settings.screen_width, self.settings.screen_height,
+                alien_width, alien_height):
+            self._create_alien(x_position, y_position)
 
     def _create_alien(self, x_position, y_position):
-        new_alien = Alien(self)
-        new_alien.x = x_position
+        new_alien = self.alien_pool.acquire()
         new_alien.rect.x = x_position
         new_alien.rect.y = y_position
         self.aliens.add(new_alien)
+        self._schedule_alien_shot(new_alien)
+
+    def _schedule_alien_shot(self, alien):
+        """Arrange for alien to fire once its shoot delay has passed."""
+        alien.shot_timer = self.scheduler.schedule(
+            alien.shoot_delay, self._alien_shoot, alien)
+
+    def _alien_shoot(self, alien):
+        """Fire a bullet from alien, then schedule its next shot."""
+        if not alien.alive():
+            return
+        self.alien_bullets.add(alien.shoot())
+        self.audio.play(self.alien_shoot_sound, 'alien_shoot')
+        alien.pick_shoot_delay()
+        self._schedule_alien_shot(alien)
 
     def _check_fleet_edges(self):
-        for alien in self.aliens.sprites():
-            if alien.check_edges():
-                self._change_fleet_direction()
-                break
+        if self.aliens.at_edge(self.settings.screen_width):
+            self._change_fleet_direction()
 
     def _change_fleet_direction(self):
-        for alien in self.aliens.sprites():
-            alien.rect.y += self.settings.fleet_drop_speed
+        self.aliens.drop(self.settings.fleet_drop_speed)
         self.settings.fleet_direction *= -1
 
-    def _update_screen(self):
-        self.screen.fill(self.settings.bg_color)
-        for bullet in self.bullets.sprites():
-            bullet.draw_bullet()
-        self.ship.blitme()
-        self.aliens.draw(self.screen)
-        for bullet in self.alien_bullets.sprites():
-            bullet.draw_bullet()
-        self.sb.show_score()
+    def _toggle_render_mode(self):
+        """Switch between full-frame and dirty-rectangle rendering."""
+        if self.settings.render_mode == 'full':
+            self.settings.render_mode = 'dirty'
+            self.dirty_renderer.invalidate()
+        else:
+            self.settings.render_mode = 'full'
+
+    def _update_screen(self, alpha=1.0, snapshot=None):
+        """Draw a frame alpha of the way from the last step to the current.
+
+        With a snapshot from the simulation thread, that is drawn instead
+        of the sprites themselves.
+        """
+        if snapshot is None:
+            draw = lambda: self._draw_frame(alpha)
+        else:
+            draw = lambda: self._draw_snapshot(snapshot, alpha)
+        if self.settings.render_mode == 'dirty':
+            self.dirty_renderer.render(draw)
+        else:
+            self.screen.fill(self.settings.bg_color)
+            draw()
+            self.display.present()
+        self._capture_frame()
+
+    def _capture_frame(self):
+        """Hand the frame just drawn to the frame recorders that want it."""
+        if self.frame_recorder:
+            self.frame_recorder.capture(self.screen)
+        if self.screenshot_requested:
+            self.screenshot_requested = False
+            if self.screenshots is None:
+                name = time.strftime('shot_%Y%m%d_%H%M%S_%%03d.png')
+                self.screenshots = self._create_frame_recorder(
+                    self.settings.screenshot_dir, name=name)
+            self.screenshots.capture(self.screen)
+
+    def _draw_frame(self, alpha=1.0):
+        """Draw every sprite and the HUD; return the areas drawn on."""
+        dirty = [bullet.draw_bullet(alpha)
+                 for bullet in self.bullets.sprites()]
+        for ship in self._player_ships():
+            dirty.extend(ship.blitme(alpha))
+        dirty.extend(self.aliens.draw(self.screen, alpha))
+        dirty.extend(self.particles.draw(self.screen, alpha))
+        dirty.extend(bullet.draw_bullet(alpha)
+                     for bullet in self.alien_bullets.sprites())
+        dirty.extend(self.sb.show_score())
+        if self.profiler.overlay:
+            dirty.append(self.sb.show_profiler(self.profiler))
         if not self.game_active:
-            self.play_button.draw_button()
-        pygame.display.flip()
+            dirty.append(self.play_button.draw_button())
+        return dirty
+
+    def _draw_snapshot(self, snapshot, alpha=1.0):
+        """Draw a snapshot like _draw_frame() draws the live sprites."""
+        dirty = [self._draw_projectile(bullet, alpha)
+                 for bullet in snapshot.bullets]
+        ship = snapshot.ship
+        dirty.extend(self.ship.draw_at(interpolated_rect(ship, alpha),
+                                       ship.shield_active))
+        alien_image = self.assets.image('images/alien.bmp')
+        dx = shift_at(*snapshot.fleet.shift, alpha)
+        dirty.extend(self.screen.blits(
+            [(alien_image, (x + dx, y))
+             for x, y, _, _ in snapshot.fleet.rects]))
+        dirty.extend(self.particles.draw_state(
+            self.screen, snapshot.particles, alpha))
+        dirty.extend(self._draw_projectile(bullet, alpha)
+                     for bullet in snapshot.alien_bullets)
+        self._update_hud(snapshot.hud)
+        dirty.extend(self.hud.show_score(ship))
+        if self.profiler.overlay:
+            dirty.append(self.hud.show_profiler(self.profiler))
+        if not snapshot.game_active:
+            dirty.append(self.play_button.draw_button())
+        return dirty
+
+    def _draw_projectile(self, projectile, alpha):
+        """Draw a bullet from a snapshot; return the area drawn on."""
+        rect = pygame.Rect(projectile.rect)
+        if alpha != 1.0:
+            rect.move_ip(0, round(projectile.velocity * (alpha - 1)))
+        return pygame.draw.rect(self.screen, projectile.color, rect)
+
+    def _update_hud(self, hud):
+        """Re-render the scoreboard images whose numbers have changed."""
+        previous, self.hud.stats = self.hud.stats, hud
+        if hud.score != previous.score:
+            self.hud.prep_score()
+        if hud.high_score != previous.high_score:
+            self.hud.prep_high_score()
+        if hud.level != previous.level:
+            self.hud.prep_level()
+        if hud.ships_left != previous.ships_left:
+            self.hud.prep_ships()
 
 
 if __name__ == '__main__':
-    ai = AlienInvasion()
+    parser = argparse.ArgumentParser(description="Play Alien Invasion.")
+    parser.add_argument('--seed', type=int,
+                        help="make every game deterministic with this seed")
+    parser.add_argument('--record', metavar='PATH',
+                        help="record the session for replay.py (needs --seed)")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="write frame timings to a .csv or .json file "
+                             "on exit (F3 shows them on screen)")
+    parser.add_argument('--threaded', action='store_true',
+                        help="step the simulation on its own thread")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="print how long each startup phase took on exit")
+    parser.add_argument('--capture', metavar='PATH',
+                        help="save the frames drawn to a .raw file or, for "
+                             "any other PATH, to a directory of PNGs")
+    parser.add_argument('--capture-every', type=int, metavar='N',
+                        help="only keep every N-th frame of the capture")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue the autosaved game, if there is one")
+    args = parser.parse_args()
+
+    recorder = None
+    if args.record:
+        if args.seed is None:
+            parser.error("--record needs --seed")
+        recorder = InputRecorder(args.record, args.seed, Settings().sim_rate)
+    ai = AlienInvasion(seed=args.seed, recorder=recorder,
+                       profile_path=args.profile,
+                       startup_report=args.startup_report)
+    ai.settings.threaded_simulation = args.threaded
+    if args.capture:
+        ai.start_capture(args.capture, args.capture_every)
+    if args.resume:
+        ai.resume()
     ai.run_game()
\ No newline at end of file
@@ -0,0 +1,143 @@
+import threading
+from time import perf_counter
+
+import pygame
+
+from collision import opaque_mask
+
+
+class LazySound:
+    """A sound that is only decoded the first time it is played."""
+
+    def __init__(self, assets, path):
+        """Remember where the sound lives without loading it."""
+        self.assets = assets
+        self.path = path
+        self.sound = None
+        self.failed = False
+
+    def __bool__(self):
+        """A lazy sound is usable whenever the mixer is running."""
+        return not self.failed and pygame.mixer.get_init() is not None
+
+    def load(self):
+        """Decode the sound now and return it, or None if it can't be loaded."""
+        if self.sound is None and not self.failed:
+            try:
+                self.sound = self.assets.load_sound(self.path)
+            except (pygame.error, FileNotFoundError) as e:
+                self.failed = True
+                print(f"Warning: Sound file {self.path} missing. Error: {e}")
+        return self.sound
+
+    def play(self, *args, **kwargs):
+        """Play the sound, loading it first if needed."""
+        sound = self.load()
+        if sound:
+            return sound.play(*args, **kwargs)
+        return None
+
+
+class AssetManager:
+    """Load each image and sound once and share it between all sprites.
+
+    Images are converted to the display's pixel format as soon as a
+    display mode has been set, so they blit without per-frame conversion.
+    Sounds may be decoded from a background thread.
+    """
+
+    def __init__(self):
+        """Start with empty caches."""
+        self.images = {}
+        self.sounds = {}
+        self.fonts = {}
+        self.masks = {}
+        self.load_times = {}
+        self.requests = {}
+        self._sound_lock = threading.Lock()
+
+    def image(self, path):
+        """Return the shared surface for the image at path."""
+        self.requests[path] = self.requests.get(path, 0) + 1
+        image = self.images.get(path)
+        if image is None:
+            start = perf_counter()
+            image = pygame.image.load(path)
+            if pygame.display.get_surface() is not None:
+                image = image.convert()
+            self.load_times[path] = perf_counter() - start
+            self.images[path] = image
+        return image
+
+    def mask(self, path):
+        """Return the shared collision mask for the image at path."""
+        mask = self.masks.get(path)
+        if mask is None:
+            mask = opaque_mask(self.image(path))
+            self.masks[path] = mask
+        return mask
+
+    def sound(self, path):
+        """Return a LazySound for path; it is decoded on first use."""
+        return LazySound(self, path)
+
+    def load_sound(self, path):
+        """Decode the sound at path once and return it."""
+        with self._sound_lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            sound = self.sounds.get(path)
+            if sound is None:
+                start = perf_counter()
+                sound = pygame.mixer.Sound(path)
+                self.load_times[path] = perf_counter() - start
+                self.sounds[path] = sound
+        return sound
+
+    def font(self, size):
+        """Return the shared default font at size, starting pygame.font
+        the first time a font is needed.
+        """
+        key = f'font:{size}'
+        self.requests[key] = self.requests.get(key, 0) + 1
+        font = self.fonts.get(size)
+        if font is None:
+            start = perf_counter()
+            if not pygame.font.get_init():
+                pygame.font.init()
+            # SysFont(None, size) gives this same font, but first scans
+            # every font installed on the system.
+            font = pygame.font.Font(None, size)
+            self.load_times[key] = perf_counter() - start
+            self.fonts[size] = font
+        return font
+
+    def memory_used(self, path):
+        """Return the approximate number of bytes held for an asset."""
+        if path in self.images:
+            image = self.images[path]
+            return image.get_pitch() * image.get_height()
+        if path in self.sounds and pygame.mixer.get_init():
+            frequency, size, channels = pygame.mixer.get_init()
+            samples = round(self.sounds[path].get_length() * frequency)
+            return samples * channels * abs(size) // 8
+        return 0
+
+    def stats(self):
+        """Return load time, memory and request count for every asset."""
+        return {
+            path: {
+                'load_ms': self.load_times[path] * 1000,
+                'bytes': self.memory_used(path),
+                'requests': self.requests.get(path, 0),
+            }
+            for path in self.load_times
+        }
+
+    def report(self):
+        """Return the asset statistics as printable lines."""
+        lines = []
+        for path, info in sorted(self.stats().items()):
+            lines.append(f"{path}: {info['load_ms']:.2f} ms, "
+                         f"{info['bytes'] / 1024:.1f} KiB, "
+                         f"{info['requests']} requests")
+        return '\n'.join(lines)
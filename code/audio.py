@@ -0,0 +1,146 @@
+from time import perf_counter
+
+import pygame
+
+
+def _now_ms():
+    return int(perf_counter() * 1000)
+
+
+class SoundCategory:
+    """Mixer channels set aside for one kind of sound effect."""
+
+    def __init__(self, name, channels, priority, min_interval):
+        self.name = name
+        self.channels = channels
+        # Higher priorities may take a voice from lower ones.
+        self.priority = priority
+        # Fewest milliseconds between two plays of the same sound.
+        self.min_interval = min_interval
+        self.stats = dict.fromkeys(
+            ('requested', 'played', 'merged', 'throttled', 'stolen',
+             'dropped', 'muted'), 0)
+
+
+class VoiceManager:
+    """Decide which sound effects actually reach the mixer.
+
+    Every category gets its own reserved channels, so a volley of alien
+    shots cannot take the channels that explosions need. Requests made
+    during a frame are collected by play() and started together by
+    update(): the same sound asked for several times in one frame plays
+    once, a sound is not restarted within its category's min_interval,
+    and when a category's channels are all busy it takes over the oldest
+    voice of its own or of a lower-priority category.
+
+    Without a mixer, for example when no audio device could be opened,
+    play() only counts the request. A mixer opened later, for example by
+    a background thread at startup, is picked up by reserve_channels().
+    """
+
+    def __init__(self, categories, clock=None, spare_channels=8):
+        """Reserve channels for categories, given as
+        {name: (channels, priority, min_interval)}.
+        """
+        self.clock = clock or _now_ms
+        self.categories = {
+            name: SoundCategory(name, *config)
+            for name, config in categories.items()}
+        self.spare_channels = spare_channels
+        self.enabled = False
+        self._pending = {}
+        self._last_played = {}
+        # Channel number -> when its current voice started.
+        self._voices = {}
+        self.peak_voices = 0
+        self.reserve_channels()
+
+    def reserve_channels(self):
+        """Set aside the categories' channels if the mixer is running."""
+        if self.enabled or pygame.mixer.get_init() is None:
+            return
+        reserved = sum(category.channels
+                       for category in self.categories.values())
+        pygame.mixer.set_num_channels(reserved + self.spare_channels)
+        # Plain Sound.play() calls keep to the channels after these.
+        pygame.mixer.set_reserved(reserved)
+        first = 0
+        for category in self.categories.values():
+            category.channel_ids = range(first, first + category.channels)
+            first += category.channels
+        self.enabled = True
+
+    def play(self, sound, category):
+        """Ask for sound to be played at the end of this frame."""
+        category = self.categories[category]
+        category.stats['requested'] += 1
+        if not self.enabled or not sound:
+            category.stats['muted'] += 1
+            return
+        if sound in self._pending:
+            category.stats['merged'] += 1
+        else:
+            self._pending[sound] = category
+
+    def update(self):
+        """Start the sounds requested since the last update."""
+        if not self._pending:
+            return
+        now = self.clock()
+        requests = sorted(self._pending.items(),
+                          key=lambda request: -request[1].priority)
+        self._pending.clear()
+        for sound, category in requests:
+            last = self._last_played.get(sound)
+            if last is not None and now - last < category.min_interval:
+                category.stats['throttled'] += 1
+                continue
+            channel_id = self._find_channel(category)
+            if channel_id is None:
+                category.stats['dropped'] += 1
+                continue
+            loaded = sound.load()
+            if loaded is None:
+                category.stats['muted'] += 1
+                continue
+            pygame.mixer.Channel(channel_id).play(loaded)
+            self._voices[channel_id] = now
+            self._last_played[sound] = now
+            category.stats['played'] += 1
+        self.peak_voices = max(self.peak_voices, self.active_voices())
+
+    def _find_channel(self, category):
+        """Return a free channel of category, or one it may take over."""
+        for channel_id in category.channel_ids:
+            if not pygame.mixer.Channel(channel_id).get_busy():
+                return channel_id
+
+        # Take over the oldest voice among this and lower priorities.
+        oldest = None
+        for candidate in self.categories.values():
+            if candidate.priority > category.priority:
+                continue
+            for channel_id in candidate.channel_ids:
+                started = self._voices.get(channel_id, 0)
+                if oldest is None or started < oldest[1]:
+                    oldest = (channel_id, started, candidate)
+        if oldest is None:
+            return None
+        oldest[2].stats['stolen'] += 1
+        return oldest[0]
+
+    def active_voices(self):
+        """Return how many reserved channels are playing right now."""
+        if not self.enabled:
+            return 0
+        return sum(pygame.mixer.Channel(channel_id).get_busy()
+                   for category in self.categories.values()
+                   for channel_id in category.channel_ids)
+
+    def stats(self):
+        """Return the voice counters of every category."""
+        stats = {name: dict(category.stats)
+                 for name, category in self.categories.items()}
+        stats['voices'] = {'active': self.active_voices(),
+                           'peak': self.peak_voices}
+        return stats
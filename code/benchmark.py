@@ -0,0 +1,316 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+# The dummy drivers must be chosen before pygame starts up.
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+
+from alien_invasion import AlienInvasion
+from headless import HeadlessInvasion
+
+# The parts of a frame that are timed separately.
+PHASES = ('_update_bullets', '_update_aliens', '_update_alien_bullets',
+          '_update_screen')
+PERCENTILES = (50, 90, 99)
+
+
+class Scenario:
+    """A scripted situation to run the game loop through.
+
+    setup(ai_game) runs after every game start and before(ai_game, frame)
+    runs before every frame, next to the scripted player.
+    """
+
+    def __init__(self, name, description, setup=None, before=None,
+                 fire_every=8):
+        self.name = name
+        self.description = description
+        self.setup = setup
+        self.before = before
+        # The player fires once every fire_every frames (0 fires every frame).
+        self.fire_every = fire_every
+
+
+def _dense_fleet(ai_game, factor=10):
+    """Replace the fleet with one about factor times as large."""
+    ai_game.aliens.empty()
+    alien_width, alien_height = ai_game.assets.image(
+        'images/alien.bmp').get_size()
+    # Aliens overlap, so step by a fraction of their size.
+    step_x = max(alien_width * 2 // factor ** 0.5, 1)
+    step_y = max(alien_height * 2 // factor ** 0.5, 1)
+    y = alien_height
+    while y < ai_game.settings.screen_height - 3 * alien_height:
+        x = alien_width
+        while x < ai_game.settings.screen_width - 2 * alien_width:
+            ai_game._create_alien(int(x), int(y))
+            x += step_x
+        y += step_y
+
+
+def _bullet_storm(ai_game):
+    ai_game.settings.bullets_allowed = 2000
+
+
+def _clear_wave(ai_game, frame):
+    """Wipe out the fleet every few frames so new waves keep coming."""
+    if frame % 20 == 19:
+        ai_game.aliens.empty()
+
+
+def _row_explosions(ai_game, frame):
+    """Blow up a whole row of the fleet every half second."""
+    if frame % 30 == 0:
+        top = min(alien.rect.y for alien in ai_game.aliens)
+        for alien in ai_game.aliens:
+            if alien.rect.y == top:
+                ai_game.particles.emit('explosion', alien.rect.center)
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in (
+        Scenario('default', "the normal fleet and three bullets"),
+        Scenario('dense_fleet', "a fleet about ten times the normal size",
+                 setup=_dense_fleet),
+        Scenario('bullet_storm', "firing every frame with 2000 bullets allowed",
+                 setup=_bullet_storm, fire_every=0),
+        Scenario('wave_clears', "a new fleet and speed-up every 20 frames",
+                 before=_clear_wave),
+        Scenario('row_explosions', "a row of explosions every 30 frames",
+                 setup=_dense_fleet, before=_row_explosions),
+    )
+}
+
+
+# Scripted players for timing HeadlessInvasion.step on its own.
+HEADLESS_BOTS = {
+    'idle': "no input at all",
+    'busy': "moving and firing at random",
+}
+BUSY_ACTIONS = (HeadlessInvasion.LEFT, HeadlessInvasion.RIGHT,
+                HeadlessInvasion.FIRE | HeadlessInvasion.LEFT,
+                HeadlessInvasion.FIRE | HeadlessInvasion.RIGHT)
+
+
+class BenchmarkInvasion(AlienInvasion):
+    """A windowed game that keeps no scores, so benchmark runs leave the
+    player's score database alone.
+    """
+
+    def _create_score_store(self):
+        return None
+
+
+class PhaseTimer:
+    """Collect per-call durations of a game's update methods."""
+
+    def __init__(self, ai_game, phases=PHASES):
+        """Wrap each phase method of ai_game so that every call is timed."""
+        self.samples = {phase: [] for phase in phases}
+        for phase in phases:
+            setattr(ai_game, phase,
+                    self._timed(getattr(ai_game, phase),
+                                self.samples[phase]))
+
+    @staticmethod
+    def _timed(method, samples):
+        clock = time.perf_counter_ns
+
+        def timed(*args, **kwargs):
+            start = clock()
+            result = method(*args, **kwargs)
+            samples.append(clock() - start)
+            return result
+        return timed
+
+    def summary(self):
+        """Return mean and percentile timings in microseconds per phase."""
+        summary = {}
+        for phase, samples in self.samples.items():
+            if not samples:
+                continue
+            micros = np.asarray(samples, dtype=np.float64) / 1000
+            stats = {'calls': len(samples), 'mean': float(micros.mean())}
+            for pct, value in zip(PERCENTILES,
+                                  np.percentile(micros, PERCENTILES)):
+                stats[f'p{pct}'] = float(value)
+            stats['max'] = float(micros.max())
+            summary[phase] = stats
+        return summary
+
+
+def run_scenario(scenario, frames=600, seed=1):
+    """Play scenario for the given number of frames; return its timings."""
+    ai_game = BenchmarkInvasion(seed=seed)
+    # Nor may they replace the player's saved game.
+    ai_game.settings.autosave_interval = 0
+    timer = PhaseTimer(ai_game)
+    bot = np.random.default_rng(seed)
+
+    start = time.perf_counter()
+    for frame in range(frames):
+        if not ai_game.game_active:
+            ai_game._start_game()
+            if scenario.setup:
+                scenario.setup(ai_game)
+        if scenario.before:
+            scenario.before(ai_game, frame)
+
+        # The scripted player changes direction now and then.
+        if frame % 30 == 0:
+            direction = bot.integers(3)
+            ai_game.ship.moving_left = direction == 1
+            ai_game.ship.moving_right = direction == 2
+        if scenario.fire_every == 0 or frame % scenario.fire_every == 0:
+            ai_game._fire_bullet()
+
+        ai_game._update_simulation()
+        ai_game._update_screen()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'frames': frames,
+        'fps': frames / elapsed,
+        'phases': timer.summary(),
+    }
+
+
+def run_headless(bot, steps=20000, seed=1):
+    """Step a headless game with the named bot; return its step rate."""
+    ai_game = HeadlessInvasion(seed=seed)
+    if bot == 'idle':
+        actions = [HeadlessInvasion.NOOP] * steps
+    else:
+        rng = np.random.default_rng(seed)
+        actions = rng.choice(BUSY_ACTIONS, steps).tolist()
+
+    start = time.perf_counter()
+    for action in actions:
+        if ai_game.step(action)[1]:
+            ai_game.reset(seed)
+    elapsed = time.perf_counter() - start
+
+    return {'steps': steps, 'steps_per_s': steps / elapsed}
+
+
+def compare(results, baseline, tolerance):
+    """Return a line for every phase more than tolerance slower than baseline.
+
+    Phases are compared on their median and 90th percentile, which are
+    steady enough between runs to catch real slowdowns. Headless bots
+    are compared on their step rate.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name == 'headless':
+            for bot, stats in result.items():
+                old = baseline.get(name, {}).get(bot)
+                if old and (stats['steps_per_s'] * (1 + tolerance)
+                            < old['steps_per_s']):
+                    regressions.append(
+                        f"headless {bot}: {old['steps_per_s']:,.0f} -> "
+                        f"{stats['steps_per_s']:,.0f} steps/s "
+                        f"({stats['steps_per_s'] / old['steps_per_s'] - 1:+.0%})")
+            continue
+        for phase, stats in result['phases'].items():
+            old = baseline.get(name, {}).get('phases', {}).get(phase)
+            if not old:
+                continue
+            for key in ('p50', 'p90'):
+                if stats[key] > old[key] * (1 + tolerance):
+                    regressions.append(
+                        f"{name} {phase} {key}: {old[key]:.1f} -> "
+                        f"{stats[key]:.1f} us "
+                        f"({stats[key] / old[key] - 1:+.0%})")
+    return regressions
+
+
+def print_results(name, result, baseline=None):
+    print(f"\n{name}: {SCENARIOS[name].description}")
+    print(f"  {result['frames']} frames, {result['fps']:,.0f} frames/s")
+    header = ''.join(f"{key:>10}" for key in
+                     ['mean'] + [f'p{pct}' for pct in PERCENTILES] + ['max'])
+    print(f"  {'phase (us)':<24}{header}")
+    old_phases = (baseline or {}).get(name, {}).get('phases', {})
+    for phase, stats in result['phases'].items():
+        row = ''.join(f"{stats[key]:>10.1f}" for key in
+                      ['mean'] + [f'p{pct}' for pct in PERCENTILES] + ['max'])
+        old = old_phases.get(phase)
+        change = f"  {stats['p50'] / old['p50'] - 1:+.0%} p50" if old else ''
+        print(f"  {phase:<24}{row}{change}")
+
+
+def print_headless(bot, result, baseline=None):
+    old = (baseline or {}).get('headless', {}).get(bot)
+    change = (f"  {result['steps_per_s'] / old['steps_per_s'] - 1:+.0%}"
+              if old else '')
+    print(f"headless {bot} ({HEADLESS_BOTS[bot]}): {result['steps']} steps, "
+          f"{result['steps_per_s']:,.0f} steps/s{change}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Time the game loop through scripted scenarios.")
+    parser.add_argument('scenarios', nargs='*', choices=[[], *SCENARIOS],
+                        metavar='SCENARIO',
+                        help=f"scenarios to run (default: all of "
+                             f"{', '.join(SCENARIOS)})")
+    parser.add_argument('--frames', type=int, default=600,
+                        help="frames per scenario (default: 600)")
+    parser.add_argument('--headless', action='store_true',
+                        help="time HeadlessInvasion.step with each bot "
+                             "instead of running the scenarios")
+    parser.add_argument('--steps', type=int, default=20000,
+                        help="steps per headless bot (default: 20000)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--baseline', metavar='PATH',
+                        default='benchmark_baseline.json',
+                        help="baseline to compare against or save to")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown before a phase counts as a "
+                             "regression (default: 0.25)")
+    args = parser.parse_args()
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    if args.headless:
+        results['headless'] = {}
+        for bot in HEADLESS_BOTS:
+            result = run_headless(bot, args.steps, args.seed)
+            results['headless'][bot] = result
+            print_headless(bot, result, baseline)
+    else:
+        for name in args.scenarios or SCENARIOS:
+            results[name] = run_scenario(SCENARIOS[name], args.frames,
+                                         args.seed)
+            print_results(name, results[name], baseline)
+
+    if args.save_baseline:
+        # Keep the other kind of run already in the baseline.
+        saved = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                saved = json.load(f)
+        saved.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(saved, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}.")
+    elif baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions against the baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
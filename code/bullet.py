@@ -1,31 +1,50 @@
 import pygame
-from pygame.sprite import Sprite
 
-class Bullet(Sprite):
+from collision import solid_mask
+from projectiles import Projectile
+
+class Bullet(Projectile):
     """A class to manage bullets fired from the ship."""
 
-    def __init__(self, ai_game):
-        """Create a bullet object at the ship's current position."""
+    def __init__(self, ai_game, ship):
+        """Create a bullet object at ship's current position."""
         super().__init__()
         self.screen = ai_game.screen
         self.settings = ai_game.settings
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(ship)
+
+    def reset(self, ship):
+        """Move a new or recycled bullet to ship's current position."""
+        # The ship that fired the bullet.
+        self.ship = ship
         self.color = self.settings.bullet_color
 
         # Create a bullet rect at (0, 0) and then set correct position.
-        self.rect = pygame.Rect(0, 0, self.settings.bullet_width,
+        self.rect.size = (self.settings.bullet_width,
             self.settings.bullet_height)
-        self.rect.midtop = ai_game.ship.rect.midtop
+        self.mask = solid_mask(self.rect.size)
+        self.rect.midtop = self.ship.rect.midtop
 
         # Store the bullet's position as a float.
         self.y = float(self.rect.y)
+        # Distance moved per simulation step.
+        self.velocity = -self.settings.bullet_speed / self.settings.sim_rate
 
     def update(self):
         """Move the bullet up the screen."""
         # Update the exact position of the bullet.
-        self.y -= self.settings.bullet_speed
+        self.y += self.velocity
         # Update the rect position.
         self.rect.y = self.y
 
-    def draw_bullet(self):
-        """Draw the bullet to the screen."""
-        pygame.draw.rect(self.screen, self.color, self.rect)
\ No newline at end of file
+    def draw_bullet(self, alpha=1.0):
+        """Draw the bullet to the screen and return the area drawn on.
+
+        alpha places the bullet between its previous position (0) and its
+        current one (1).
+        """
+        rect = self.rect
+        if alpha != 1.0:
+            rect = rect.move(0, round(self.velocity * (alpha - 1)))
+        return pygame.draw.rect(self.screen, self.color, rect)
\ No newline at end of file
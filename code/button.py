@@ -13,7 +13,7 @@ class Button:
         self.width, self.height = 200, 50
         self.button_color = (0, 135, 0)
         self.text_color = (255, 255, 255)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font = ai_game.assets.font(48)
 
         # Build the button's rect object and center it.
         self.rect = pygame.Rect(0, 0, self.width, self.height)
@@ -32,4 +32,5 @@ class Button:
     def draw_button(self):
         """Draw blank button and then draw message."""
         self.screen.fill(self.button_color, self.rect)
-        self.screen.blit(self.msg_image, self.msg_image_rect)
\ No newline at end of file
+        self.screen.blit(self.msg_image, self.msg_image_rect)
+        return self.rect.copy()
\ No newline at end of file
@@ -0,0 +1,181 @@
+import os
+import queue
+import struct
+import sys
+import threading
+import zlib
+
+import numpy as np
+import pygame
+
+MAGIC = b'AIRF'
+VERSION = 1
+# Width, height, pitch, bits per pixel, the four colour masks and the
+# number of frames drawn per frame kept.
+_HEADER = struct.Struct('<4sBHHIB4IH')
+_FRAME = struct.Struct('<I')
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_BYTE_MASKS = (0xff, 0xff00, 0xff0000, 0xff000000)
+
+
+def _png_chunk(kind, data):
+    return (struct.pack('>I', len(data)) + kind + data
+            + struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+
+class FrameRecorder:
+    """Save frames of the game from a background thread.
+
+    capture() copies the surface's pixels straight out of its buffer into
+    one of a few preallocated arrays, with no conversion to another pixel
+    format, and queues the array for the writer thread. The writer either
+    appends the raw pixels to a single file or saves each frame as a PNG,
+    then hands the array back for reuse. PNGs are compressed with zlib,
+    which lets go of the GIL, so encoding does not hold up the game.
+
+    Only every every-th frame is kept. When the writer falls behind and no
+    array is free, the frame is dropped with policy 'drop', or capture()
+    waits for the writer with policy 'block'.
+    """
+
+    def __init__(self, path, surface, every=1, queue_size=8, policy='drop',
+                 name='frame_%06d.png'):
+        """Record frames of surface to path.
+
+        A path ending in .raw gets every frame in one file; any other path
+        is a directory that gets one PNG per frame, named by formatting
+        name with the frame number.
+        """
+        if policy not in ('drop', 'block'):
+            raise ValueError("policy must be 'drop' or 'block'")
+        self.path = path
+        self.every = every
+        self.policy = policy
+        self.name = name
+        self.size = surface.get_size()
+        self.pitch = surface.get_pitch()
+        self.bitsize = surface.get_bitsize()
+        self.masks = surface.get_masks()
+        self._channels = self._rgb_bytes()
+        self.stats = dict.fromkeys(
+            ('frames', 'skipped', 'queued', 'dropped', 'written'), 0)
+
+        frame_bytes = self.pitch * self.size[1]
+        self._free = queue.Queue()
+        for _ in range(queue_size):
+            self._free.put(np.empty(frame_bytes, dtype=np.uint8))
+        self._frames = queue.Queue(maxsize=queue_size)
+        self._closed = False
+
+        if path.endswith('.raw'):
+            self._file = open(path, 'wb')
+            self._file.write(_HEADER.pack(
+                MAGIC, VERSION, *self.size, self.pitch, self.bitsize,
+                *self.masks, every))
+        else:
+            os.makedirs(path, exist_ok=True)
+            self._file = None
+        self._writer = threading.Thread(
+            target=self._write_loop, name='FrameRecorder', daemon=True)
+        self._writer.start()
+
+    def _rgb_bytes(self):
+        """Return where red, green and blue sit in a pixel's bytes.
+
+        Returns None unless every channel is a whole byte of a 32-bit
+        pixel, in which case frames are saved by pygame instead.
+        """
+        if (self.bitsize != 32 or sys.byteorder != 'little'
+                or not all(mask in _BYTE_MASKS for mask in self.masks[:3])):
+            return None
+        return [_BYTE_MASKS.index(mask) for mask in self.masks[:3]]
+
+    def capture(self, surface):
+        """Queue the current pixels of surface for the writer."""
+        number = self.stats['frames']
+        self.stats['frames'] += 1
+        if number % self.every:
+            self.stats['skipped'] += 1
+            return
+        try:
+            pixels = self._free.get(block=self.policy == 'block')
+        except queue.Empty:
+            self.stats['dropped'] += 1
+            return
+        # The view locks the surface, so let it go before anything blits.
+        view = surface.get_buffer()
+        np.copyto(pixels, np.frombuffer(view, dtype=np.uint8))
+        del view
+        self._frames.put((number, pixels))
+        self.stats['queued'] += 1
+
+    def _write_loop(self):
+        while True:
+            item = self._frames.get()
+            if item is None:
+                break
+            number, pixels = item
+            try:
+                self._write(number, pixels)
+                self.stats['written'] += 1
+            except (OSError, pygame.error) as e:
+                print(f"Warning: Could not save frame {number}. Error: {e}")
+            self._free.put(pixels)
+
+    def _write(self, number, pixels):
+        if self._file is not None:
+            self._file.write(_FRAME.pack(number))
+            self._file.write(pixels.data)
+            return
+        path = os.path.join(self.path, self.name % number)
+        if self._channels is None:
+            image = pygame.Surface(self.size, 0, self.bitsize, self.masks)
+            image.get_buffer().write(pixels.tobytes())
+            pygame.image.save(image, path)
+            return
+        with open(path, 'wb') as f:
+            f.write(self._encode_png(pixels))
+
+    def _encode_png(self, pixels):
+        """Return pixels as an 8-bit RGB PNG file."""
+        width, height = self.size
+        rows = np.empty((height, 1 + width * 3), dtype=np.uint8)
+        # Every row starts with filter type 0, none.
+        rows[:, 0] = 0
+        rgb = pixels.reshape(height, self.pitch)[:, :width * 4]
+        rows[:, 1:] = rgb.reshape(height, width, 4)[:, :, self._channels] \
+            .reshape(height, width * 3)
+        header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+        return (_PNG_SIGNATURE
+                + _png_chunk(b'IHDR', header)
+                + _png_chunk(b'IDAT', zlib.compress(rows, 1))
+                + _png_chunk(b'IEND', b''))
+
+    def close(self):
+        """Write the frames still queued and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._frames.put(None)
+        self._writer.join()
+        if self._file is not None:
+            self._file.close()
+
+
+def read_raw(path):
+    """Yield (frame number, Surface) for every frame in a .raw capture."""
+    with open(path, 'rb') as f:
+        header = f.read(_HEADER.size)
+        (magic, version, width, height, pitch, bitsize,
+         *masks, _) = _HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} capture")
+        frame_bytes = pitch * height
+        while True:
+            prefix = f.read(_FRAME.size)
+            if len(prefix) < _FRAME.size:
+                return
+            (number,) = _FRAME.unpack(prefix)
+            image = pygame.Surface((width, height), 0, bitsize, masks)
+            image.get_buffer().write(f.read(frame_bytes))
+            yield number, image
@@ -0,0 +1,59 @@
+from functools import lru_cache
+
+import pygame
+
+from render_cache import shield_surface
+
+
+def opaque_mask(image, tolerance=8):
+    """Return a mask of the pixels in image that are not its background.
+
+    The game's bitmaps have no transparency; their background is the
+    colour of the top-left pixel, so that colour (give or take tolerance
+    per channel, for antialiased edges) is left out of the mask.
+    """
+    background = image.get_at((0, 0))
+    mask = pygame.mask.from_threshold(
+        image, background, (tolerance, tolerance, tolerance, 255))
+    mask.invert()
+    return mask
+
+
+@lru_cache(maxsize=None)
+def solid_mask(size):
+    """Return a shared, fully set mask for a plain rect such as a bullet."""
+    return pygame.mask.Mask(size, fill=True)
+
+
+@lru_cache(maxsize=None)
+def circle_mask(radius, color):
+    """Return the mask of the shield circle drawn with radius and color."""
+    # The shield is translucent, so every pixel with any alpha counts.
+    return pygame.mask.from_surface(shield_surface(radius, color), 0)
+
+
+def circle_overlaps_rect(center, radius, rect):
+    """Return True if the circle at center overlaps rect.
+
+    Measures from the circle's center to the nearest point of the rect,
+    so it costs a few comparisons and no allocations.
+    """
+    cx, cy = center
+    dx = cx - min(max(cx, rect.left), rect.right)
+    dy = cy - min(max(cy, rect.top), rect.bottom)
+    return dx * dx + dy * dy < radius * radius
+
+
+def masks_overlap(mask, rect, other_mask, other_rect):
+    """Return True if two masks placed at two rects share a set pixel."""
+    offset = (other_rect.x - rect.x, other_rect.y - rect.y)
+    return mask.overlap(other_mask, offset) is not None
+
+
+def collide_mask(sprite, other):
+    """Work like pygame.sprite.collide_mask with precomputed masks.
+
+    Both sprites must have a mask attribute; nothing is built per call.
+    Use it as the narrow phase once their rects are known to overlap.
+    """
+    return masks_overlap(sprite.mask, sprite.rect, other.mask, other.rect)
@@ -0,0 +1,13 @@
+import os
+
+import pytest
+
+# Tests run the game without a window or sound card.
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+
+@pytest.fixture(autouse=True)
+def game_directory(monkeypatch):
+    """Run every test from here, where the game finds its images."""
+    monkeypatch.chdir(os.path.dirname(os.path.abspath(__file__)))
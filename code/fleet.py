@@ -0,0 +1,201 @@
+from functools import lru_cache
+from math import floor
+
+from pygame.sprite import Group
+
+from spatial_hash import SpatialHash
+
+
+@lru_cache(maxsize=None)
+def formation(screen_width, screen_height, alien_width, alien_height):
+    """Return the top-left corners of a full fleet, row by row.
+
+    Aliens are spaced one alien apart and stop short of the screen's
+    right edge and bottom. Each screen and alien size is laid out once.
+    """
+    positions = []
+    y = alien_height
+    while y < screen_height - 3 * alien_height:
+        x = alien_width
+        while x < screen_width - 2 * alien_width:
+            positions.append((x, y))
+            x += 2 * alien_width
+        y += 2 * alien_height
+    return tuple(positions)
+
+
+def shift_at(start, end, alpha):
+    """Return the whole-pixel shift alpha of the way from start to end."""
+    # Round like assigning a positive float to a Rect does.
+    return floor(start + (end - start) * alpha + 0.5)
+
+
+class Fleet(Group):
+    """The alien fleet, moved as one block by a shared offset.
+
+    Every alien keeps its home position in the formation and is drawn at
+    home plus the fleet's offset. The fleet counts how many aliens are
+    left in each formation column and row, so its outer edges are known
+    without looking at every alien; they are only worked out again when a
+    column or row empties. A drop changes the offset instead of moving
+    each alien.
+
+    Aliens are hashed by their home position, which never changes while
+    they are alive, so collision queries shift the query rect instead of
+    rehashing the fleet as it moves. If a pool is given, aliens are
+    released back to it when they leave the fleet.
+    """
+
+    def __init__(self, *sprites, cell_size=64, pool=None):
+        self.formation_grid = SpatialHash(cell_size)
+        self.pool = pool
+        self.offset_x = 0.0
+        self.offset_y = 0
+        # Sideways offset before the last update, for drawing between steps.
+        self.previous_offset_x = 0.0
+        # Whole-pixel offset that the rects were last placed at.
+        self._placed = (0, 0)
+        self._columns = {}
+        self._rows = {}
+        self._extent = None
+        self.alien_size = (0, 0)
+        super().__init__(*sprites)
+
+    def __len__(self):
+        # Group would copy every alien into a list just to count them.
+        return len(self.spritedict)
+
+    def __bool__(self):
+        return bool(self.spritedict)
+
+    def add_internal(self, sprite, layer=None):
+        """Join sprite to the fleet where its rect currently is."""
+        super().add_internal(sprite, layer)
+        rect = sprite.rect
+        dx, dy = self._placed
+        sprite.home = (rect.x - dx, rect.y - dy)
+        home_x, home_y = sprite.home
+        self._columns[home_x] = self._columns.get(home_x, 0) + 1
+        self._rows[home_y] = self._rows.get(home_y, 0) + 1
+        self.alien_size = rect.size
+        self.formation_grid.insert(sprite, rect.move(-dx, -dy))
+        self._extent = None
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        home_x, home_y = sprite.home
+        self._columns[home_x] -= 1
+        if not self._columns[home_x]:
+            del self._columns[home_x]
+            self._extent = None
+        self._rows[home_y] -= 1
+        if not self._rows[home_y]:
+            del self._rows[home_y]
+            self._extent = None
+        self.formation_grid.remove(sprite)
+        if not self.spritedict:
+            # The next fleet starts from its home positions.
+            self.offset_x = 0.0
+            self.previous_offset_x = 0.0
+            self.offset_y = 0
+            self._placed = (0, 0)
+        if self.pool is not None:
+            self.pool.release(sprite)
+
+    def _home_extent(self):
+        """Return (left, right, top, bottom) of the occupied formation."""
+        if self._extent is None:
+            width, height = self.alien_size
+            self._extent = (min(self._columns), max(self._columns) + width,
+                            min(self._rows), max(self._rows) + height)
+        return self._extent
+
+    def bounds(self):
+        """Return (left, right, top, bottom) of the fleet on screen."""
+        left, right, top, bottom = self._home_extent()
+        dx, dy = self._placed
+        return (left + dx, right + dx, top + dy, bottom + dy)
+
+    def at_edge(self, screen_width):
+        """Return True if the fleet touches either side of the screen."""
+        if not self.spritedict:
+            return False
+        left, right, _, _ = self._home_extent()
+        dx = self._placed[0]
+        return right + dx >= screen_width or left + dx <= 0
+
+    def bottom(self):
+        """Return the screen y of the lowest alien's bottom edge."""
+        if not self.spritedict:
+            return 0
+        return self._home_extent()[3] + self._placed[1]
+
+    def drop(self, distance):
+        """Move the whole fleet down."""
+        self.offset_y += distance
+        self._place()
+
+    def update(self, step, direction):
+        """Move the fleet sideways by step in direction (1 or -1)."""
+        self.previous_offset_x = self.offset_x
+        self.offset_x += step * direction
+        self._place()
+
+    @property
+    def placed_offset(self):
+        """The whole-pixel (dx, dy) that the rects are placed at from home."""
+        return self._placed
+
+    def set_offset(self, offset_x, offset_y, previous_offset_x=None):
+        """Move the fleet to the given offset from its home positions."""
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.previous_offset_x = (offset_x if previous_offset_x is None
+                                  else previous_offset_x)
+        self._place()
+
+    def step_shift(self):
+        """Return the previous and current sideways offsets, relative to
+        where the rects are placed.
+        """
+        placed_x = self._placed[0]
+        return self.previous_offset_x - placed_x, self.offset_x - placed_x
+
+    def draw(self, surface, alpha=1.0):
+        """Draw the fleet; return the areas drawn on.
+
+        alpha places the fleet between its previous offset (0) and its
+        current one (1).
+        """
+        dx = shift_at(*self.step_shift(), alpha)
+        return surface.blits(
+            [(sprite.image, sprite.rect.move(dx, 0))
+             for sprite in self.spritedict])
+
+    def _place(self):
+        """Move the rects to home plus offset if the pixel offset changed."""
+        # Round like assigning a positive float to a Rect does.
+        placed = (floor(self.offset_x + 0.5), self.offset_y)
+        if placed == self._placed:
+            return
+        # Every rect sits at home plus the old offset, so moving it by
+        # the change is the same as placing it from home.
+        dx = placed[0] - self._placed[0]
+        dy = placed[1] - self._placed[1]
+        self._placed = placed
+        for sprite in self.spritedict:
+            sprite.rect.move_ip(dx, dy)
+
+    def collide_rect(self, rect):
+        """Return the aliens whose rect overlaps rect."""
+        if not self.spritedict:
+            return []
+        dx, dy = self._placed
+        home = rect.move(-dx, -dy)
+        # The ship spends most of a wave well clear of the fleet.
+        left, right, top, bottom = self._home_extent()
+        if (home.right <= left or home.left >= right
+                or home.bottom <= top or home.top >= bottom):
+            return []
+        return [sprite for sprite in self.formation_grid.query(home)
+                if rect.colliderect(sprite.rect)]
@@ -1,5 +1,5 @@
-import json
-import os
+import uuid
+
 
 class GameStats:
     """Track statistics for Alien Invasion."""
@@ -7,6 +7,8 @@ class GameStats:
     def __init__(self, ai_game):
         """Initialize statistics."""
         self.settings = ai_game.settings
+        # Where scores are kept; None keeps them in memory only.
+        self.store = ai_game.score_store
         self.reset_stats()
 
         # High score should never be reset.
@@ -17,18 +19,16 @@ class GameStats:
         self.ships_left = self.settings.ship_limit
         self.score = 0
         self.level = 1
-        
+        # Identifies this game's row in the score store.
+        self.game = uuid.uuid4().hex
+
     def load_high_score(self):
-        """Load the high score from a file."""
-        try:
-            with open('high_score.json', 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
+        """Load the best stored score."""
+        if self.store is None:
             return 0
-        except json.JSONDecodeError:
-            return 0
-            
+        return self.store.high_score()
+
     def save_high_score(self):
-        """Save the high score to a file."""
-        with open('high_score.json', 'w') as f:
-            json.dump(self.high_score, f)
\ No newline at end of file
+        """Queue this game's score; the high score is the best one stored."""
+        if self.store is not None and self.score > 0:
+            self.store.submit(self.game, self.score, self.level)
@@ -0,0 +1,76 @@
+import pygame
+
+from alien_invasion import AlienInvasion
+from profiler import NullProfiler
+from scoreboard import NullScoreboard
+from settings import Settings
+
+
+class HeadlessInvasion(AlienInvasion):
+    """Run the game simulation without a window, sound or frame limiter.
+
+    Call reset() to start a game, then step() once per frame with an
+    action made of the LEFT, RIGHT and FIRE flags. observation() is kept
+    separate from step() so bots only pay for it when they look.
+    """
+
+    NOOP = 0
+    LEFT = 1
+    RIGHT = 2
+    FIRE = 4
+
+    def __init__(self, settings=None, seed=None):
+        """Create the sprites on an off-screen surface."""
+        self.settings = settings or Settings()
+        self.screen = pygame.Surface(
+            (self.settings.screen_width, self.settings.screen_height))
+        self._init_state(seed)
+        # Nothing reads the phase timings, so stepping skips the clock.
+        self.step_profiler = NullProfiler()
+        self.reset(seed)
+
+    def _create_score_store(self):
+        return None
+
+    def _create_scoreboard(self):
+        return NullScoreboard(self)
+
+    def reset(self, seed=None):
+        """Start a new game, seeding the alien shot timing."""
+        self.seed = seed
+        self.ship.moving_left = False
+        self.ship.moving_right = False
+        self._start_game()
+
+    def step(self, action=NOOP):
+        """Advance one frame and return (reward, done)."""
+        score = self.stats.score
+        self.ship.moving_left = bool(action & self.LEFT)
+        self.ship.moving_right = bool(action & self.RIGHT)
+        if action & self.FIRE:
+            self._fire_bullet()
+        if self.game_active:
+            self._update_simulation()
+        reward = self.stats.score - score
+        return reward, not self.game_active
+
+    def observation(self):
+        """Return the game state as a dictionary of plain values."""
+        return {
+            'tick': self.ticks,
+            'ship_x': self.ship.rect.x,
+            'shield_hits': self.ship.shield_hits if self.ship.shield_active else 0,
+            'ships_left': self.stats.ships_left,
+            'score': self.stats.score,
+            'level': self.stats.level,
+            'aliens': [alien.rect.topleft for alien in self.aliens],
+            'bullets': [bullet.rect.topleft for bullet in self.bullets],
+            'alien_bullets': [
+                bullet.rect.topleft for bullet in self.alien_bullets],
+        }
+
+    def _end_game(self):
+        self.game_active = False
+
+    def run_game(self):
+        raise RuntimeError("HeadlessInvasion is driven through step().")
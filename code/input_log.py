@@ -0,0 +1,181 @@
+import hashlib
+import struct
+
+# Input bits recorded for every simulation step.
+LEFT = 0x01
+RIGHT = 0x02
+START = 0x04
+# Bits 3-7 hold how many times fire was pressed in the step (0-31).
+FIRE_SHIFT = 3
+FIRE_MASK = 0xf8
+MAX_FIRES = FIRE_MASK >> FIRE_SHIFT
+
+MAGIC = b'AIRP'
+VERSION = 1
+_HEADER = struct.Struct('<4sBqHI')
+_COUNT = struct.Struct('<I')
+_CHECKPOINT = struct.Struct('<I8s')
+
+
+class ReplayMismatch(Exception):
+    """Raised when a replayed game's state differs from the recording."""
+
+
+def state_hash(ai_game):
+    """Return an 8-byte digest of the simulated game state."""
+    stats = ai_game.stats
+    ship = ai_game.ship
+    parts = [
+        (ai_game.ticks, stats.score, stats.ships_left, stats.level,
+         ai_game.game_active, ai_game.respawning,
+         ai_game.settings.fleet_direction),
+        (round(ship.x, 6), ship.shield_active, ship.shield_hits),
+        sorted(tuple(alien.rect) for alien in ai_game.aliens),
+        sorted(tuple(bullet.rect) for bullet in ai_game.bullets),
+        sorted(tuple(bullet.rect) for bullet in ai_game.alien_bullets),
+    ]
+    return hashlib.blake2b(repr(parts).encode(), digest_size=8).digest()
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class InputLog:
+    """Per-step inputs and state checkpoints for one recorded session.
+
+    Inputs are stored run-length encoded as (varint count, mask byte)
+    pairs, so a player holding a key for a second costs two bytes.
+    """
+
+    def __init__(self, seed, sim_rate=60, checkpoint_interval=600):
+        """Start an empty log of a game running sim_rate steps a second."""
+        self.seed = seed
+        self.sim_rate = sim_rate
+        self.checkpoint_interval = checkpoint_interval
+        self.runs = []
+        self.checkpoints = []
+        self.steps = 0
+
+    def append(self, mask):
+        """Add one step's input mask."""
+        if self.runs and self.runs[-1][1] == mask:
+            self.runs[-1][0] += 1
+        else:
+            self.runs.append([1, mask])
+        self.steps += 1
+
+    def masks(self):
+        """Yield the input mask of every step in order."""
+        for count, mask in self.runs:
+            for _ in range(count):
+                yield mask
+
+    def to_bytes(self):
+        """Encode the log in its compact binary form."""
+        out = bytearray(_HEADER.pack(MAGIC, VERSION, self.seed, self.sim_rate,
+                                     self.checkpoint_interval))
+        out += _COUNT.pack(len(self.runs))
+        for count, mask in self.runs:
+            _write_varint(out, count)
+            out.append(mask)
+        out += _COUNT.pack(len(self.checkpoints))
+        for step, digest in self.checkpoints:
+            out += _CHECKPOINT.pack(step, digest)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Decode a log written by to_bytes()."""
+        magic, version, seed, sim_rate, interval = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not an Alien Invasion input log.")
+        log = cls(seed, sim_rate, interval)
+        pos = _HEADER.size
+        (run_count,) = _COUNT.unpack_from(data, pos)
+        pos += _COUNT.size
+        for _ in range(run_count):
+            count, pos = _read_varint(data, pos)
+            log.runs.append([count, data[pos]])
+            log.steps += count
+            pos += 1
+        (checkpoint_count,) = _COUNT.unpack_from(data, pos)
+        pos += _COUNT.size
+        for _ in range(checkpoint_count):
+            log.checkpoints.append(_CHECKPOINT.unpack_from(data, pos))
+            pos += _CHECKPOINT.size
+        return log
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+class InputRecorder:
+    """Record a seeded game's inputs, one mask per simulation step."""
+
+    def __init__(self, path, seed, sim_rate=60, checkpoint_interval=600):
+        """Record into a new log that is written to path by save()."""
+        self.path = path
+        self.log = InputLog(seed, sim_rate, checkpoint_interval)
+        self.fires = 0
+        self.started = False
+
+    def record_fire(self):
+        """Note a fire key press for the coming step."""
+        self.fires += 1
+
+    def record_start(self):
+        """Note that the Play button started a new game."""
+        self.started = True
+        # Bullets fired before the start were cleared by the new game.
+        self.fires = 0
+
+    def record_input(self, ai_game):
+        """Store the input for the step that is about to run.
+
+        Raises ValueError if fire was pressed more often in the step than
+        a mask can hold, rather than record a game that replays
+        differently.
+        """
+        if self.fires > MAX_FIRES:
+            raise ValueError(f"{self.fires} fire presses in one step; "
+                             f"an input log holds at most {MAX_FIRES}")
+        mask = self.fires << FIRE_SHIFT
+        if ai_game.ship.moving_left:
+            mask |= LEFT
+        if ai_game.ship.moving_right:
+            mask |= RIGHT
+        if self.started:
+            mask |= START
+        self.log.append(mask)
+        self.fires = 0
+        self.started = False
+
+    def record_state(self, ai_game):
+        """Store a state checkpoint every checkpoint_interval steps."""
+        if self.log.steps % self.log.checkpoint_interval == 0:
+            self.log.checkpoints.append((self.log.steps, state_hash(ai_game)))
+
+    def save(self):
+        """Write the recording to its file."""
+        self.log.save(self.path)
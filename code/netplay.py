@@ -0,0 +1,605 @@
+import argparse
+import heapq
+import random
+import socket
+import struct
+import sys
+from collections import OrderedDict, deque
+from time import perf_counter
+
+import pygame
+
+from assets import AssetManager
+from headless import HeadlessInvasion
+from settings import Settings
+from ship import Ship
+
+# Input bits, the same as HeadlessInvasion's actions. FIRE is only set
+# in the step the fire key went down.
+LEFT = HeadlessInvasion.LEFT
+RIGHT = HeadlessInvasion.RIGHT
+FIRE = HeadlessInvasion.FIRE
+
+# Packet types.
+INPUT = 1
+SNAPSHOT = 2
+# Kinds of entity in a snapshot.
+HOST_SHIP, PARTNER_SHIP, ALIEN, BULLET, ALIEN_BULLET = range(5)
+# Snapshot flags.
+ACTIVE = 0x01
+RESPAWNING = 0x02
+
+# Type, newest snapshot decoded, sequence number of the newest input and
+# how many inputs follow, oldest first.
+_INPUT = struct.Struct('<BIIB')
+# Type, snapshot number, baseline snapshot (0 for none), newest input
+# applied, flags, score, level, ships left, the partner's exact x, the
+# fleet's offset, then how many entities changed and were removed.
+_SNAPSHOT = struct.Struct('<BIIIBIHBdhhHH')
+# Id, kind, x, y and shield hits left.
+_ENTITY = struct.Struct('<HBhhB')
+_REMOVED = struct.Struct('<H')
+# Inputs repeated in every input packet, so one lost packet loses none.
+INPUT_REDUNDANCY = 16
+# Snapshots each side keeps to decode or encode deltas against.
+HISTORY = 64
+
+
+class LossyLink:
+    """A non-blocking UDP socket that can drop and delay what it sends.
+
+    With no loss or latency it is a plain socket. Drops and delays are
+    drawn from a seeded generator, so a loopback test sees the same
+    network on every run. Delayed packets go out from a later send() or
+    receive(), so the owner should call one of them every frame.
+    """
+
+    def __init__(self, address=('127.0.0.1', 0), loss=0.0, latency=0.0,
+                 jitter=0.0, seed=None, clock=perf_counter):
+        """Bind to address; latency and jitter are in seconds, one way."""
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(address)
+        self.socket.setblocking(False)
+        self.address = self.socket.getsockname()
+        self.loss = loss
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self._delayed = []
+        self._count = 0
+        self.stats = dict.fromkeys(
+            ('sent', 'dropped', 'bytes', 'received'), 0)
+
+    def send(self, data, address):
+        """Send data to address, unless the simulated network loses it."""
+        self.stats['sent'] += 1
+        if self.loss and self.rng.random() < self.loss:
+            self.stats['dropped'] += 1
+            return
+        self.stats['bytes'] += len(data)
+        delay = self.latency + self.rng.uniform(0, self.jitter)
+        if delay <= 0:
+            self.socket.sendto(data, address)
+        else:
+            self._count += 1
+            heapq.heappush(self._delayed,
+                           (self.clock() + delay, self._count, data, address))
+        self.flush()
+
+    def flush(self):
+        """Send the delayed packets that are due."""
+        now = self.clock()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, data, address = heapq.heappop(self._delayed)
+            self.socket.sendto(data, address)
+
+    def receive(self):
+        """Return every (data, address) waiting on the socket."""
+        self.flush()
+        packets = []
+        while True:
+            try:
+                packets.append(self.socket.recvfrom(65535))
+            except BlockingIOError:
+                break
+            except ConnectionResetError:
+                # Windows reports an earlier send to a closed port here.
+                continue
+        self.stats['received'] += len(packets)
+        return packets
+
+    def close(self):
+        self.socket.close()
+
+
+class NetHost:
+    """Let a remote player steer a partner ship in ai_game.
+
+    The host is authoritative: the client only ever sends inputs. Call
+    receive() once a frame to take them off the network, apply_input()
+    before every simulation step to steer the partner with the next one,
+    and send() after the frame's steps to send the client a snapshot.
+    AlienInvasion.run_game() does all three once a NetHost is attached.
+
+    Snapshots are deltas against the newest snapshot the client says it
+    has decoded: only entities that appeared or changed are sent, plus
+    the ids of those that are gone. Aliens are sent by their home
+    position in the formation and the fleet offset goes in the header,
+    so the marching fleet costs nothing once the client has it.
+    """
+
+    def __init__(self, ai_game, link):
+        """Add a partner ship to ai_game and serve it over link."""
+        self.ai_game = ai_game
+        self.link = link
+        ai_game.add_partner()
+        ai_game.net = self
+        self.client = None
+        self._inputs = deque()
+        # Sequence numbers of the newest input received and applied.
+        self.received = 0
+        self.applied = 0
+        self._mask = 0
+        # Newest snapshot the client has decoded.
+        self.acked = 0
+        self.number = 0
+        self._sent = OrderedDict()
+        self._ids = {}
+        self._next_id = 0
+        self.stats = dict.fromkeys(
+            ('snapshots', 'full', 'bytes', 'inputs', 'late_steps'), 0)
+
+    def receive(self):
+        """Queue the inputs that have arrived from the client."""
+        for data, address in self.link.receive():
+            if len(data) < _INPUT.size or data[0] != INPUT:
+                continue
+            if self.client is None:
+                self.client = address
+            elif address != self.client:
+                continue
+            _, acked, newest, count = _INPUT.unpack_from(data)
+            masks = data[_INPUT.size:_INPUT.size + count]
+            self.acked = max(self.acked, acked)
+            for sequence, mask in enumerate(masks, newest - len(masks) + 1):
+                if sequence > self.received:
+                    self._inputs.append((sequence, mask))
+                    self.received = sequence
+        if not self.ai_game.game_active:
+            # Inputs sent between games steer nothing.
+            self._inputs.clear()
+            self.applied = self.received
+
+    def apply_input(self):
+        """Steer the partner with the client's next input."""
+        partner = self.ai_game.partner
+        if self._inputs:
+            self.applied, self._mask = self._inputs.popleft()
+            self.stats['inputs'] += 1
+            if self._mask & FIRE:
+                self.ai_game._fire_bullet(partner)
+        else:
+            # Nothing arrived in time: carry on as the client last did.
+            self.stats['late_steps'] += 1
+        partner.moving_left = bool(self._mask & LEFT)
+        partner.moving_right = bool(self._mask & RIGHT)
+
+    def send(self):
+        """Send the client what changed since the snapshot it has."""
+        if self.client is None:
+            return
+        state = self._state()
+        self.number += 1
+        baseline = self.acked if self.acked in self._sent else 0
+        base = self._sent.get(baseline, {})
+        if not baseline:
+            self.stats['full'] += 1
+        changed = [(entity, record) for entity, record in state.items()
+                   if base.get(entity) != record]
+        removed = [entity for entity in base if entity not in state]
+
+        ai_game = self.ai_game
+        stats = ai_game.stats
+        flags = ((ACTIVE if ai_game.game_active else 0)
+                 | (RESPAWNING if ai_game.respawning else 0))
+        parts = [_SNAPSHOT.pack(
+            SNAPSHOT, self.number, baseline, self.applied, flags,
+            stats.score, stats.level, stats.ships_left, ai_game.partner.x,
+            *ai_game.aliens.placed_offset, len(changed), len(removed))]
+        parts.extend(_ENTITY.pack(entity, *record)
+                     for entity, record in changed)
+        parts.extend(_REMOVED.pack(entity) for entity in removed)
+        packet = b''.join(parts)
+        self.link.send(packet, self.client)
+
+        self._sent[self.number] = state
+        while len(self._sent) > HISTORY:
+            self._sent.popitem(last=False)
+        self.stats['snapshots'] += 1
+        self.stats['bytes'] += len(packet)
+
+    def _state(self):
+        """Return {entity id: (kind, x, y, shield hits)} for the game."""
+        ai_game = self.ai_game
+        ids = {}
+        state = {}
+        # Ids wrap after 65535 entities, and the ships and long-lived
+        # aliens keep theirs, so a new sprite skips the ids in use.
+        live = set(self._ids.values())
+
+        def add(sprite, kind, x, y, shield=0):
+            entity = self._ids.get(sprite)
+            if entity is None:
+                entity = self._next_id
+                while True:
+                    # 0 is never used.
+                    entity = entity % 0xffff + 1
+                    if entity not in live and entity not in state:
+                        break
+                self._next_id = entity
+            ids[sprite] = entity
+            state[entity] = (kind, x, y, shield)
+
+        for kind, ship in ((HOST_SHIP, ai_game.ship),
+                           (PARTNER_SHIP, ai_game.partner)):
+            add(ship, kind, ship.rect.x, ship.rect.y,
+                ship.shield_hits if ship.shield_active else 0)
+        for alien in ai_game.aliens:
+            add(alien, ALIEN, *alien.home)
+        for bullet in ai_game.bullets:
+            add(bullet, BULLET, bullet.rect.x, bullet.rect.y)
+        for bullet in ai_game.alien_bullets:
+            add(bullet, ALIEN_BULLET, bullet.rect.x, bullet.rect.y)
+        # Sprites that left the game lose their ids, so a pooled sprite
+        # that comes back is a new entity.
+        self._ids = ids
+        return state
+
+
+class CoopClient:
+    """The remote player's end: send inputs and show what the host sends.
+
+    The client runs no simulation except for its own ship, which it
+    moves as soon as a key is pressed instead of a round trip later.
+    Every input is numbered. When a snapshot says which input the host
+    applied last, the client puts its ship where the host has it and
+    replays the inputs the host has not applied yet, so the two agree
+    without the ship lagging behind the keys.
+    """
+
+    def __init__(self, link, host, settings=None, screen=None):
+        """Talk to the host at address host over link.
+
+        Without a screen the client draws onto an off-screen surface.
+        """
+        self.settings = settings or Settings()
+        self.link = link
+        self.host = host
+        self.screen = screen or pygame.Surface(
+            (self.settings.screen_width, self.settings.screen_height))
+        self.assets = AssetManager()
+        self.ship = Ship(self)
+        self.host_ship = Ship(self)
+        self.sequence = 0
+        self._pending = deque(maxlen=10 * self.settings.sim_rate)
+        self._states = OrderedDict()
+        self.latest = 0
+        self.entities = {}
+        self.header = None
+        self._level = 1
+        self._hud = None
+        self._hud_image = None
+        self.stats = dict.fromkeys(
+            ('snapshots', 'stale', 'undecodable', 'corrections'), 0)
+        self.stats['correction_px'] = 0.0
+
+    @property
+    def predicting(self):
+        """Whether the host is moving ships right now."""
+        return (self.header is not None and self.header['flags'] & ACTIVE
+                and not self.header['flags'] & RESPAWNING)
+
+    def step(self, mask):
+        """Send this simulation step's input and move the ship for it."""
+        self.sequence += 1
+        self._pending.append((self.sequence, mask))
+        if self.predicting:
+            self._move(mask)
+        recent = list(self._pending)[-INPUT_REDUNDANCY:]
+        masks = bytes(mask for _, mask in recent)
+        self.link.send(
+            _INPUT.pack(INPUT, self.latest, self.sequence, len(masks))
+            + masks, self.host)
+
+    def _move(self, mask):
+        ship = self.ship
+        ship.moving_left = bool(mask & LEFT)
+        ship.moving_right = bool(mask & RIGHT)
+        ship.update()
+
+    def receive(self):
+        """Decode the snapshots that have arrived and catch up with them."""
+        for data, _ in self.link.receive():
+            if len(data) < _SNAPSHOT.size or data[0] != SNAPSHOT:
+                continue
+            self._decode(data)
+
+    def _decode(self, data):
+        (_, number, baseline, applied, flags, score, level, ships_left,
+         partner_x, fleet_x, fleet_y, changed, removed) = \
+            _SNAPSHOT.unpack_from(data)
+        if number <= self.latest:
+            self.stats['stale'] += 1
+            return
+        if baseline and baseline not in self._states:
+            self.stats['undecodable'] += 1
+            return
+        entities = dict(self._states.get(baseline, {}))
+        offset = _SNAPSHOT.size
+        for _ in range(changed):
+            entity, *record = _ENTITY.unpack_from(data, offset)
+            entities[entity] = tuple(record)
+            offset += _ENTITY.size
+        for _ in range(removed):
+            (entity,) = _REMOVED.unpack_from(data, offset)
+            entities.pop(entity, None)
+            offset += _REMOVED.size
+
+        self._states[number] = entities
+        while len(self._states) > HISTORY:
+            self._states.popitem(last=False)
+        self.latest = number
+        self.entities = entities
+        self.header = {'applied': applied, 'flags': flags, 'score': score,
+                       'level': level, 'ships_left': ships_left,
+                       'fleet_offset': (fleet_x, fleet_y)}
+        self.stats['snapshots'] += 1
+        self._match_speed(level)
+        self._reconcile(applied, partner_x)
+
+    def _match_speed(self, level):
+        """Give the ship the speed the host's ships have at level."""
+        if level == self._level:
+            return
+        self._level = level
+        self.settings.initialize_dynamic_settings()
+        for _ in range(level - 1):
+            self.settings.increase_speed()
+
+    def _reconcile(self, applied, partner_x):
+        """Start from the host's ship and replay the inputs it lacks."""
+        while self._pending and self._pending[0][0] <= applied:
+            self._pending.popleft()
+        ship = self.ship
+        predicted = ship.x
+        ship.x = partner_x
+        ship.rect.x = ship.x
+        if self.predicting:
+            for _, mask in self._pending:
+                self._move(mask)
+        ship.previous_x = ship.x
+        error = abs(ship.x - predicted)
+        if error > 0.5:
+            self.stats['corrections'] += 1
+            self.stats['correction_px'] += error
+
+    def draw(self):
+        """Draw the newest snapshot with the predicted ship on top."""
+        screen = self.screen
+        settings = self.settings
+        screen.fill(settings.bg_color)
+        if self.header is None:
+            self._draw_text("Waiting for the host...")
+            return
+        alien_image = self.assets.image('images/alien.bmp')
+        dx, dy = self.header['fleet_offset']
+        partner_shield = 0
+        for kind, x, y, shield in self.entities.values():
+            if kind == ALIEN:
+                screen.blit(alien_image, (x + dx, y + dy))
+            elif kind == BULLET:
+                pygame.draw.rect(screen, settings.bullet_color,
+                                 (x, y, settings.bullet_width,
+                                  settings.bullet_height))
+            elif kind == ALIEN_BULLET:
+                # Alien bullets are 3x15 and red, see AlienBullet.
+                pygame.draw.rect(screen, (255, 0, 0), (x, y, 3, 15))
+            elif kind == HOST_SHIP:
+                self.host_ship.rect.topleft = (x, y)
+                self.host_ship.draw_at(self.host_ship.rect, shield)
+            elif kind == PARTNER_SHIP:
+                partner_shield = shield
+        self.ship.draw_at(self.ship.rect, partner_shield)
+        hud = (self.header['score'], self.header['level'],
+               self.header['ships_left'])
+        if hud != self._hud:
+            self._hud = hud
+            self._hud_image = self.assets.font(36).render(
+                f"Score {hud[0]:,}   Level {hud[1]}   Ships {hud[2]}",
+                True, (30, 30, 30), settings.bg_color)
+        screen.blit(self._hud_image, (10, 10))
+        if not self.header['flags'] & ACTIVE:
+            self._draw_text("Waiting for the host to press Play...")
+
+    def _draw_text(self, text):
+        image = self.assets.font(48).render(text, True, (30, 30, 30))
+        self.screen.blit(
+            image, image.get_rect(center=self.screen.get_rect().center))
+
+    def run(self):
+        """Play with the arrow keys and the space bar until the window
+        is closed.
+        """
+        step_time = 1 / self.settings.sim_rate
+        clock = pygame.time.Clock()
+        lag = 0.0
+        last_time = perf_counter()
+        fire = False
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (
+                        event.type == pygame.KEYDOWN
+                        and event.key == pygame.K_q):
+                    return
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                    fire = True
+            keys = pygame.key.get_pressed()
+            mask = ((LEFT if keys[pygame.K_LEFT] else 0)
+                    | (RIGHT if keys[pygame.K_RIGHT] else 0))
+            now = perf_counter()
+            lag = min(lag + now - last_time,
+                      step_time * self.settings.max_frame_steps)
+            last_time = now
+            while lag >= step_time:
+                self.step(mask | (FIRE if fire else 0))
+                fire = False
+                lag -= step_time
+            self.receive()
+            self.draw()
+            pygame.display.flip()
+            clock.tick(self.settings.fps)
+
+
+class _PartnerBot:
+    """Wander between random targets and fire now and then."""
+
+    def __init__(self, client, seed):
+        self.client = client
+        self.rng = random.Random(seed)
+        self.target_x = client.ship.rect.x
+
+    def act(self, step):
+        ship_x = self.client.ship.rect.x
+        if abs(self.target_x - ship_x) < 20:
+            self.target_x = self.rng.randrange(
+                0, self.client.settings.screen_width - 60)
+        mask = RIGHT if self.target_x > ship_x else LEFT
+        if step % 20 == 0:
+            mask |= FIRE
+        return mask
+
+
+def loopback(seconds=60, loss=0.0, latency=0.0, jitter=0.0, seed=0):
+    """Play a host bot and a partner bot against each other over 127.0.0.1.
+
+    Both ends run in this process on a simulated clock of one frame per
+    simulation step, so the run takes a fraction of its game time, and
+    the same seed gives the same run. Every snapshot the client decodes
+    is checked against what the host sent. Returns the statistics of
+    both ends.
+    """
+    from sweep import ScriptedBot
+
+    settings = Settings()
+    steps = [0]
+
+    def clock():
+        return steps[0] / settings.sim_rate
+
+    host_link = LossyLink(loss=loss, latency=latency, jitter=jitter,
+                          seed=seed, clock=clock)
+    client_link = LossyLink(loss=loss, latency=latency, jitter=jitter,
+                            seed=seed + 1, clock=clock)
+    ai_game = HeadlessInvasion(settings, seed=seed)
+    host = NetHost(ai_game, host_link)
+    client = CoopClient(client_link, host_link.address)
+    host_bot = ScriptedBot(ai_game)
+    partner_bot = _PartnerBot(client, seed)
+    checked = games = 0
+
+    for step in range(int(seconds * settings.sim_rate)):
+        steps[0] = step
+        host.receive()
+        if ai_game.game_active:
+            host.apply_input()
+        _, done = ai_game.step(host_bot.act(step))
+        host.send()
+        client.receive()
+        sent = host._sent.get(client.latest)
+        if sent is not None:
+            if sent != client.entities:
+                raise AssertionError(
+                    f"snapshot {client.latest} decoded wrongly")
+            checked += 1
+        client.step(partner_bot.act(step))
+        if done:
+            games += 1
+            ai_game.reset(seed + games)
+
+    host_link.close()
+    client_link.close()
+    seconds_played = seconds or 1
+    return {
+        'games': games + 1,
+        'snapshots_checked': checked,
+        'host': dict(host.stats,
+                     bytes_per_second=host.stats['bytes'] / seconds_played,
+                     mean_snapshot_bytes=host.stats['bytes']
+                     / max(host.stats['snapshots'], 1)),
+        'host_link': host_link.stats,
+        'client': client.stats,
+        'client_link': client_link.stats,
+    }
+
+
+def _address(text):
+    host, _, port = text.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Two-player co-op: an authoritative host and a client "
+                    "that steers the second ship.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    host_parser = commands.add_parser('host', help="play and serve a game")
+    host_parser.add_argument('--port', type=int, default=5555)
+    join_parser = commands.add_parser('join', help="join a hosted game")
+    join_parser.add_argument('address', type=_address, metavar='HOST:PORT')
+    loop_parser = commands.add_parser(
+        'loopback', help="run two bots over 127.0.0.1 and print statistics")
+    loop_parser.add_argument('--seconds', type=float, default=60,
+                             help="game time to play (default: 60)")
+    loop_parser.add_argument('--seed', type=int, default=0)
+    for command in (host_parser, join_parser, loop_parser):
+        command.add_argument('--loss', type=float, default=0.0,
+                             help="fraction of packets to drop")
+        command.add_argument('--latency', type=float, default=0.0,
+                             metavar='MS', help="one-way delay to add")
+        command.add_argument('--jitter', type=float, default=0.0,
+                             metavar='MS', help="extra random delay, up to")
+    args = parser.parse_args()
+    network = {'loss': args.loss, 'latency': args.latency / 1000,
+               'jitter': args.jitter / 1000}
+
+    if args.command == 'loopback':
+        results = loopback(args.seconds, seed=args.seed, **network)
+        host = results['host']
+        client = results['client']
+        print(f"{results['games']} games, {host['snapshots']} snapshots "
+              f"({host['full']} full), "
+              f"{results['snapshots_checked']} checked against the host")
+        print(f"host -> client: {host['bytes_per_second']:,.0f} bytes/s, "
+              f"{host['mean_snapshot_bytes']:.1f} bytes per snapshot")
+        print(f"client: {client['undecodable']} snapshots undecodable, "
+              f"{client['stale']} stale, {client['corrections']} "
+              f"corrections ({client['correction_px']:.0f} px in all)")
+        print(f"host: {host['late_steps']} steps without a partner input")
+    elif args.command == 'host':
+        from alien_invasion import AlienInvasion
+
+        ai = AlienInvasion()
+        NetHost(ai, LossyLink(('0.0.0.0', args.port), **network))
+        print(f"Hosting on port {args.port}.")
+        ai.run_game()
+    else:
+        pygame.display.init()
+        screen = pygame.display.set_mode(
+            (Settings().screen_width, Settings().screen_height))
+        pygame.display.set_caption("Alien Invasion - co-op")
+        client = CoopClient(LossyLink(('0.0.0.0', 0), **network),
+                            args.address, screen=screen)
+        client.run()
+        pygame.quit()
+        sys.exit()
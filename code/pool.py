@@ -0,0 +1,71 @@
+class ObjectPool:
+    """Hand out reusable objects instead of creating new ones each time.
+
+    Objects are built with factory(*args) the first time and handed back
+    out through their reset(*args) method after they have been released.
+    """
+
+    def __init__(self, factory, capacity=None):
+        """Create an empty pool that keeps at most capacity free objects."""
+        self.factory = factory
+        self.capacity = capacity
+        self.free = []
+        self._free_set = set()
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+        self.discarded = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    def __len__(self):
+        return len(self.free)
+
+    def acquire(self, *args):
+        """Return a ready-to-use object, reusing a free one if possible."""
+        if self.free:
+            obj = self.free.pop()
+            self._free_set.discard(obj)
+            obj.reset(*args)
+            self.reused += 1
+        else:
+            obj = self.factory(*args)
+            self.created += 1
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        return obj
+
+    def release(self, obj):
+        """Give an object back to the pool; releasing twice is harmless."""
+        if obj in self._free_set:
+            return
+        self.in_use = max(self.in_use - 1, 0)
+        self.released += 1
+        if self.capacity is not None and len(self.free) >= self.capacity:
+            self.discarded += 1
+            return
+        self.free.append(obj)
+        self._free_set.add(obj)
+
+    def prewarm(self, count, *args):
+        """Create free objects up front so the next count acquires reuse them."""
+        if self.capacity is not None:
+            count = min(count, self.capacity)
+        while len(self.free) < count:
+            obj = self.factory(*args)
+            self.created += 1
+            self.free.append(obj)
+            self._free_set.add(obj)
+
+    def stats(self):
+        """Return the pool's counters as a dictionary."""
+        return {
+            'capacity': self.capacity,
+            'free': len(self.free),
+            'in_use': self.in_use,
+            'peak_in_use': self.peak_in_use,
+            'created': self.created,
+            'reused': self.reused,
+            'released': self.released,
+            'discarded': self.discarded,
+        }
@@ -0,0 +1,200 @@
+import csv
+import json
+from collections import deque
+from time import perf_counter
+
+import numpy as np
+
+# Phases of a frame, in the order run_game() goes through them.
+PHASES = ('events', 'scheduler', 'particles', 'ship', 'bullets', 'aliens',
+          'alien_bullets', 'screen', 'tick')
+# Sprite groups, and particles, whose sizes are recorded with every frame.
+GROUPS = ('bullets', 'aliens', 'alien_bullets', 'particles')
+# Upper edges of the histogram bins in milliseconds; the last bin is open.
+BIN_EDGES_MS = (0.25, 0.5, 1, 2, 4, 8, 16.7, 33.3)
+
+
+class FrameProfiler:
+    """Time each phase of the last few hundred frames.
+
+    Call start_frame() at the top of a frame, lap(phase) as each phase
+    finishes and end_frame() at the bottom. Timings go into fixed-size
+    ring buffers, so recording costs the same however long the game runs,
+    and every frame is also counted into a per-phase histogram.
+
+    The work of a frame is everything except the wait in clock.tick().
+    Frames whose work is over the budget for the target frame rate are
+    kept as hitches together with the sprite counts at the time.
+    """
+
+    def __init__(self, size=600, fps=60, max_hitches=50):
+        """Create empty ring buffers holding the last size frames."""
+        self.size = size
+        self.budget = 1000 / fps
+        self._rows = {phase: row for row, phase in enumerate(PHASES)}
+        # One row per phase plus one for the frame's work.
+        self.times = np.zeros((len(PHASES) + 1, size))
+        self.counts = np.zeros((len(GROUPS), size), dtype=np.int32)
+        self.frame_numbers = np.full(size, -1, dtype=np.int64)
+        self.histogram = np.zeros(
+            (len(PHASES) + 1, len(BIN_EDGES_MS) + 1), dtype=np.int64)
+        self.frames = 0
+        self.over_budget = 0
+        self.hitches = deque(maxlen=max_hitches)
+        # Whether the scoreboard draws the overlay.
+        self.overlay = False
+        self._slot = 0
+        self._last = perf_counter()
+
+    def start_frame(self):
+        """Start timing a new frame."""
+        self._slot = self.frames % self.size
+        self.times[:, self._slot] = 0
+        # The slot only counts once end_frame() has filled it in.
+        self.frame_numbers[self._slot] = -1
+        self._last = perf_counter()
+
+    def lap(self, phase):
+        """Charge the time since the previous lap to phase."""
+        now = perf_counter()
+        self.times[self._rows[phase], self._slot] += (now - self._last) * 1000
+        self._last = now
+
+    def end_frame(self, ai_game):
+        """Finish the frame and record how many sprites are alive."""
+        slot = self._slot
+        times = self.times[:, slot]
+        times[-1] = times[:-2].sum()
+        for row, group in enumerate(GROUPS):
+            self.counts[row, slot] = len(getattr(ai_game, group))
+        self.frame_numbers[slot] = self.frames
+
+        bins = np.searchsorted(BIN_EDGES_MS, times, side='right')
+        self.histogram[np.arange(len(times)), bins] += 1
+        if times[-1] > self.budget:
+            self.over_budget += 1
+            self.hitches.append(self._frame_record(slot))
+        self.frames += 1
+
+    def last_work(self):
+        """Return the work time of the last finished frame in ms."""
+        return float(self.times[-1, (self.frames - 1) % self.size])
+
+    def _frame_record(self, slot):
+        record = {'frame': int(self.frame_numbers[slot])}
+        for row, phase in enumerate(PHASES):
+            record[phase] = round(float(self.times[row, slot]), 3)
+        record['work'] = round(float(self.times[-1, slot]), 3)
+        for row, group in enumerate(GROUPS):
+            record[f'{group}_alive'] = int(self.counts[row, slot])
+        return record
+
+    def _recent_slots(self):
+        """Return the filled ring buffer slots, oldest first."""
+        if self.frames <= self.size:
+            slots = np.arange(self.frames)
+        else:
+            slots = np.roll(np.arange(self.size), -(self.frames % self.size))
+        return slots[self.frame_numbers[slots] >= 0]
+
+    def summary(self):
+        """Return the latest, mean, p99 and max time of every phase in ms."""
+        slots = self._recent_slots()
+        summary = {}
+        if not len(slots):
+            return summary
+        last = slots[-1]
+        for row, phase in enumerate(PHASES + ('work',)):
+            times = self.times[row, slots]
+            summary[phase] = {
+                'last': float(times[-1]),
+                'mean': float(times.mean()),
+                'p99': float(np.percentile(times, 99)),
+                'max': float(times.max()),
+            }
+        summary['sprites'] = {
+            group: int(self.counts[row, last])
+            for row, group in enumerate(GROUPS)}
+        return summary
+
+    def export(self, path):
+        """Write the recent frames to path as CSV, or everything as JSON.
+
+        The format comes from the file extension.
+        """
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['frame', *PHASES, 'work',
+                                 *(f'{group}_alive' for group in GROUPS)])
+                for slot in self._recent_slots():
+                    writer.writerow(self._frame_record(slot).values())
+        elif path.endswith('.json'):
+            histograms = {
+                phase: self.histogram[row].tolist()
+                for row, phase in enumerate(PHASES + ('work',))}
+            data = {
+                'frames': self.frames,
+                'budget_ms': self.budget,
+                'over_budget': self.over_budget,
+                'summary': self.summary(),
+                'bin_edges_ms': list(BIN_EDGES_MS),
+                'histograms': histograms,
+                'hitches': list(self.hitches),
+                'recent_frames': [self._frame_record(slot)
+                                  for slot in self._recent_slots()],
+            }
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=2)
+        else:
+            raise ValueError("Profile exports must end in .csv or .json.")
+
+
+class NullProfiler:
+    """Stand in for a FrameProfiler when nobody reads the timings."""
+
+    def lap(self, phase):
+        pass
+
+
+class StartupTimer:
+    """Time the phases of starting the game, up to its first frame.
+
+    lap(phase) charges the time since the previous lap to phase, like
+    FrameProfiler.lap(). Work finished on another thread is added with
+    record() and is not counted towards the time to the first frame.
+    """
+
+    def __init__(self):
+        """Start the clock."""
+        self.start = perf_counter()
+        self._last = self.start
+        self.phases = {}
+        self.background = {}
+        self.first_frame = None
+
+    def lap(self, phase):
+        """Charge the time since the previous lap to phase."""
+        now = perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0) + (now - self._last)
+        self._last = now
+
+    def record(self, phase, seconds):
+        """Add the duration of work done on a background thread."""
+        self.background[phase] = seconds
+
+    def frame_drawn(self):
+        """Note the end of the first frame; later calls are ignored."""
+        if self.first_frame is None:
+            self.lap('first_frame')
+            self.first_frame = self._last - self.start
+
+    def report(self):
+        """Return the phase timings as printable lines."""
+        lines = [f"{phase}: {seconds * 1000:.1f} ms"
+                 for phase, seconds in self.phases.items()]
+        if self.first_frame is not None:
+            lines.append(f"first frame after {self.first_frame * 1000:.1f} ms")
+        lines.extend(f"{phase} (background): {seconds * 1000:.1f} ms"
+                     for phase, seconds in self.background.items())
+        return '\n'.join(lines)
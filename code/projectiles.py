@@ -0,0 +1,363 @@
+from operator import attrgetter
+
+import numpy as np
+from pygame import Rect
+from pygame.sprite import Group, Sprite
+
+
+# Below this many projectiles pygame's own C rect tests beat building arrays,
+# and moving them one by one beats NumPy's fixed cost per call.
+MATRIX_THRESHOLD = 16
+# Testing a single rect, or the edges of the screen, against each projectile
+# in turn stays cheaper than a handful of array passes for longer.
+SCAN_THRESHOLD = 64
+
+_by_slot = attrgetter('slot')
+
+
+def _round_coords(values):
+    """Round like pygame.Rect does when it is given a float (half away from 0)."""
+    return np.copysign(np.floor(np.abs(values) + 0.5), values)
+
+
+class ProjectileStore:
+    """Keep projectile positions, velocities and alive flags in NumPy arrays.
+
+    Each projectile owns one slot. Free slots are reused before the arrays
+    grow, so a steady stream of shots does not reallocate anything.
+    """
+
+    def __init__(self, capacity=64):
+        """Allocate room for capacity projectiles."""
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.top = np.zeros(capacity)
+        self.width = np.zeros(capacity)
+        self.height = np.zeros(capacity)
+        self.velocity = np.zeros(capacity)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.sprites = [None] * capacity
+        self._free_slots = list(range(capacity - 1, -1, -1))
+
+    @property
+    def capacity(self):
+        return len(self.alive)
+
+    def allocate(self, sprite, rect, y, velocity):
+        """Store a projectile and return the slot it lives in."""
+        if not self._free_slots:
+            self._grow()
+        slot = self._free_slots.pop()
+        self.x[slot] = rect.x
+        self.y[slot] = y
+        self.top[slot] = rect.y
+        self.width[slot] = rect.width
+        self.height[slot] = rect.height
+        self.velocity[slot] = velocity
+        self.alive[slot] = True
+        self.sprites[slot] = sprite
+        return slot
+
+    def release(self, slot):
+        """Mark a slot as free again."""
+        self.alive[slot] = False
+        self.sprites[slot] = None
+        self._free_slots.append(slot)
+
+    def _grow(self):
+        """Double the size of every array."""
+        old = self.capacity
+        new = old * 2 if old else 16
+        for name in ('x', 'y', 'top', 'width', 'height', 'velocity', 'alive'):
+            array = getattr(self, name)
+            grown = np.zeros(new, dtype=array.dtype)
+            grown[:old] = array
+            setattr(self, name, grown)
+        self.sprites.extend([None] * (new - old))
+        self._free_slots.extend(range(new - 1, old - 1, -1))
+
+    def live_slots(self):
+        """Return the indices of every projectile in use."""
+        return np.flatnonzero(self.alive)
+
+    def free_slots(self):
+        """Return the free slots, the next one to be used last."""
+        return list(self._free_slots)
+
+    def swap(self, a, b):
+        """Exchange what is stored in slots a and b, used or free.
+
+        The free slot list is left alone; see restore_free_slots().
+        """
+        for name in ('x', 'y', 'top', 'width', 'height', 'velocity', 'alive'):
+            array = getattr(self, name)
+            array[a], array[b] = array[b], array[a]
+        sprites = self.sprites
+        sprites[a], sprites[b] = sprites[b], sprites[a]
+        for slot in (a, b):
+            if sprites[slot] is not None:
+                sprites[slot].slot = slot
+
+    def reserve(self, capacity):
+        """Grow until there are at least capacity slots."""
+        while self.capacity < capacity:
+            self._grow()
+
+    def restore_free_slots(self, capacity, free_slots):
+        """Hand out free slots in the order a store of capacity slots
+        with free_slots (see free_slots()) would.
+
+        Collisions are tested in slot order, so a restored game only
+        plays on like the saved one if its projectiles get the same
+        slots. Raises ValueError if free_slots are not exactly the
+        unused slots.
+        """
+        self.reserve(capacity)
+        # Slots beyond capacity come after the others, in the order
+        # growing the store would have added them.
+        free = [*range(self.capacity - 1, capacity - 1, -1), *free_slots]
+        if sorted(free) != np.flatnonzero(~self.alive).tolist():
+            raise ValueError("free slots don't match the slots in use")
+        self._free_slots = free
+
+    def move(self):
+        """Move every projectile by its velocity and round its rect top;
+        return the live slots whose top changed.
+        """
+        self.y += self.velocity
+        top = _round_coords(self.y)
+        moved = np.flatnonzero((top != self.top) & self.alive)
+        self.top = top
+        return moved
+
+    def outside(self, top, bottom):
+        """Return the live slots that are completely above top or below bottom."""
+        gone = (self.top + self.height <= top) | (self.top >= bottom)
+        return np.flatnonzero(gone & self.alive)
+
+    def overlap_matrix(self, slots, rects):
+        """Return a (len(slots), len(rects)) array of rect overlaps.
+
+        rects is an (n, 4) array of x, y, width, height rows.
+        """
+        x = self.x[slots][:, None]
+        y = self.top[slots][:, None]
+        width = self.width[slots][:, None]
+        height = self.height[slots][:, None]
+        return ((x < rects[:, 0] + rects[:, 2]) & (x + width > rects[:, 0])
+                & (y < rects[:, 1] + rects[:, 3]) & (y + height > rects[:, 1]))
+
+
+class Projectile(Sprite):
+    """A sprite whose vertical position can live in a ProjectileStore.
+
+    While the projectile belongs to a ProjectileGroup its y value is read
+    from and written to the group's store.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.store = None
+        self.slot = None
+        self._y = 0.0
+
+    @property
+    def y(self):
+        if self.store is None:
+            return self._y
+        return float(self.store.y[self.slot])
+
+    @y.setter
+    def y(self, value):
+        if self.store is None:
+            self._y = value
+        else:
+            self.store.y[self.slot] = value
+            # The group only touches rects whose top moves, so keep the
+            # rect in step with the store.
+            self.rect.y = self.store.top[self.slot] = _round_coords(value)
+
+
+class ProjectileGroup(Group):
+    """A sprite group that moves, culls and hit-tests projectiles in bulk.
+
+    Sprites added to the group must be Projectiles with a rect and a
+    velocity attribute, and may only belong to one ProjectileGroup at a
+    time. If a pool is given, projectiles are released back to it when
+    they leave the group.
+    """
+
+    def __init__(self, *sprites, capacity=64, pool=None):
+        self.store = ProjectileStore(capacity)
+        self.pool = pool
+        super().__init__(*sprites)
+
+    def __len__(self):
+        # Group would copy every sprite into a list just to count them.
+        return len(self.spritedict)
+
+    def __bool__(self):
+        return bool(self.spritedict)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        sprite.slot = self.store.allocate(
+            sprite, sprite.rect, sprite.y, sprite.velocity)
+        sprite.store = self.store
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        sprite._y = float(self.store.y[sprite.slot])
+        self.store.release(sprite.slot)
+        sprite.store = None
+        sprite.slot = None
+        if self.pool is not None:
+            self.pool.release(sprite)
+
+    def update(self, *args, **kwargs):
+        """Move every projectile and bring the sprite rects up to date."""
+        if not self.spritedict:
+            return
+        store = self.store
+        if len(self.spritedict) < MATRIX_THRESHOLD:
+            y, top, velocity = store.y, store.top, store.velocity
+            for sprite in self.spritedict:
+                slot = sprite.slot
+                rect = sprite.rect
+                y[slot] = rect.y = y.item(slot) + velocity.item(slot)
+                # The rect rounds the float the way _round_coords() does.
+                top[slot] = rect.y
+            return
+        # Slow projectiles only cross a pixel every few steps, so only the
+        # rects that moved are written.
+        moved = store.move()
+        sprites = store.sprites
+        for slot, top in zip(moved.tolist(), store.top[moved].tolist()):
+            sprites[slot].rect.y = top
+
+    def _overlapping(self, rect):
+        """Return the live slots whose rect overlaps rect."""
+        store = self.store
+        left, top, width, height = rect
+        x = store.x
+        y = store.top
+        hit = ((x < left + width) & (x + store.width > left)
+               & (y < top + height) & (y + store.height > top)
+               & store.alive)
+        return np.flatnonzero(hit)
+
+    def place(self, sprite, x, top, y, velocity, slot=None):
+        """Move a projectile in the group and give it a new velocity.
+
+        If slot is given, the projectile swaps slots with whatever is in
+        that slot.
+        """
+        sprite.rect.x = x
+        sprite.rect.y = top
+        sprite.velocity = velocity
+        store = self.store
+        if slot is not None and slot != sprite.slot:
+            store.swap(sprite.slot, slot)
+        slot = sprite.slot
+        store.x[slot] = x
+        store.y[slot] = y
+        store.top[slot] = top
+        store.velocity[slot] = velocity
+
+    def remove_outside(self, top, bottom):
+        """Remove projectiles that have left the band between top and bottom."""
+        if not self.spritedict:
+            return
+        if len(self.spritedict) < SCAN_THRESHOLD:
+            gone = [sprite for sprite in self.spritedict
+                    if sprite.rect.bottom <= top or sprite.rect.top >= bottom]
+            # Free the slots in the same order as the arrays would.
+            for sprite in sorted(gone, key=_by_slot):
+                sprite.kill()
+            return
+        for slot in self.store.outside(top, bottom).tolist():
+            self.store.sprites[slot].kill()
+
+    def collide_rect(self, rect):
+        """Return the projectiles overlapping rect, lowest slot first."""
+        if not self.spritedict:
+            return []
+        if len(self.spritedict) < SCAN_THRESHOLD:
+            hits = [sprite for sprite in self.spritedict
+                    if rect.colliderect(sprite.rect)]
+            if len(hits) > 1:
+                hits.sort(key=_by_slot)
+            return hits
+        # A single rect is cheapest to test against every projectile at
+        # once.
+        slots = self._overlapping(rect)
+        return [self.store.sprites[slot] for slot in slots.tolist()]
+
+    def collide_group(self, group, dokill, dokill_other, collided=None):
+        """Work like pygame.sprite.groupcollide with this group first.
+
+        If group can report its bounds and answer rect queries (see
+        Fleet), only projectiles inside the bounds are looked up.
+        Otherwise large volleys test all pairs in one vectorized pass and
+        a handful of projectiles use Rect.collidelistall.
+
+        Pairs are found by their rects. If collided is given, it is called
+        as collided(projectile, sprite) on each overlapping pair as a
+        narrow phase, such as collision.collide_mask, and the pair only
+        counts if it returns True.
+        """
+        if not self.spritedict or not group:
+            return {}
+        if hasattr(group, 'bounds'):
+            return self._collide_bounded(group, dokill, dokill_other,
+                                         collided)
+        collisions = {}
+        store = self.store
+        slots = store.live_slots().tolist()
+        others = group.sprites()
+        rects = [sprite.rect for sprite in others]
+        if len(slots) < MATRIX_THRESHOLD:
+            hits = [(slot, store.sprites[slot].rect.collidelistall(rects))
+                    for slot in slots]
+        else:
+            matrix = store.overlap_matrix(slots, np.array(rects))
+            hits = [(slots[row], np.flatnonzero(matrix[row]).tolist())
+                    for row in np.flatnonzero(matrix.any(axis=1)).tolist()]
+        claimed = set()
+        for slot, cols in hits:
+            projectile = store.sprites[slot]
+            cols = [col for col in cols if col not in claimed and (
+                collided is None or collided(projectile, others[col]))]
+            if not cols:
+                continue
+            if dokill_other:
+                claimed.update(cols)
+            collisions[projectile] = [others[col] for col in cols]
+        self._kill_collided(collisions, dokill, dokill_other)
+        return collisions
+
+    def _collide_bounded(self, group, dokill, dokill_other, collided=None):
+        """Collide against a group with bounds() and collide_rect()."""
+        collisions = {}
+        left, right, top, bottom = group.bounds()
+        claimed = set()
+        for projectile in self.collide_rect(
+                Rect(left, top, right - left, bottom - top)):
+            hit = [sprite for sprite in group.collide_rect(projectile.rect)
+                   if sprite not in claimed
+                   and (collided is None or collided(projectile, sprite))]
+            if not hit:
+                continue
+            if dokill_other:
+                claimed.update(hit)
+            collisions[projectile] = hit
+        self._kill_collided(collisions, dokill, dokill_other)
+        return collisions
+
+    def _kill_collided(self, collisions, dokill, dokill_other):
+        for projectile, hit in collisions.items():
+            if dokill:
+                projectile.kill()
+            if dokill_other:
+                for sprite in hit:
+                    sprite.kill()
@@ -0,0 +1,50 @@
+from functools import lru_cache
+
+import pygame
+
+
+@lru_cache(maxsize=None)
+def shield_surface(radius, color):
+    """Return a shared translucent circle of the given radius and RGBA color."""
+    surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+    pygame.draw.circle(surface, color, (radius, radius), radius)
+    return surface
+
+
+class GlyphAtlas:
+    """Render each character of a font once and build text from the glyphs.
+
+    Score strings only use digits and commas, so after the first few
+    frames building a new score image is a handful of small blits instead
+    of a full font render.
+    """
+
+    def __init__(self, font, color, bg_color, characters='0123456789,'):
+        """Pre-render the given characters."""
+        self.font = font
+        self.color = color
+        self.bg_color = bg_color
+        self.glyphs = {}
+        for char in characters:
+            self._glyph(char)
+
+    def _glyph(self, char):
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            glyph = self.font.render(char, True, self.color, self.bg_color)
+            self.glyphs[char] = glyph
+        return glyph
+
+    def render(self, text):
+        """Return an image of text put together from cached glyphs."""
+        glyphs = [self._glyph(char) for char in text]
+        width = sum(glyph.get_width() for glyph in glyphs)
+        height = max((glyph.get_height() for glyph in glyphs),
+                     default=self.font.get_height())
+        image = pygame.Surface((width, height))
+        image.fill(self.bg_color)
+        x = 0
+        for glyph in glyphs:
+            image.blit(glyph, (x, 0))
+            x += glyph.get_width()
+        return image
@@ -0,0 +1,178 @@
+from collections import deque
+
+import pygame
+
+
+class DirtyRectRenderer:
+    """Redraw and push only the parts of the screen that changed.
+
+    Each frame the areas drawn on the previous frame are painted over with
+    the background colour, everything is drawn again, and only the old and
+    new areas are sent to the display.
+    """
+
+    def __init__(self, screen, bg_color, max_rects=256, present=None):
+        """Set up the renderer; the first frame is always a full redraw.
+
+        present(rects) shows the frame, or the whole screen when rects is
+        None; by default it updates the display directly.
+        """
+        self.screen = screen
+        self.bg_color = bg_color
+        self.present = present or self._update_display
+        # Past this many rects a single full-screen flip is cheaper.
+        self.max_rects = max_rects
+        self.previous = []
+        self.full_redraw = True
+
+    def invalidate(self):
+        """Force the next frame to repaint the whole screen."""
+        self.full_redraw = True
+
+    def render(self, draw):
+        """Draw a frame with draw(), which returns the rects it touched."""
+        if self.full_redraw or len(self.previous) > self.max_rects:
+            self.screen.fill(self.bg_color)
+            self.previous = draw()
+            self.present(None)
+            self.full_redraw = False
+            return
+
+        for rect in self.previous:
+            self.screen.fill(self.bg_color, rect)
+        current = draw()
+        self.present(self.previous + current)
+        self.previous = current
+
+    @staticmethod
+    def _update_display(rects):
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+
+class ScaledDisplay:
+    """Show a fixed-size logical surface in a window that keeps its size.
+
+    The game draws in logical units onto surface. With pygame.SCALED the
+    display has the logical size and SDL stretches it to the window, so
+    the game draws straight onto the display. Otherwise the window has
+    window_size and present() stretches frames into it in software.
+
+    The window is opened once and never resized. Frames stretched in
+    software pass through the internal resolution on the way: given more
+    than one scale, adapt() lowers it while recent frames go over budget
+    and raises it again once they are comfortably under it. Below full
+    resolution a frame is smooth-scaled down to the internal size and
+    then plainly scaled into the window, which costs less than
+    smooth-scaling the whole logical frame. A display that already has
+    the logical size would only pay for extra scaling passes, so it
+    always stays at full resolution.
+    """
+
+    def __init__(self, logical_size, scales=(1.0, 0.75, 0.5),
+                 use_scaled=True, window_size=None, budget=1000 / 60,
+                 window=60):
+        """Open the window at full internal resolution."""
+        self.logical_size = logical_size
+        self.scales = scales
+        # The dummy driver has no window to fit, and emulating SCALED in
+        # software only makes every flip slower.
+        self.use_scaled = (use_scaled
+                           and pygame.display.get_driver() != 'dummy')
+        self.window_size = window_size or logical_size
+        self.budget = budget
+        self.adaptive = len(scales) > 1
+        self.level = 0
+        self.changes = 0
+        # Recent frame times; adapt() judges a full window at a time.
+        self.frame_times = deque(maxlen=window)
+        self._open()
+        if self.display.get_size() == logical_size:
+            self.surface = self.display
+            self.adaptive = False
+        else:
+            self.surface = pygame.Surface(logical_size).convert()
+        self._internal = None
+        # The first frame must be shown in full.
+        self.full_present = True
+
+    @property
+    def internal_size(self):
+        """Return the size frames are rendered at before the window."""
+        scale = self.scales[self.level]
+        width, height = self.logical_size
+        return round(width * scale), round(height * scale)
+
+    def _open(self):
+        self.display = None
+        if self.use_scaled:
+            try:
+                self.display = pygame.display.set_mode(
+                    self.logical_size, pygame.SCALED)
+            except pygame.error:
+                # Not every video driver can scale; stretch the frames in
+                # software instead.
+                self.use_scaled = False
+        if self.display is None:
+            self.display = pygame.display.set_mode(self.window_size)
+
+    def present(self, rects=None):
+        """Show the logical surface; rects limits the update if possible."""
+        if self.surface is not self.display:
+            self._copy_to_display()
+            rects = None
+        if rects is None or self.full_present:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+        self.full_present = False
+
+    def _copy_to_display(self):
+        """Stretch the logical surface into the window."""
+        display_size = self.display.get_size()
+        if self.level == 0:
+            pygame.transform.smoothscale(
+                self.surface, display_size, self.display)
+            return
+        # Lower the resolution first so the final stretch is cheap.
+        internal_size = self.internal_size
+        if (self._internal is None
+                or self._internal.get_size() != internal_size):
+            self._internal = pygame.Surface(internal_size).convert()
+        pygame.transform.smoothscale(
+            self.surface, internal_size, self._internal)
+        pygame.transform.scale(self._internal, display_size, self.display)
+
+    def adapt(self, frame_ms):
+        """Record a frame's work time and change resolution if needed."""
+        if not self.adaptive:
+            return
+        self.frame_times.append(frame_ms)
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return
+        mean = sum(self.frame_times) / len(self.frame_times)
+        if mean > self.budget * 0.9 and self.level < len(self.scales) - 1:
+            self.set_level(self.level + 1)
+        elif mean < self.budget * 0.5 and self.level > 0:
+            self.set_level(self.level - 1)
+
+    def set_level(self, level):
+        """Pass frames through the internal resolution scales[level].
+
+        A display that is drawn on directly keeps its resolution.
+        """
+        if self.surface is self.display:
+            return
+        self.level = level
+        self.changes += 1
+        self.frame_times.clear()
+
+    def to_logical(self, pos):
+        """Map a window position, such as the mouse, to logical units."""
+        # With SCALED, SDL already reports positions on the display.
+        source_width, source_height = self.display.get_size()
+        width, height = self.logical_size
+        return (pos[0] * width // source_width,
+                pos[1] * height // source_height)
@@ -0,0 +1,50 @@
+import argparse
+import time
+
+from headless import HeadlessInvasion
+from settings import Settings
+from input_log import (InputLog, ReplayMismatch, state_hash,
+                       LEFT, RIGHT, START, FIRE_MASK, FIRE_SHIFT)
+
+
+def replay(log, settings=None):
+    """Run a recorded session as fast as possible and check its checkpoints.
+
+    Returns the finished HeadlessInvasion. Raises ReplayMismatch at the
+    first checkpoint whose state hash differs from the recording.
+    """
+    settings = settings or Settings()
+    settings.sim_rate = log.sim_rate
+    ai_game = HeadlessInvasion(settings, seed=log.seed)
+    checkpoints = dict(log.checkpoints)
+    ship = ai_game.ship
+    step = 0
+    for mask in log.masks():
+        if mask & START:
+            ai_game._start_game()
+        ship.moving_left = bool(mask & LEFT)
+        ship.moving_right = bool(mask & RIGHT)
+        for _ in range((mask & FIRE_MASK) >> FIRE_SHIFT):
+            ai_game._fire_bullet()
+        ai_game._update_simulation()
+        step += 1
+        expected = checkpoints.get(step)
+        if expected is not None and state_hash(ai_game) != expected:
+            raise ReplayMismatch(f"State differs from the recording at step {step}.")
+    return ai_game
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Replay a session recorded with alien_invasion.py --record.")
+    parser.add_argument('path', help="input log to replay")
+    args = parser.parse_args()
+
+    log = InputLog.load(args.path)
+    start = time.perf_counter()
+    ai_game = replay(log)
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {log.steps} steps in {elapsed:.2f} s "
+          f"({log.steps / max(elapsed, 1e-9):,.0f} steps/s), "
+          f"{len(log.checkpoints)} checkpoints matched.")
+    print(f"Final score {ai_game.stats.score}, level {ai_game.stats.level}.")
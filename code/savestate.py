@@ -0,0 +1,432 @@
+import os
+import queue
+import struct
+import threading
+from collections import deque
+
+MAGIC = b'AIST'
+VERSION = 2
+# Screen width and height and simulation rate, which a state only makes
+# sense with, then whether the game is seeded and its seed.
+_HEADER = struct.Struct('<4sBHHHBq')
+# Ticks, game active, respawning and whether there is a partner ship.
+_GAME = struct.Struct('<IBBB')
+# Score, high score, level, ships left and the game's score store id.
+_STATS = struct.Struct('<QQHB16s')
+# The Settings values that change during a game.
+_SETTINGS = struct.Struct('<dddbQ')
+# x, previous x, rect y, moving left and right, shield active, shield hits.
+_SHIP = struct.Struct('<ddhBBBb')
+# Offset x, previous offset x and offset y of the fleet.
+_FLEET = struct.Struct('<ddh')
+_COUNT = struct.Struct('<H')
+# An alien's home position in the formation.
+_ALIEN = struct.Struct('<hh')
+# Rect x and y, exact y, velocity, slot in the projectile store and the
+# ship that fired (0 or 1).
+_BULLET = struct.Struct('<hhddHB')
+# Rect x and y, exact y, velocity and slot in the projectile store.
+_ALIEN_BULLET = struct.Struct('<hhddH')
+# A free slot of a projectile store; the store's capacity and its free
+# slots follow its projectiles.
+_SLOT = struct.Struct('<H')
+# Kind, milliseconds until it fires and, for alien shots, the alien's
+# index in the fleet.
+_TIMER = struct.Struct('<BqH')
+# The Mersenne Twister behind ai_game.rng: 624 words and a position,
+# then whether a Gaussian value is waiting and the value.
+_RNG = struct.Struct('<625IBd')
+
+ALIEN_SHOT = 0
+RESPAWN = 1
+
+
+class StateError(ValueError):
+    """Raised when a saved state can't be restored into a game."""
+
+
+def dump(ai_game):
+    """Return the complete state of ai_game's simulation as bytes.
+
+    Drawing, sound and particles are not part of the state; neither is a
+    network connection.
+    """
+    settings = ai_game.settings
+    stats = ai_game.stats
+    seed = ai_game.seed
+    partner = ai_game.partner
+    parts = [
+        _HEADER.pack(MAGIC, VERSION, settings.screen_width,
+                     settings.screen_height, settings.sim_rate,
+                     seed is not None, seed or 0),
+        _GAME.pack(ai_game.ticks, ai_game.game_active, ai_game.respawning,
+                   partner is not None),
+        _STATS.pack(stats.score, stats.high_score, stats.level,
+                    stats.ships_left, bytes.fromhex(stats.game)),
+        _SETTINGS.pack(settings.ship_speed, settings.bullet_speed,
+                       settings.alien_speed, settings.fleet_direction,
+                       settings.alien_points),
+        _pack_ship(ai_game.ship),
+    ]
+    if partner is not None:
+        parts.append(_pack_ship(partner))
+
+    fleet = ai_game.aliens
+    aliens = fleet.sprites()
+    parts.append(_FLEET.pack(fleet.offset_x, fleet.previous_offset_x,
+                             fleet.offset_y))
+    parts.append(_COUNT.pack(len(aliens)))
+    parts.extend(_ALIEN.pack(*alien.home) for alien in aliens)
+
+    bullets = ai_game.bullets.sprites()
+    parts.append(_COUNT.pack(len(bullets)))
+    parts.extend(
+        _BULLET.pack(bullet.rect.x, bullet.rect.y, bullet.y, bullet.velocity,
+                     bullet.slot,
+                     bullet.ship is partner and partner is not None)
+        for bullet in bullets)
+    parts.append(_pack_slots(ai_game.bullets.store))
+    alien_bullets = ai_game.alien_bullets.sprites()
+    parts.append(_COUNT.pack(len(alien_bullets)))
+    parts.extend(
+        _ALIEN_BULLET.pack(bullet.rect.x, bullet.rect.y, bullet.y,
+                           bullet.velocity, bullet.slot)
+        for bullet in alien_bullets)
+    parts.append(_pack_slots(ai_game.alien_bullets.store))
+
+    parts.append(_pack_timers(ai_game, aliens))
+    _, words, gauss = ai_game.rng.getstate()
+    parts.append(_RNG.pack(*words, gauss is not None, gauss or 0.0))
+    return b''.join(parts)
+
+
+def _pack_ship(ship):
+    return _SHIP.pack(ship.x, ship.previous_x, ship.rect.y, ship.moving_left,
+                      ship.moving_right, ship.shield_active, ship.shield_hits)
+
+
+def _pack_slots(store):
+    free = store.free_slots()
+    return (_COUNT.pack(store.capacity) + _COUNT.pack(len(free))
+            + struct.pack(f'<{len(free)}H', *free))
+
+
+def _pack_timers(ai_game, aliens):
+    """Pack the scheduler's timers with their time left, in firing order."""
+    index = {alien: number for number, alien in enumerate(aliens)}
+    now = ai_game.get_ticks()
+    timers = []
+    for timer in ai_game.scheduler.pending():
+        if timer.callback == ai_game._alien_shoot:
+            alien = timer.args[0]
+            if alien not in index:
+                # The alien is gone; the shot would do nothing.
+                continue
+            timers.append(_TIMER.pack(ALIEN_SHOT, timer.time - now,
+                                      index[alien]))
+        elif timer.callback == ai_game._end_respawn_pause:
+            timers.append(_TIMER.pack(RESPAWN, timer.time - now, 0))
+        else:
+            raise StateError(f"can't save a timer for {timer.callback!r}")
+    return _COUNT.pack(len(timers)) + b''.join(timers)
+
+
+def load(ai_game, data):
+    """Put ai_game in the state that dump() returned as data.
+
+    Sprites already in the game are reused and missing ones come from
+    the game's pools, so restoring allocates next to nothing. The game
+    must have the same screen size and simulation rate as the one that
+    was saved.
+    """
+    reader = _Reader(data)
+    magic, version, width, height, sim_rate, seeded, seed = \
+        reader.read(_HEADER)
+    if magic != MAGIC:
+        raise StateError("not an Alien Invasion saved state")
+    if version != VERSION:
+        raise StateError(f"saved state is version {version}, "
+                         f"expected {VERSION}")
+    settings = ai_game.settings
+    if (width, height, sim_rate) != (settings.screen_width,
+                                     settings.screen_height,
+                                     settings.sim_rate):
+        raise StateError(f"saved state is for a {width}x{height} screen at "
+                         f"{sim_rate} steps/s")
+
+    ticks, game_active, respawning, has_partner = reader.read(_GAME)
+    score, high_score, level, ships_left, game = reader.read(_STATS)
+    (settings.ship_speed, settings.bullet_speed, settings.alien_speed,
+     settings.fleet_direction, settings.alien_points) = reader.read(_SETTINGS)
+    ship_state = reader.read(_SHIP)
+    partner_state = reader.read(_SHIP) if has_partner else None
+
+    ai_game.seed = seed if seeded else None
+    ai_game.ticks = ticks
+    ai_game.game_active = bool(game_active)
+    ai_game.respawning = bool(respawning)
+    stats = ai_game.stats
+    stats.score = score
+    stats.high_score = max(stats.high_score, high_score)
+    stats.level = level
+    stats.ships_left = ships_left
+    stats.game = game.hex()
+    _restore_ship(ai_game.ship, ship_state)
+    if partner_state is None:
+        ai_game.partner = None
+    else:
+        if ai_game.partner is None:
+            ai_game.add_partner()
+        _restore_ship(ai_game.partner, partner_state)
+
+    ai_game.scheduler.clear()
+    aliens = _restore_fleet(ai_game, reader)
+    ships = (ai_game.ship, ai_game.partner)
+    records = reader.read_many(_BULLET)
+    bullets = _restore_projectiles(
+        ai_game.bullets, records, reader,
+        lambda record: ai_game.bullet_pool.acquire(ships[record[5]]))
+    for bullet, record in zip(bullets, records):
+        bullet.ship = ships[record[5]]
+    _restore_projectiles(
+        ai_game.alien_bullets, reader.read_many(_ALIEN_BULLET), reader,
+        lambda record: ai_game.alien_bullet_pool.acquire(*record[:2]))
+
+    now = ai_game.get_ticks()
+    for kind, time_left, alien_index in reader.read_many(_TIMER):
+        if kind == ALIEN_SHOT:
+            alien = aliens[alien_index]
+            alien.shot_timer = ai_game.scheduler.schedule_at(
+                now + time_left, ai_game._alien_shoot, alien)
+        else:
+            ai_game.scheduler.schedule_at(
+                now + time_left, ai_game._end_respawn_pause)
+
+    # Recycled aliens drew new shot delays from the generator above, so
+    # its state goes back last.
+    *words, has_gauss, gauss = reader.read(_RNG)
+    ai_game.rng.setstate((3, tuple(words), gauss if has_gauss else None))
+
+    ai_game.particles.clear()
+    sb = ai_game.sb
+    sb.prep_score()
+    sb.prep_high_score()
+    sb.prep_level()
+    sb.prep_ships()
+
+
+def _restore_ship(ship, state):
+    (ship.x, ship.previous_x, ship.rect.y, moving_left, moving_right,
+     shield_active, ship.shield_hits) = state
+    ship.rect.x = ship.x
+    ship.moving_left = bool(moving_left)
+    ship.moving_right = bool(moving_right)
+    ship.shield_active = bool(shield_active)
+
+
+def _restore_fleet(ai_game, reader):
+    """Rebuild the fleet from reader; return its aliens in saved order.
+
+    Aliens already at a saved home position stay in the fleet, which
+    after rolling back a few steps is nearly all of them. The others go
+    back to the pool and the missing ones come from it. Only the order
+    of the fleet's sprites can differ from the saved game's, and nothing
+    in the simulation depends on it.
+    """
+    fleet = ai_game.aliens
+    offset_x, previous_offset_x, offset_y = reader.read(_FLEET)
+    homes = reader.read_many(_ALIEN)
+    at_home = {}
+    for alien in fleet.sprites():
+        alien.shot_timer = None
+        at_home.setdefault(alien.home, []).append(alien)
+    aliens = [at_home[home].pop() if at_home.get(home) else None
+              for home in homes]
+    for leftovers in at_home.values():
+        fleet.remove(*leftovers)
+    # A fleet that has just been emptied forgets its offset, so the
+    # offset is set after the leftovers are gone.
+    fleet.set_offset(offset_x, offset_y, previous_offset_x)
+    dx, dy = fleet.placed_offset
+    for number, alien in enumerate(aliens):
+        if alien is None:
+            home_x, home_y = homes[number]
+            alien = ai_game.alien_pool.acquire()
+            alien.rect.topleft = (home_x + dx, home_y + dy)
+            fleet.add(alien)
+            aliens[number] = alien
+    return aliens
+
+
+def _restore_projectiles(group, records, reader, acquire):
+    """Give group one projectile per record, in order, then read the
+    store's free slots from reader.
+
+    Every record starts with rect x, rect y, exact y, velocity and slot.
+    Projectiles already in the group are moved to the first records and
+    the rest come from acquire(record), so rolling back a few steps
+    allocates next to nothing. Every projectile ends up in its saved
+    slot. Returns the projectiles in record order.
+    """
+    (capacity,) = reader.read(_COUNT)
+    free_slots = [slot for (slot,) in reader.read_many(_SLOT)]
+    store = group.store
+    if any(record[4] >= capacity for record in records):
+        raise StateError("saved projectile slot is out of range")
+    store.reserve(capacity)
+    existing = group.sprites()
+    for projectile in existing[len(records):]:
+        group.remove(projectile)
+    projectiles = existing[:len(records)]
+    for record in records[len(existing):]:
+        projectile = acquire(record)
+        group.add(projectile)
+        projectiles.append(projectile)
+    for projectile, record in zip(projectiles, records):
+        group.place(projectile, *record[:5])
+    try:
+        store.restore_free_slots(capacity, free_slots)
+    except ValueError as e:
+        raise StateError(f"saved projectile slots don't add up: {e}") from None
+    return projectiles
+
+
+class _Reader:
+    """Unpack structs one after another from a bytes object."""
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def read(self, layout):
+        try:
+            values = layout.unpack_from(self.data, self.pos)
+        except struct.error as e:
+            raise StateError(f"saved state is cut short: {e}") from None
+        self.pos += layout.size
+        return values
+
+    def read_many(self, layout):
+        """Read a count, then that many records of layout."""
+        (count,) = self.read(_COUNT)
+        end = self.pos + count * layout.size
+        if end > len(self.data):
+            raise StateError("saved state is cut short")
+        records = list(layout.iter_unpack(self.data[self.pos:end]))
+        self.pos = end
+        return records
+
+
+def save(ai_game, path):
+    """Write ai_game's state to path, replacing any earlier state whole."""
+    _write_atomically(path, dump(ai_game))
+
+
+def restore(ai_game, path):
+    """Load the state saved at path into ai_game."""
+    with open(path, 'rb') as f:
+        load(ai_game, f.read())
+
+
+def _write_atomically(path, data):
+    # A power cut leaves either the old file or the new one, never half.
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+class Autosaver:
+    """Write saved states to a file from a background thread.
+
+    submit() only hands the bytes over, so the game never waits for the
+    disk. If states come in faster than they are written, only the
+    newest one waiting is written.
+    """
+
+    def __init__(self, path):
+        """Save to path; start() is not needed, the writer starts now."""
+        self.path = path
+        self._pending = queue.Queue(maxsize=1)
+        self.written = 0
+        self._writer = threading.Thread(
+            target=self._write_loop, name='Autosaver', daemon=True)
+        self._writer.start()
+
+    def submit(self, data):
+        """Queue data to be written, replacing a state not yet written."""
+        self._put(data)
+
+    def discard(self):
+        """Remove the saved state, for instance once the game is over."""
+        self._put(b'')
+
+    def _put(self, item):
+        while True:
+            try:
+                self._pending.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._pending.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def _write_loop(self):
+        while True:
+            data = self._pending.get()
+            if data is None:
+                break
+            try:
+                if data:
+                    _write_atomically(self.path, data)
+                    self.written += 1
+                elif os.path.exists(self.path):
+                    os.remove(self.path)
+            except OSError as e:
+                print(f"Warning: Could not autosave to {self.path}. "
+                      f"Error: {e}")
+
+    def close(self):
+        """Write what is still waiting and stop the writer thread."""
+        if self._writer.is_alive():
+            # Blocks until the writer has taken the last state.
+            self._pending.put(None)
+            self._writer.join()
+
+
+class RollbackBuffer:
+    """Keep the last few states in memory to step the game back to.
+
+    push() after a simulation step saves the game's state; rollback()
+    puts the game back the given number of steps, as far back as the
+    buffer reaches.
+    """
+
+    def __init__(self, capacity=600):
+        """Keep at most capacity states, dropping the oldest."""
+        self.states = deque(maxlen=capacity)
+
+    def __len__(self):
+        return len(self.states)
+
+    def push(self, ai_game):
+        """Save ai_game's state at its current tick."""
+        self.states.append((ai_game.ticks, dump(ai_game)))
+
+    def rollback(self, ai_game, steps=1):
+        """Restore the newest state at least steps behind the newest one;
+        return the tick it was saved at.
+
+        States newer than the one restored are dropped.
+        """
+        if not self.states:
+            raise StateError("nothing to roll back to")
+        target = self.states[-1][0] - steps
+        while len(self.states) > 1 and self.states[-1][0] > target:
+            self.states.pop()
+        ticks, data = self.states[-1]
+        load(ai_game, data)
+        return ticks
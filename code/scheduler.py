@@ -0,0 +1,70 @@
+import heapq
+from itertools import count
+
+
+class Timer:
+    """A callback waiting in a Scheduler; call cancel() to drop it."""
+
+    __slots__ = ('time', 'callback', 'args', 'cancelled')
+
+    def __init__(self, time, callback, args):
+        self.time = time
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    """Fire callbacks at game times kept in a binary heap.
+
+    advance() only touches timers that are due, so its cost depends on how
+    many timers expire rather than how many are waiting. Cancelled timers
+    stay in the heap until they reach the top and are then skipped.
+    """
+
+    def __init__(self, clock):
+        """Create an empty scheduler that reads the time from clock()."""
+        self.clock = clock
+        self._heap = []
+        self._order = count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, delay, callback, *args):
+        """Call callback(*args) delay milliseconds from now; return a Timer."""
+        return self.schedule_at(self.clock() + delay, callback, *args)
+
+    def schedule_at(self, time, callback, *args):
+        """Call callback(*args) once the clock reaches time; return a Timer."""
+        timer = Timer(time, callback, args)
+        heapq.heappush(self._heap, (time, next(self._order), timer))
+        return timer
+
+    def advance(self):
+        """Fire every timer that is due, in time order; return how many ran."""
+        now = self.clock()
+        heap = self._heap
+        fired = 0
+        while heap and heap[0][0] <= now:
+            timer = heapq.heappop(heap)[2]
+            if not timer.cancelled:
+                timer.callback(*timer.args)
+                fired += 1
+        return fired
+
+    def pending(self):
+        """Return the waiting timers that are not cancelled, in the order
+        they will fire.
+        """
+        return [timer for _, _, timer in sorted(self._heap)
+                if not timer.cancelled]
+
+    def clear(self):
+        """Drop every waiting timer."""
+        for _, _, timer in self._heap:
+            timer.cancel()
+        self._heap.clear()
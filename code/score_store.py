@@ -0,0 +1,141 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    game TEXT PRIMARY KEY,
+    score INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    played_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC);
+"""
+
+_UPSERT = """
+INSERT INTO scores (game, score, level, played_at) VALUES (?, ?, ?, ?)
+ON CONFLICT (game) DO UPDATE SET
+    score = excluded.score, level = excluded.level,
+    played_at = excluded.played_at
+"""
+
+
+def _connect(path):
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    # In WAL mode a commit is still atomic with NORMAL syncing; only the
+    # last few commits can be lost if the whole machine goes down.
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class ScoreStore:
+    """Keep every game's score in SQLite, written from a background thread.
+
+    submit() only records the latest score of a game in memory, so a
+    streak of kills costs a dictionary update per kill. The writer thread
+    wakes up, takes everything submitted since its last pass and commits
+    it in one transaction, so the file holds either the old scores or the
+    new ones even if the game crashes mid-write.
+    """
+
+    def __init__(self, path='scores.db', flush_interval=0.5,
+                 legacy_path='high_score.json'):
+        """Open or create the database and start the writer thread."""
+        self.path = path
+        self.flush_interval = flush_interval
+        # Reads happen on the main thread through their own connection.
+        self._reader = _connect(path)
+        with self._reader:
+            self._reader.executescript(_SCHEMA)
+        self._import_legacy(legacy_path)
+
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self.writes = 0
+        self._writer = threading.Thread(
+            target=self._write_loop, name='ScoreStore', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _import_legacy(self, legacy_path):
+        """Carry over the high score from the old JSON file, once."""
+        if not legacy_path or not os.path.exists(legacy_path):
+            return
+        if self._reader.execute("SELECT 1 FROM scores LIMIT 1").fetchone():
+            return
+        try:
+            with open(legacy_path) as f:
+                high_score = int(json.load(f))
+        except (ValueError, TypeError, OSError):
+            return
+        if high_score > 0:
+            with self._reader:
+                self._reader.execute(
+                    _UPSERT, (legacy_path, high_score, 0,
+                              os.path.getmtime(legacy_path)))
+
+    def submit(self, game, score, level):
+        """Queue the latest score of a game for the writer thread."""
+        with self._lock:
+            self._pending[game] = (score, level, time.time())
+        self._wake.set()
+
+    def high_score(self):
+        """Return the best score ever stored."""
+        row = self._reader.execute("SELECT MAX(score) FROM scores").fetchone()
+        return row[0] or 0
+
+    def leaderboard(self, limit=10):
+        """Return (score, level, played_at) of the best games, best first."""
+        return self._reader.execute(
+            "SELECT score, level, played_at FROM scores "
+            "ORDER BY score DESC LIMIT ?", (limit,)).fetchall()
+
+    def _write_loop(self):
+        connection = _connect(self.path)
+        while True:
+            self._wake.wait()
+            if not self._closed:
+                # Give a streak of kills time to settle into one write.
+                time.sleep(self.flush_interval)
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._wake.clear()
+            if pending:
+                self._commit(connection, pending)
+            if self._closed:
+                break
+        connection.close()
+
+    def _commit(self, connection, pending):
+        rows = [(game, score, level, played_at)
+                for game, (score, level, played_at) in pending.items()]
+        try:
+            with connection:
+                connection.executemany(_UPSERT, rows)
+            self.writes += 1
+        except sqlite3.Error as e:
+            print(f"Warning: Could not save scores. Error: {e}")
+
+    def close(self):
+        """Write what is still queued and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+        self._reader.close()
+
+
+if __name__ == '__main__':
+    store = ScoreStore()
+    for rank, (score, level, played_at) in enumerate(store.leaderboard(), 1):
+        played = time.strftime('%Y-%m-%d %H:%M', time.localtime(played_at))
+        print(f"{rank:>2}. {score:>10,}  level {level:<3} {played}")
+    store.close()
@@ -1,7 +1,7 @@
 import pygame.font
-from pygame.sprite import Group
+from pygame.sprite import Group, Sprite
 
-from ship import Ship
+from render_cache import GlyphAtlas
 
 
 class Scoreboard:
@@ -17,7 +17,14 @@ class Scoreboard:
 
         # Font settings for scoring information.
         self.text_color = (30, 30, 30)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font = ai_game.assets.font(48)
+        self.glyphs = GlyphAtlas(
+            self.font, self.text_color, self.settings.bg_color)
+        # One pre-built shield bar image per number of hits left.
+        self.shield_bar_images = {}
+        # The profiler overlay is re-rendered a few times a second.
+        self.profiler_image = None
+        self.profiler_frame = 0
 
         # Prepare the initial score images.
         self.prep_score()
@@ -29,8 +36,7 @@ class Scoreboard:
         """Turn the score into a rendered image."""
         rounded_score = round(self.stats.score, -1)
         score_str = f"{rounded_score:,}"
-        self.score_image = self.font.render(score_str, True,
-                self.text_color, self.settings.bg_color)
+        self.score_image = self.glyphs.render(score_str)
 
         # Display the score at the top right of the screen.
         self.score_rect = self.score_image.get_rect()
@@ -41,8 +47,7 @@ class Scoreboard:
         """Turn the high score into a rendered image."""
         high_score = round(self.stats.high_score, -1)
         high_score_str = f"{high_score:,}"
-        self.high_score_image = self.font.render(high_score_str, True,
-                self.text_color, self.settings.bg_color)
+        self.high_score_image = self.glyphs.render(high_score_str)
         
         # Center the high score at the top of the screen.
         self.high_score_rect = self.high_score_image.get_rect()
@@ -52,8 +57,7 @@ class Scoreboard:
     def prep_level(self):
         """Turn the level into a rendered image."""
         level_str = str(self.stats.level)
-        self.level_image = self.font.render(level_str, True,
-                self.text_color, self.settings.bg_color)
+        self.level_image = self.glyphs.render(level_str)
 
         # Position the level below the score.
         self.level_rect = self.level_image.get_rect()
@@ -63,8 +67,11 @@ class Scoreboard:
     def prep_ships(self):
         """Show how many ships are left."""
         self.ships = Group()
+        ship_image = self.ai_game.assets.image('images/ship.bmp')
         for ship_number in range(self.stats.ships_left):
-            ship = Ship(self.ai_game)
+            ship = Sprite()
+            ship.image = ship_image
+            ship.rect = ship_image.get_rect()
             ship.rect.x = 10 + ship_number * ship.rect.width
             ship.rect.y = 10
             self.ships.add(ship)
@@ -76,57 +83,137 @@ class Scoreboard:
             self.prep_high_score()
             self.stats.save_high_score()  # 添加这一行以即时保存最高分
 
-    def show_score(self):
-        """Draw scores, level, and ships to the screen."""
-        self.screen.blit(self.score_image, self.score_rect)
-        self.screen.blit(self.high_score_image, self.high_score_rect)
-        self.screen.blit(self.level_image, self.level_rect)
+    def show_score(self, ship=None):
+        """Draw scores, level, and ships; return the areas drawn on.
+
+        The shield bar shows ship, or the game's ship if none is given.
+        """
+        if ship is None:
+            ship = self.ai_game.ship
+        dirty = [
+            self.screen.blit(self.score_image, self.score_rect),
+            self.screen.blit(self.high_score_image, self.high_score_rect),
+            self.screen.blit(self.level_image, self.level_rect),
+        ]
         self.ships.draw(self.screen)
+        dirty.extend(icon.rect.copy() for icon in self.ships)
         
         # 如果飞船有激活的护盾，显示护盾条
-        if self.ai_game.ship.shield_active:
-            self.draw_shield_bar()
-
-    def show_score(self):
-        """Draw scores, level, and ships to the screen."""
-        self.screen.blit(self.score_image, self.score_rect)
-        self.screen.blit(self.high_score_image, self.high_score_rect)
-        self.screen.blit(self.level_image, self.level_rect)
-        self.ships.draw(self.screen)
-        
-        # 如果飞船有激活的护盾，显示护盾条
-        if self.ai_game.ship.shield_active:
-            self.draw_shield_bar()
-
-    def draw_shield_bar(self):
+        if ship.shield_active:
+            dirty.append(self.draw_shield_bar(ship))
+        return dirty
+
+    def show_profiler(self, profiler, refresh=15):
+        """Draw the frame profiler overlay; return the area drawn on."""
+        if (self.profiler_image is None
+                or profiler.frames - self.profiler_frame >= refresh):
+            self.profiler_image = self._build_profiler_image(profiler)
+            self.profiler_frame = profiler.frames
+        rect = self.profiler_image.get_rect()
+        rect.bottomleft = (10, self.screen_rect.bottom - 10)
+        return self.screen.blit(self.profiler_image, rect)
+
+    def _build_profiler_image(self, profiler):
+        """Render the profiler's latest numbers as lines of text."""
+        summary = profiler.summary()
+        lines = [f"budget {profiler.budget:.1f} ms, "
+                 f"{profiler.over_budget} of {profiler.frames} frames over",
+                 "ms: last / mean / p99 / max"]
+        for phase, times in summary.items():
+            if phase == 'sprites':
+                continue
+            lines.append(f"{phase}: {times['last']:.2f} / {times['mean']:.2f}"
+                         f" / {times['p99']:.2f} / {times['max']:.2f}")
+        sprites = summary.get('sprites', {})
+        lines.append(', '.join(
+            f"{group} {count}" for group, count in sprites.items()))
+
+        font = self.ai_game.assets.font(22)
+        images = [font.render(line, True, self.text_color) for line in lines]
+        line_height = font.get_linesize()
+        overlay = pygame.Surface(
+            (max(image.get_width() for image in images) + 10,
+             line_height * len(images) + 10))
+        overlay.fill(self.settings.bg_color)
+        for number, image in enumerate(images):
+            overlay.blit(image, (5, 5 + number * line_height))
+        return overlay
+
+    def draw_shield_bar(self, ship=None):
         """绘制护盾条"""
+        if ship is None:
+            ship = self.ai_game.ship
         # 护盾条位置
         x = 10
-        y = self.ai_game.ship.rect.height + 20
-        
+        y = ship.rect.height + 20
+
+        shield_hits = ship.shield_hits
+        bar_image = self.shield_bar_images.get(shield_hits)
+        if bar_image is None:
+            bar_image = self._build_shield_bar(shield_hits)
+            self.shield_bar_images[shield_hits] = bar_image
+        return self.screen.blit(bar_image, (x, y))
+
+    def _build_shield_bar(self, shield_hits):
+        """Draw the shield bar for a number of hits left onto its own image."""
         # 护盾条尺寸
         BAR_LENGTH = 100
         BAR_HEIGHT = 10
+        bar_image = pygame.Surface((BAR_LENGTH, BAR_HEIGHT), pygame.SRCALPHA)
         
         # 计算填充长度（基于剩余的抵挡次数）
-        fill = (self.ai_game.ship.shield_hits / 3) * BAR_LENGTH
+        fill = (shield_hits / 3) * BAR_LENGTH
         if fill < 0:
             fill = 0
             
         # 绘制外框
-        outline_rect = pygame.Rect(x, y, BAR_LENGTH, BAR_HEIGHT)
+        outline_rect = pygame.Rect(0, 0, BAR_LENGTH, BAR_HEIGHT)
         
         # 绘制填充部分
-        fill_rect = pygame.Rect(x, y, fill, BAR_HEIGHT)
+        fill_rect = pygame.Rect(0, 0, fill, BAR_HEIGHT)
         
         # 根据剩余抵挡次数选择颜色
-        if self.ai_game.ship.shield_hits >= 2:
+        if shield_hits >= 2:
             color = (0, 255, 0)  # 绿色
-        elif self.ai_game.ship.shield_hits == 1:
+        elif shield_hits == 1:
             color = (255, 255, 0)  # 黄色
         else:
             color = (255, 0, 0)  # 红色
             
         # 绘制护盾条
-        pygame.draw.rect(self.screen, color, fill_rect)
-        pygame.draw.rect(self.screen, (255, 255, 255), outline_rect, 2)
\ No newline at end of file
+        pygame.draw.rect(bar_image, color, fill_rect)
+        pygame.draw.rect(bar_image, (255, 255, 255), outline_rect, 2)
+        return bar_image
+
+
+class NullScoreboard:
+    """A scoreboard that keeps the high score but never renders anything."""
+
+    def __init__(self, ai_game):
+        """Keep a reference to the stats that the real scoreboard tracks."""
+        self.stats = ai_game.stats
+
+    def prep_score(self):
+        pass
+
+    def prep_high_score(self):
+        pass
+
+    def prep_level(self):
+        pass
+
+    def prep_ships(self):
+        pass
+
+    def check_high_score(self):
+        """Track the high score without writing it to disk."""
+        if self.stats.score > self.stats.high_score:
+            self.stats.high_score = self.stats.score
+
+    def show_score(self, ship=None):
+        """Draw nothing; return the empty list of areas drawn on."""
+        return []
+
+    def show_profiler(self, profiler, refresh=15):
+        """Draw nothing; return an empty area."""
+        return pygame.Rect(0, 0, 0, 0)
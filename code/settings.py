@@ -7,6 +7,33 @@ class Settings:
         self.screen_width = 1200
         self.screen_height = 800
         self.bg_color = (230, 230, 230)
+        # Frames drawn per second at most. The simulation runs at its own
+        # fixed rate of sim_rate steps per second, and every speed below
+        # is in pixels per second.
+        self.fps = 60
+        self.sim_rate = 60
+        # Most simulation steps run in one frame; a slower machine than
+        # that makes the game itself slow down instead of stalling.
+        self.max_frame_steps = 5
+        # The game always works in screen_width x screen_height units.
+        # Frames stretched in software to a window of another size pass
+        # through one of these fractions of that size; the fraction drops
+        # while frames run over budget and rises again when there is time
+        # to spare. A single scale keeps full resolution. With
+        # pygame.SCALED the GPU does the stretching and there is no
+        # software pass to make cheaper, so frames stay at full resolution.
+        self.resolution_scales = (1.0, 0.75, 0.5)
+        # pygame.SCALED lets SDL stretch frames to the window; otherwise
+        # they are stretched in software into a window of window_size
+        # (None keeps the logical size). The window never changes size.
+        self.use_scaled_display = True
+        self.window_size = None
+        # 'full' redraws and flips the whole screen every frame; 'dirty'
+        # only repaints and updates the areas that changed.
+        self.render_mode = 'full'
+        # Step the simulation on its own thread and draw snapshots of it
+        # on the main thread, so slow frames do not slow the game down.
+        self.threaded_simulation = False
 
         # Ship settings
         self.ship_limit = 3
@@ -19,6 +46,52 @@ class Settings:
 
         # Alien settings
         self.fleet_drop_speed = 10
+        # Alien speed at the start of every game.
+        self.alien_start_speed = 60.0
+        self.alien_bullet_speed = 30.0
+
+        # Collision settings: size of a spatial hash cell, in pixels.
+        self.collision_cell_size = 64
+
+        # Object pool settings: the most free objects each pool keeps, and
+        # whether to create bullets up front when the game starts.
+        self.pool_capacity = 1024
+        self.prewarm_pools = True
+        self.alien_bullet_prewarm = 64
+
+        # Particle settings: the most particles alive at once (the oldest
+        # make way for new ones) and the most started in one step.
+        self.particle_budget = 1024
+        self.particle_spawn_limit = 256
+
+        # Sound effect categories: (reserved mixer channels, priority,
+        # fewest milliseconds between two plays of the same sound).
+        self.sound_categories = {
+            'explosion': (3, 3, 60),
+            'shield': (1, 2, 100),
+            'shoot': (2, 2, 50),
+            'alien_shoot': (2, 1, 120),
+        }
+
+        # Scores are kept in this SQLite database.
+        self.score_db = 'scores.db'
+        # While a game is on, its state is saved to autosave_path every
+        # autosave_interval seconds of game time (0 turns autosave off);
+        # --resume picks it up after a restart.
+        self.autosave_path = 'autosave.bin'
+        self.autosave_interval = 10
+
+        # Frames of timings the profiler keeps for its overlay and export.
+        self.profiler_frames = 600
+
+        # Frame capture: keep every capture_every-th frame, let at most
+        # capture_queue frames wait for the writer thread, and 'drop' or
+        # 'block' on a frame when they are all taken. F12 saves a
+        # screenshot into screenshot_dir.
+        self.capture_every = 1
+        self.capture_queue = 8
+        self.capture_policy = 'drop'
+        self.screenshot_dir = 'screenshots'
 
         # How quickly the game speeds up
         self.speedup_scale = 1.1
@@ -29,9 +102,9 @@ class Settings:
 
     def initialize_dynamic_settings(self):
         """Initialize settings that change throughout the game."""
-        self.ship_speed = 15
-        self.bullet_speed = 2.5
-        self.alien_speed = 1.0
+        self.ship_speed = 900.0
+        self.bullet_speed = 150.0
+        self.alien_speed = self.alien_start_speed
 
         # fleet_direction of 1 represents right; -1 represents left.
         self.fleet_direction = 1
@@ -1,6 +1,25 @@
 import pygame
 from pygame.sprite import Sprite
 
+from collision import circle_mask, circle_overlaps_rect, masks_overlap
+from render_cache import shield_surface
+
+# The shield is drawn, and collides, as a circle around the ship's center.
+SHIELD_RADIUS = 40
+SHIELD_COLOR = (100, 240, 255, 120)
+
+
+def interpolated_rect(ship, alpha):
+    """Return ship's rect alpha of the way from previous_x to x.
+
+    ship may be a Ship or a snapshot of one with the same fields.
+    """
+    rect = ship.rect
+    if alpha != 1.0 and ship.previous_x != ship.x:
+        rect = rect.copy()
+        rect.x = ship.previous_x + (ship.x - ship.previous_x) * alpha
+    return rect
+
 
 class Ship(Sprite):
     """A class to manage the ship."""
@@ -13,12 +32,15 @@ class Ship(Sprite):
         self.screen_rect = ai_game.screen.get_rect()
 
         # Load the ship image
-        self.image = pygame.image.load('images/ship.bmp')
+        self.image = ai_game.assets.image('images/ship.bmp')
         self.rect = self.image.get_rect()
+        self.mask = ai_game.assets.mask('images/ship.bmp')
 
         # Start at bottom center
         self.rect.midbottom = self.screen_rect.midbottom
         self.x = float(self.rect.x)
+        # Position before the last update, for drawing between steps.
+        self.previous_x = self.x
 
         # Movement flags
         self.moving_right = False
@@ -27,35 +49,75 @@ class Ship(Sprite):
         # ====== SHIELD (SIMPLIFIED) ======
         self.shield_active = True   # 默认开启
         self.shield_hits = 3        # 可挡 3 次攻击
+        # 护盾外接正方形，碰撞检测时移到飞船中心，不必每帧新建
+        self.shield_rect = pygame.Rect(
+            0, 0, 2 * SHIELD_RADIUS, 2 * SHIELD_RADIUS)
+        self.shield_mask = circle_mask(SHIELD_RADIUS, SHIELD_COLOR)
         # =================================
 
     def center_ship(self):
         """Center the ship."""
         self.rect.midbottom = self.screen_rect.midbottom
         self.x = float(self.rect.x)
+        self.previous_x = self.x
 
     def update(self):
-        """Update position."""
+        """Update position by one simulation step."""
+        self.previous_x = self.x
+        step = self.settings.ship_speed / self.settings.sim_rate
         if self.moving_right and self.rect.right < self.screen_rect.right:
-            self.x += self.settings.ship_speed
+            self.x += step
         if self.moving_left and self.rect.left > 0:
-            self.x -= self.settings.ship_speed
+            self.x -= step
         self.rect.x = self.x
 
-    def blitme(self):
-        """Draw ship (and shield if active)."""
-        self.screen.blit(self.image, self.rect)
-        if self.shield_active:
-            self._draw_shield()
+    def blitme(self, alpha=1.0):
+        """Draw ship (and shield if active); return the areas drawn on.
 
-    def _draw_shield(self):
+        alpha places the ship between its previous position (0) and its
+        current one (1).
+        """
+        return self.draw_at(interpolated_rect(self, alpha),
+                            self.shield_active)
+
+    def draw_at(self, rect, shield_active):
+        """Draw the ship image at rect, with its shield if active."""
+        dirty = [self.screen.blit(self.image, rect)]
+        if shield_active:
+            dirty.append(self._draw_shield(rect))
+        return dirty
+
+    def _draw_shield(self, rect):
         """Draw a simple blue translucent shield."""
-        # 创建一个 80x80 带透明通道的表面
-        shield_surf = pygame.Surface((80, 80), pygame.SRCALPHA)
-        # 绘制半透明蓝圆（更显眼）
-        pygame.draw.circle(shield_surf, (100, 240, 255, 120), (40, 40), 40)
+        # 80x80 半透明蓝圆（更显眼），只创建一次并缓存
+        shield_surf = shield_surface(SHIELD_RADIUS, SHIELD_COLOR)
         # 居中绘制到飞船中心
-        self.screen.blit(shield_surf, (self.rect.centerx - 40, self.rect.centery - 40))
+        return self.screen.blit(
+            shield_surf,
+            (rect.centerx - SHIELD_RADIUS, rect.centery - SHIELD_RADIUS))
+
+    def collision_bounds(self):
+        """Return the rect around everything that can be hit: the shield
+        while it is up, otherwise the ship.
+        """
+        if not self.shield_active:
+            return self.rect
+        self.shield_rect.center = self.rect.center
+        return self.shield_rect
+
+    def shield_touches(self, rect):
+        """Return True if rect overlaps the shield circle."""
+        return circle_overlaps_rect(self.rect.center, SHIELD_RADIUS, rect)
+
+    def collides(self, sprite):
+        """Return True if the pixels of sprite touch the shield while it
+        is up, otherwise the ship itself.
+        """
+        if not self.shield_active:
+            return masks_overlap(self.mask, self.rect, sprite.mask, sprite.rect)
+        return (self.shield_touches(sprite.rect)
+                and masks_overlap(self.shield_mask, self.collision_bounds(),
+                                  sprite.mask, sprite.rect))
 
     def activate_shield(self):
         """Reset and activate shield."""
@@ -0,0 +1,364 @@
+import argparse
+import csv
+from collections import Counter
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+# The dummy drivers must be chosen before pygame starts up.
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+from alien_invasion import AlienInvasion
+from headless import HeadlessInvasion
+from sweep import ScriptedBot
+
+# Counts sampled from the game besides memory, see sample_counts().
+COUNTS = ('bullets', 'aliens', 'alien_bullets', 'bullet_pool',
+          'alien_bullet_pool', 'alien_pool', 'scheduled', 'ship_icons',
+          'particles', 'gc_objects')
+
+
+class Autopilot:
+    """Play AlienInvasion the way a player would, without a keyboard.
+
+    The ScriptedBot picks the moves and clears waves, so the soak goes
+    through new fleets and speed-ups as well as lost ships and new
+    games. The moves reach the game through the ship's movement flags,
+    _fire_bullet() and, after a game over, a click on the Play button
+    through _check_play_button().
+    """
+
+    def __init__(self, ai_game, first_seed=0):
+        self.ai_game = ai_game
+        self.bot = ScriptedBot(ai_game)
+        self.seed = first_seed
+        self.games = 0
+
+    def act(self, step):
+        """Steer the ship for this step, or press Play between games."""
+        ai_game = self.ai_game
+        if not ai_game.game_active:
+            # Every game gets its own seed so the soak doesn't replay one
+            # game over and over.
+            ai_game.seed = self.seed + self.games
+            self.games += 1
+            ai_game._check_play_button(ai_game.play_button.rect.center)
+            return
+        action = self.bot.act(step)
+        ai_game.ship.moving_left = bool(action & HeadlessInvasion.LEFT)
+        ai_game.ship.moving_right = bool(action & HeadlessInvasion.RIGHT)
+        if action & HeadlessInvasion.FIRE:
+            ai_game._fire_bullet()
+
+
+def sample_counts(ai_game):
+    """Return the sizes of everything that must stay bounded while the
+    game runs.
+    """
+    return {
+        'bullets': len(ai_game.bullets),
+        'aliens': len(ai_game.aliens),
+        'alien_bullets': len(ai_game.alien_bullets),
+        'bullet_pool': len(ai_game.bullet_pool),
+        'alien_bullet_pool': len(ai_game.alien_bullet_pool),
+        'alien_pool': len(ai_game.alien_pool),
+        'scheduled': len(ai_game.scheduler),
+        'ship_icons': len(ai_game.sb.ships),
+        'particles': len(ai_game.particles),
+        'gc_objects': len(gc.get_objects()),
+    }
+
+
+def object_counts():
+    """Return how many live objects of each class the collector tracks.
+
+    Built-in types are left out: how many dicts and lists there are goes
+    up and down with everything on screen, while a class such as Ship
+    should have a steady number of instances.
+    """
+    # A plain dict, so the counts kept between samples are not counted.
+    return dict(Counter(type(obj).__qualname__ for obj in gc.get_objects()
+                        if type(obj).__module__ != 'builtins'))
+
+
+def resident_bytes():
+    """Return the memory the process holds, or 0 where it can't be read.
+
+    Pixels of pygame surfaces are allocated by SDL, out of tracemalloc's
+    sight, so leaked surfaces only show up here.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _game_memory():
+    """Return a tracemalloc snapshot without what the soak test keeps."""
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+def steady_growth(values, min_growth, min_rising=0.75):
+    """Return the growth of values if it is steady, otherwise None.
+
+    Growth counts as steady when the values end at least min_growth above
+    where they started and rise between at least min_rising of
+    consecutive samples. Caches that fill up and then stay put, or usage
+    that goes up and down with what is on screen, are not steady growth.
+    """
+    if len(values) < 3:
+        return None
+    growth = values[-1] - values[0]
+    rises = sum(later > earlier for earlier, later in zip(values, values[1:]))
+    if growth >= min_growth and rises >= min_rising * (len(values) - 1):
+        return growth
+    return None
+
+
+class SoakInvasion(AlienInvasion):
+    """A windowed game that keeps no scores, so a soak leaves the
+    player's score database alone.
+    """
+
+    def _create_score_store(self):
+        return None
+
+
+class SoakTest:
+    """Run the game for a long stretch of game time and watch its health.
+
+    Frames run back to back with one simulation step each, so game time
+    runs as fast as the machine allows. Every interval seconds of game
+    time a sample records traced and resident memory (after a full
+    collection), GC statistics, sprite group and pool sizes, and the mean
+    wall time of the frames since the last sample. Samples taken before
+    warmup_waves waves have been played are not judged, so caches that
+    fill once do not count as leaks.
+    """
+
+    def __init__(self, hours=1.0, interval=60.0, warmup_waves=3, seed=0,
+                 min_growth=256 * 1024, max_drift=2.0, draw=True):
+        self.ai_game = SoakInvasion(seed=seed)
+        # Nor may it replace the player's saved game.
+        self.ai_game.settings.autosave_interval = 0
+        self.autopilot = Autopilot(self.ai_game, seed)
+        self.steps = int(hours * 3600 * self.ai_game.settings.sim_rate)
+        self.interval = int(interval * self.ai_game.settings.sim_rate)
+        self.warmup_waves = warmup_waves
+        self.min_growth = min_growth
+        self.max_drift = max_drift
+        self.draw = draw
+        self.samples = []
+        # Live objects per class at each sample, kept out of the CSV.
+        self.class_counts = []
+        # Waves played in all games so far, counting the one under way,
+        # and how many of them the autopilot cleared.
+        self.waves = 0
+        self.cleared = 0
+        self._wave = None
+        self._baseline = None
+        self._snapshot = None
+
+    def run(self, report=print):
+        """Play for the whole soak; return the list of failures found."""
+        ai_game = self.ai_game
+        tracemalloc.start()
+        frame_start = time.perf_counter()
+        frames = 0
+        for step in range(self.steps):
+            ai_game._check_events()
+            self.autopilot.act(step)
+            if ai_game.game_active:
+                ai_game._run_simulation_step()
+                self._count_waves()
+            if self.draw:
+                ai_game._update_screen()
+            frames += 1
+            if (step + 1) % self.interval == 0:
+                now = time.perf_counter()
+                sample = self._sample(step + 1, (now - frame_start) / frames)
+                report(format_sample(sample))
+                frame_start = time.perf_counter()
+                frames = 0
+        failures = self.check()
+        self.top_growth = self._top_growth()
+        tracemalloc.stop()
+        return failures
+
+    def _count_waves(self):
+        wave = (self.autopilot.games, self.ai_game.stats.level)
+        if wave != self._wave:
+            self.waves += 1
+            if self._wave is not None and wave[0] == self._wave[0]:
+                self.cleared += 1
+            self._wave = wave
+
+    def _sample(self, step, frame_time):
+        gc.collect()
+        memory = _game_memory()
+        _, peak = tracemalloc.get_traced_memory()
+        sample = {
+            'game_seconds': step / self.ai_game.settings.sim_rate,
+            'games': self.autopilot.games,
+            'waves': self.waves,
+            'cleared': self.cleared,
+            'traced_bytes': sum(
+                stat.size for stat in memory.statistics('filename')),
+            'peak_bytes': peak,
+            'resident_bytes': resident_bytes(),
+            'frame_ms': frame_time * 1000,
+            'gc_collections': sum(
+                generation['collections'] for generation in gc.get_stats()),
+            'gc_uncollectable': len(gc.garbage),
+            **sample_counts(self.ai_game),
+        }
+        self.class_counts.append(object_counts())
+        if self._snapshot is None and self.waves > self.warmup_waves:
+            # Later snapshots are compared to this one to show where the
+            # memory went.
+            self._snapshot = memory
+            self._baseline = len(self.samples)
+        self.samples.append(sample)
+        return sample
+
+    def judged_samples(self):
+        """Return the samples taken after the warm-up."""
+        if self._baseline is None:
+            return []
+        return self.samples[self._baseline:]
+
+    def judged_class_counts(self):
+        """Return the object counts taken after the warm-up."""
+        if self._baseline is None:
+            return []
+        return self.class_counts[self._baseline:]
+
+    def check(self):
+        """Return a line for every sign of a leak or a slowdown."""
+        samples = self.judged_samples()
+        if len(samples) < 3:
+            return [f"only {len(samples)} samples after {self.warmup_waves} "
+                    f"warm-up waves; soak for longer"]
+        failures = []
+        if samples[-1]['cleared'] == samples[0]['cleared']:
+            failures.append("no wave was cleared after the warm-up, so new "
+                            "fleets and speed-ups went untested")
+        growth = steady_growth([sample['traced_bytes'] for sample in samples],
+                               self.min_growth)
+        if growth is not None:
+            minutes = (samples[-1]['game_seconds']
+                       - samples[0]['game_seconds']) / 60
+            failures.append(
+                f"traced memory grew steadily by {growth / 1024:,.0f} KiB "
+                f"over {minutes:,.0f} minutes of game time "
+                f"({samples[0]['waves']} -> {samples[-1]['waves']} waves)")
+        growth = steady_growth(
+            [sample['resident_bytes'] for sample in samples],
+            self.min_growth * 4)
+        if growth is not None:
+            failures.append(f"resident memory grew steadily by "
+                            f"{growth / 1024:,.0f} KiB")
+        for name in COUNTS:
+            values = [sample[name] for sample in samples]
+            # Anything that goes up at every sample is piling up, however
+            # slowly.
+            growth = steady_growth(values, 1, min_rising=0.9)
+            if growth is not None:
+                failures.append(f"{name} grew steadily from {values[0]:,} "
+                                f"to {values[-1]:,}")
+        counts = self.judged_class_counts()
+        for name in sorted(set().union(*counts)):
+            values = [count.get(name, 0) for count in counts]
+            if steady_growth(values, 1, min_rising=0.9) is not None:
+                failures.append(f"{name} objects grew steadily from "
+                                f"{values[0]:,} to {values[-1]:,}")
+        if samples[-1]['gc_uncollectable']:
+            failures.append(f"{samples[-1]['gc_uncollectable']} uncollectable "
+                            f"objects in gc.garbage")
+        first = samples[0]['frame_ms']
+        last = samples[-1]['frame_ms']
+        if first and last > first * self.max_drift:
+            failures.append(f"frames slowed from {first:.2f} to {last:.2f} ms")
+        return failures
+
+    def _top_growth(self, limit=10):
+        """Return where traced memory grew most since the warm-up."""
+        if self._snapshot is None:
+            return []
+        stats = _game_memory().compare_to(self._snapshot, 'lineno')
+        return [str(stat) for stat in stats[:limit] if stat.size_diff > 0]
+
+    def write_csv(self, path):
+        """Write every sample to a CSV file."""
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(self.samples[0]))
+            writer.writeheader()
+            writer.writerows(self.samples)
+
+
+def format_sample(sample):
+    return (f"{sample['game_seconds'] / 60:7.1f} min  "
+            f"game {sample['games']:>4}  wave {sample['waves']:>5}  "
+            f"cleared {sample['cleared']:>5}  "
+            f"{sample['traced_bytes'] / 1024:9,.0f} KiB  "
+            f"{sample['frame_ms']:6.2f} ms/frame  "
+            f"{sample['gc_objects']:>8,} objects  "
+            f"{sample['bullets']}/{sample['aliens']}/{sample['alien_bullets']}"
+            f" sprites")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Let an autopilot play for hours of game time and fail "
+                    "if memory or anything else keeps growing.")
+    parser.add_argument('--hours', type=float, default=1.0,
+                        help="game time to play (default: 1)")
+    parser.add_argument('--interval', type=float, default=60.0,
+                        metavar='SECONDS',
+                        help="game time between samples (default: 60)")
+    parser.add_argument('--warmup-waves', type=int, default=3,
+                        help="waves played before samples are judged "
+                             "(default: 3)")
+    parser.add_argument('--min-growth', type=int, default=256,
+                        metavar='KIB',
+                        help="steady growth that counts as a leak "
+                             "(default: 256 KiB)")
+    parser.add_argument('--max-drift', type=float, default=2.0,
+                        help="how many times slower frames may get "
+                             "(default: 2)")
+    parser.add_argument('--no-draw', action='store_true',
+                        help="skip drawing to soak the simulation alone")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--csv', metavar='PATH',
+                        help="write every sample to a CSV file")
+    args = parser.parse_args()
+
+    soak = SoakTest(args.hours, args.interval, args.warmup_waves, args.seed,
+                    args.min_growth * 1024, args.max_drift,
+                    draw=not args.no_draw)
+    start = time.perf_counter()
+    failures = soak.run()
+    print(f"\n{soak.autopilot.games} games, {soak.waves} waves "
+          f"({soak.cleared} cleared) in "
+          f"{time.perf_counter() - start:,.0f} s.")
+    if args.csv and soak.samples:
+        soak.write_csv(args.csv)
+    pygame.quit()
+    if failures:
+        print("\nSoak test failed:")
+        for line in failures:
+            print(f"  {line}")
+        if soak.top_growth:
+            print("\nLargest growth since the warm-up:")
+            for line in soak.top_growth:
+                print(f"  {line}")
+        sys.exit(1)
+    print("\nNo growth found.")
@@ -0,0 +1,76 @@
+# Cell coordinates are packed into one integer key; this stays unique
+# while |cy| < KEY_STRIDE // 2.
+KEY_STRIDE = 1 << 20
+
+
+def cell_key(cx, cy):
+    """Pack a cell's column and row into a single integer key."""
+    return cx * KEY_STRIDE + cy
+
+
+def rect_cell_keys(rect, cell_size):
+    """Return the keys of every cell that rect covers."""
+    return [cell_key(cx, cy)
+            for cx in range(rect.left // cell_size,
+                            (rect.right - 1) // cell_size + 1)
+            for cy in range(rect.top // cell_size,
+                            (rect.bottom - 1) // cell_size + 1)]
+
+
+class SpatialHash:
+    """A uniform grid that buckets sprites by the cells their rects cover.
+
+    Items stay in the cells they were inserted with until they are
+    removed; the fleet hashes its aliens by their home positions, which
+    never change, so nothing is ever rehashed.
+    """
+
+    def __init__(self, cell_size=64):
+        """Create an empty grid with square cells of cell_size pixels."""
+        self.cell_size = cell_size
+        self.cells = {}
+        self._item_cells = {}
+
+    def __len__(self):
+        return len(self._item_cells)
+
+    def _cell_range(self, rect):
+        """Return (left, top, right, bottom) cell coordinates covered by rect."""
+        size = self.cell_size
+        return (rect.left // size, rect.top // size,
+                (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    @staticmethod
+    def _keys(cell_range):
+        left, top, right, bottom = cell_range
+        return [cell_key(cx, cy)
+                for cx in range(left, right + 1)
+                for cy in range(top, bottom + 1)]
+
+    def insert(self, item, rect):
+        """Add item to every cell that rect covers."""
+        cell_range = self._cell_range(rect)
+        self._item_cells[item] = cell_range
+        for key in self._keys(cell_range):
+            self.cells.setdefault(key, {})[item] = None
+
+    def remove(self, item):
+        """Take item out of the grid, if it is there."""
+        cell_range = self._item_cells.pop(item, None)
+        if cell_range is None:
+            return
+        for key in self._keys(cell_range):
+            bucket = self.cells[key]
+            del bucket[item]
+            if not bucket:
+                del self.cells[key]
+
+    def query(self, rect):
+        """Return the items sharing at least one cell with rect."""
+        cells = self.cells
+        found = {}
+        for key in rect_cell_keys(rect, self.cell_size):
+            bucket = cells.get(key)
+            if bucket:
+                found.update(bucket)
+        return list(found)
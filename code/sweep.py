@@ -0,0 +1,249 @@
+import argparse
+import csv
+import itertools
+import os
+import statistics
+import sys
+import time
+from multiprocessing import Pool
+
+from headless import HeadlessInvasion
+from settings import Settings
+
+# Sweep names that set a different Settings attribute. alien_speed is
+# reset at the start of every game, so it is swept through its start value.
+ALIASES = {'alien_speed': 'alien_start_speed'}
+
+DEFAULT_GRID = {
+    'speedup_scale': [1.05, 1.1, 1.2],
+    'score_scale': [1.5],
+    'fleet_drop_speed': [10, 20],
+    'bullets_allowed': [3, 5],
+    'alien_speed': [60.0, 90.0],
+}
+
+SUMMARY_FIELDS = ('games', 'survival_rate', 'mean_steps', 'mean_score',
+                  'median_score', 'max_score', 'mean_waves', 'max_waves')
+
+
+class ScriptedBot:
+    """Clear waves the way a steady player would.
+
+    A shot up a column hits that column's lowest alien first, so the bot
+    aims at the lowest of those, leading it by how far the fleet moves
+    while the bullet climbs, and fires once the ship is under that point.
+    Alien bullets coming down on the ship are dodged first.
+    """
+
+    def __init__(self, ai_game, dodge_height=20, tolerance=12):
+        self.ai_game = ai_game
+        self.dodge_height = dodge_height
+        self.tolerance = tolerance
+
+    def act(self, step):
+        """Return the HeadlessInvasion action for this step."""
+        ai_game = self.ai_game
+        settings = ai_game.settings
+        ship_rect = ai_game.ship.rect
+        # Alien bullets are slow and the ship is fast, so only the ones
+        # about to land matter; keep a ship's width away from them.
+        danger_top = ship_rect.top - self.dodge_height
+        danger = [bullet.rect.centerx for bullet in ai_game.alien_bullets
+                  if bullet.rect.bottom >= danger_top]
+        reach = ship_rect.width
+        for x in danger:
+            if abs(x - ship_rect.centerx) < reach:
+                if x < ship_rect.centerx:
+                    return HeadlessInvasion.RIGHT
+                return HeadlessInvasion.LEFT
+
+        target_x = self._aim()
+        if target_x is None:
+            return HeadlessInvasion.NOOP
+        offset = target_x - ship_rect.centerx
+        action = HeadlessInvasion.NOOP
+        if abs(offset) <= self.tolerance:
+            action |= HeadlessInvasion.FIRE
+        # Only move when a step gets the ship closer, so it doesn't
+        # overshoot back and forth, and never under a bullet.
+        speed = settings.ship_speed / settings.sim_rate
+        if abs(offset) * 2 > speed:
+            move = speed if offset > 0 else -speed
+            next_x = ship_rect.centerx + move
+            if all(abs(x - next_x) >= reach for x in danger):
+                action |= (HeadlessInvasion.RIGHT if offset > 0
+                           else HeadlessInvasion.LEFT)
+        return action
+
+    def _aim(self):
+        """Return where the ship should be to hit the lowest alien in
+        reach, or None if there are no aliens.
+        """
+        ai_game = self.ai_game
+        aliens = ai_game.aliens
+        if not aliens:
+            return None
+        # The lowest alien of every column is the one a shot hits.
+        lowest = {}
+        for alien in aliens:
+            rect = alien.rect
+            if rect.x not in lowest or rect.bottom > lowest[rect.x].bottom:
+                lowest[rect.x] = rect
+        ship_rect = ai_game.ship.rect
+        bottom = max(rect.bottom for rect in lowest.values())
+        targets = [rect for rect in lowest.values() if rect.bottom == bottom]
+        shift = self._fleet_shift(ship_rect.top - bottom)
+        return min((rect.centerx + shift for rect in targets),
+                   key=lambda x: abs(x - ship_rect.centerx))
+
+    def _fleet_shift(self, distance):
+        """Return how far the fleet moves sideways while a bullet climbs
+        distance pixels, turning back at the edge of the screen.
+        """
+        ai_game = self.ai_game
+        settings = ai_game.settings
+        steps = max(distance, 0) / (settings.bullet_speed / settings.sim_rate)
+        direction = settings.fleet_direction
+        shift = settings.alien_speed / settings.sim_rate * steps
+        left, right, _, _ = ai_game.aliens.bounds()
+        room = settings.screen_width - right if direction > 0 else left
+        if shift > room:
+            shift = 2 * room - shift
+        return shift * direction
+
+
+def make_settings(values):
+    """Return default Settings with the swept values applied."""
+    settings = Settings()
+    for name, value in values.items():
+        setattr(settings, ALIASES.get(name, name), value)
+    settings.initialize_dynamic_settings()
+    return settings
+
+
+def play_game(task):
+    """Play one seeded game; return its config index and results."""
+    index, values, seed, max_steps = task
+    ai_game = HeadlessInvasion(make_settings(values), seed=seed)
+    bot = ScriptedBot(ai_game)
+    done = False
+    step = 0
+    while not done and step < max_steps:
+        _, done = ai_game.step(bot.act(step))
+        step += 1
+    return index, {
+        'survived': not done,
+        'steps': step,
+        'score': ai_game.stats.score,
+        'waves': ai_game.stats.level,
+    }
+
+
+def summarize(games):
+    """Aggregate the results of every game played with one config."""
+    scores = [game['score'] for game in games]
+    waves = [game['waves'] for game in games]
+    return {
+        'games': len(games),
+        'survival_rate': sum(game['survived'] for game in games) / len(games),
+        'mean_steps': statistics.fmean(game['steps'] for game in games),
+        'mean_score': statistics.fmean(scores),
+        'median_score': statistics.median(scores),
+        'max_score': max(scores),
+        'mean_waves': statistics.fmean(waves),
+        'max_waves': max(waves),
+    }
+
+
+def expand_grid(grid):
+    """Return one dictionary of values per combination in grid."""
+    names = list(grid)
+    return [dict(zip(names, values))
+            for values in itertools.product(*grid.values())]
+
+
+def run_sweep(grid, path, games=20, max_steps=18000, processes=None,
+              first_seed=0):
+    """Play every config in grid games times and stream results to path.
+
+    Games run in a process pool. A config's row is written to the CSV
+    file as soon as all of its games are done, so a long sweep can be
+    watched or stopped part of the way through. If no game got past the
+    first wave, the speed and score settings never came into play, so
+    the file is removed and RuntimeError is raised.
+    """
+    configs = expand_grid(grid)
+    tasks = [(index, values, first_seed + seed, max_steps)
+             for index, values in enumerate(configs)
+             for seed in range(games)]
+    results = [[] for _ in configs]
+
+    with open(path, 'w', newline='') as f, Pool(processes) as pool:
+        writer = csv.DictWriter(f, fieldnames=[*grid, *SUMMARY_FIELDS])
+        writer.writeheader()
+        f.flush()
+        for index, game in pool.imap_unordered(play_game, tasks,
+                                               chunksize=4):
+            results[index].append(game)
+            if len(results[index]) == games:
+                writer.writerow({**configs[index],
+                                 **summarize(results[index])})
+                f.flush()
+                yield configs[index], summarize(results[index])
+
+    if not any(game['waves'] > 1 for games in results for game in games):
+        os.remove(path)
+        raise RuntimeError(
+            "No game got past wave 1, so the results say nothing about the "
+            "difficulty curve; raise --max-steps or make the bot stronger.")
+
+
+def _parse_grid_option(option):
+    """Turn 'name=1,2,3' into ('name', [1, 2, 3]) using the setting's type."""
+    name, _, values = option.partition('=')
+    default = getattr(Settings(), ALIASES.get(name, name), None)
+    if default is None or not values:
+        raise argparse.ArgumentTypeError(
+            f"expected SETTING=VALUE,... with a known setting, got {option!r}")
+    kind = type(default)
+    return name, [kind(value) for value in values.split(',')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Play many bot games per Settings combination to tune "
+                    "the difficulty curve.")
+    parser.add_argument('--grid', action='append', type=_parse_grid_option,
+                        metavar='SETTING=V1,V2,...',
+                        help="values to sweep; may be repeated (default: "
+                             "a small grid over the speed and scoring "
+                             "settings)")
+    parser.add_argument('--games', type=int, default=20,
+                        help="seeded games per combination (default: 20)")
+    parser.add_argument('--max-steps', type=int, default=18000,
+                        help="steps before a game counts as survived "
+                             "(default: 18000, five minutes at 60 steps/s)")
+    parser.add_argument('--processes', type=int,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument('--out', default='sweep_results.csv',
+                        help="CSV file for the results")
+    args = parser.parse_args()
+
+    grid = dict(args.grid) if args.grid else DEFAULT_GRID
+    total = len(expand_grid(grid))
+    print(f"Sweeping {total} combinations x {args.games} games on "
+          f"{args.processes or os.cpu_count()} processes into {args.out}")
+    start = time.perf_counter()
+    try:
+        for done, (values, summary) in enumerate(
+                run_sweep(grid, args.out, args.games, args.max_steps,
+                          args.processes), 1):
+            settings = ', '.join(f"{name}={value}"
+                                 for name, value in values.items())
+            print(f"[{done}/{total}] {settings}: "
+                  f"survival {summary['survival_rate']:.0%}, "
+                  f"mean score {summary['mean_score']:,.0f}, "
+                  f"mean waves {summary['mean_waves']:.1f}")
+    except RuntimeError as e:
+        sys.exit(f"Sweep failed: {e}")
+    print(f"Done in {time.perf_counter() - start:.1f} s.")
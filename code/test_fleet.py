@@ -0,0 +1,87 @@
+import random
+
+import pygame
+from pygame.sprite import Sprite
+
+from fleet import Fleet, formation
+
+ALIEN_SIZE = (60, 58)
+
+
+def _fleet(screen=(1200, 800)):
+    fleet = Fleet()
+    for x, y in formation(*screen, *ALIEN_SIZE):
+        alien = Sprite()
+        alien.rect = pygame.Rect((x, y), ALIEN_SIZE)
+        fleet.add(alien)
+    return fleet
+
+
+def _brute_force_bounds(fleet):
+    rects = [alien.rect for alien in fleet]
+    return (min(r.left for r in rects), max(r.right for r in rects),
+            min(r.top for r in rects), max(r.bottom for r in rects))
+
+
+def test_bounds_follow_the_offset_and_emptied_columns():
+    fleet = _fleet()
+    assert fleet.bounds() == _brute_force_bounds(fleet)
+    fleet.update(2.6, 1)
+    fleet.drop(10)
+    assert fleet.placed_offset == (3, 10)
+    assert fleet.bounds() == _brute_force_bounds(fleet)
+
+    # Emptying the leftmost column pulls the left edge in.
+    left = fleet.bounds()[0]
+    for alien in [alien for alien in fleet if alien.rect.left == left]:
+        alien.kill()
+    assert fleet.bounds() == _brute_force_bounds(fleet)
+    assert fleet.bounds()[0] == left + 2 * ALIEN_SIZE[0]
+
+
+def test_at_edge_and_drop():
+    fleet = _fleet()
+    _, right, _, bottom = fleet.bounds()
+    assert not fleet.at_edge(1200)
+    fleet.update(1200 - right, 1)
+    assert fleet.at_edge(1200)
+
+    fleet.drop(25)
+    assert fleet.bottom() == bottom + 25
+    assert all(alien.rect.topleft == (alien.home[0] + fleet.placed_offset[0],
+                                      alien.home[1] + 25)
+               for alien in fleet)
+
+
+def test_empty_fleet_is_not_at_an_edge_and_starts_again_from_home():
+    fleet = _fleet()
+    fleet.update(5, -1)
+    fleet.drop(40)
+    fleet.empty()
+    assert not fleet.at_edge(1200)
+    assert fleet.bottom() == 0
+    assert fleet.placed_offset == (0, 0)
+
+
+def test_collide_rect_matches_a_brute_force_groupcollide():
+    rng = random.Random(0)
+    hits = 0
+    fleet = _fleet()
+    for alien in rng.sample(fleet.sprites(), 10):
+        alien.kill()
+    for _ in range(20):
+        fleet.update(rng.uniform(0, 8), rng.choice((1, -1)))
+        if rng.random() < 0.3:
+            fleet.drop(rng.randrange(5, 30))
+        for _ in range(25):
+            probe = Sprite()
+            probe.rect = pygame.Rect(rng.randrange(-50, 1200),
+                                     rng.randrange(-50, 800),
+                                     rng.randrange(1, 120),
+                                     rng.randrange(1, 120))
+            expected = pygame.sprite.groupcollide(
+                pygame.sprite.Group(probe), fleet, False, False)
+            expected = set(expected.get(probe, ()))
+            assert set(fleet.collide_rect(probe.rect)) == expected
+            hits += bool(expected)
+    assert hits > 50
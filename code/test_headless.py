@@ -0,0 +1,83 @@
+import random
+
+from headless import HeadlessInvasion
+
+ACTIONS = (HeadlessInvasion.NOOP, HeadlessInvasion.LEFT,
+           HeadlessInvasion.RIGHT, HeadlessInvasion.FIRE,
+           HeadlessInvasion.FIRE | HeadlessInvasion.LEFT,
+           HeadlessInvasion.FIRE | HeadlessInvasion.RIGHT)
+
+
+def _play(seed, steps=1500):
+    """Play seed with a seeded random bot; return every step's result
+    and an observation every 100 steps.
+    """
+    ai_game = HeadlessInvasion(seed=seed)
+    bot = random.Random(seed)
+    trajectory = []
+    for step in range(steps):
+        trajectory.append(ai_game.step(bot.choice(ACTIONS)))
+        if step % 100 == 0:
+            trajectory.append(ai_game.observation())
+    return trajectory
+
+
+def test_same_seed_gives_the_same_trajectory():
+    assert _play(3) == _play(3)
+
+
+def test_reset_starts_the_same_game_again():
+    ai_game = HeadlessInvasion(seed=5)
+    first = ai_game.observation()
+    for _ in range(300):
+        ai_game.step(HeadlessInvasion.FIRE | HeadlessInvasion.LEFT)
+    ai_game.reset(5)
+    assert ai_game.observation() == first
+
+
+def test_noop_leaves_the_ship_still():
+    ai_game = HeadlessInvasion(seed=0)
+    x = ai_game.ship.rect.x
+    for _ in range(200):
+        ai_game.step(HeadlessInvasion.NOOP)
+        assert ai_game.ship.rect.x == x
+    assert not ai_game.bullets
+
+
+def test_losing_a_ship_ends_the_game_only_on_the_last_one():
+    ai_game = HeadlessInvasion(seed=0)
+    ships = ai_game.stats.ships_left
+    # A fleet at the bottom of the screen costs a ship.
+    ai_game.aliens.drop(ai_game.settings.screen_height)
+    assert ai_game.step() == (0, False)
+    assert ai_game.observation()['ships_left'] == ships - 1
+
+    ai_game.stats.ships_left = 0
+    ai_game.respawning = False
+    ai_game.aliens.drop(ai_game.settings.screen_height)
+    assert ai_game.step() == (0, True)
+    # A finished game stands still until it is reset.
+    ticks = ai_game.ticks
+    assert ai_game.step(HeadlessInvasion.FIRE) == (0, True)
+    assert ai_game.ticks == ticks
+
+
+def test_clearing_the_fleet_rewards_the_kill_and_starts_the_next_wave():
+    ai_game = HeadlessInvasion(seed=0)
+    last, *others = ai_game.aliens.sprites()
+    for alien in others:
+        alien.kill()
+    ai_game.step(HeadlessInvasion.FIRE)
+    bullet = ai_game.bullets.sprites()[0]
+    # Put the bullet on the last alien so the next step hits it.
+    x, y = last.rect.center
+    ai_game.bullets.place(bullet, x, y, float(y), bullet.velocity)
+    points = ai_game.settings.alien_points
+
+    reward, done = ai_game.step()
+    observation = ai_game.observation()
+    assert (reward, done) == (points, False)
+    assert observation['score'] == points
+    assert observation['level'] == 2
+    assert len(observation['aliens']) == len(others) + 1
+    assert observation['bullets'] == []
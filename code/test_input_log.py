@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from headless import HeadlessInvasion
+from input_log import (InputLog, InputRecorder, MAX_FIRES, FIRE_SHIFT,
+                       LEFT, START, state_hash)
+from replay import replay
+
+
+def test_log_survives_a_round_trip_through_bytes():
+    log = InputLog(seed=7, sim_rate=120, checkpoint_interval=50)
+    for mask in [0, 0, 0, LEFT, LEFT, START, MAX_FIRES << FIRE_SHIFT] * 100:
+        log.append(mask)
+    log.checkpoints.append((50, b'12345678'))
+    log.checkpoints.append((100, b'abcdefgh'))
+
+    decoded = InputLog.from_bytes(log.to_bytes())
+    assert (decoded.seed, decoded.sim_rate, decoded.checkpoint_interval) == (
+        7, 120, 50)
+    assert decoded.steps == log.steps == 700
+    assert list(decoded.masks()) == list(log.masks())
+    assert decoded.checkpoints == log.checkpoints
+
+
+def test_from_bytes_rejects_other_files():
+    with pytest.raises(ValueError):
+        InputLog.from_bytes(b'RIFF' + bytes(32))
+
+
+def test_record_input_refuses_more_fires_than_a_mask_holds():
+    ai_game = HeadlessInvasion(seed=0)
+    recorder = InputRecorder('unused.airp', seed=0)
+    for _ in range(MAX_FIRES):
+        recorder.record_fire()
+    recorder.record_input(ai_game)
+    assert list(recorder.log.masks()) == [MAX_FIRES << FIRE_SHIFT]
+
+    for _ in range(MAX_FIRES + 1):
+        recorder.record_fire()
+    with pytest.raises(ValueError):
+        recorder.record_input(ai_game)
+
+
+def test_recorded_session_replays_to_the_same_state():
+    seed = 11
+    ai_game = HeadlessInvasion(seed=seed)
+    recorder = InputRecorder('unused.airp', seed, ai_game.settings.sim_rate,
+                             checkpoint_interval=100)
+    ai_game.recorder = recorder
+    bot = random.Random(seed)
+    for step in range(2000):
+        if step == 1200:
+            ai_game._press_play()
+        if step % 20 == 0:
+            ai_game.ship.moving_left = bot.random() < 0.4
+            ai_game.ship.moving_right = (not ai_game.ship.moving_left
+                                         and bot.random() < 0.6)
+        for _ in range(bot.choice((0, 0, 0, 1, 2))):
+            ai_game._fire_bullet()
+            recorder.record_fire()
+        ai_game._run_simulation_step()
+
+    log = InputLog.from_bytes(recorder.log.to_bytes())
+    assert len(log.checkpoints) == 20
+    assert any(mask & START for mask in log.masks())
+    assert state_hash(replay(log)) == state_hash(ai_game)
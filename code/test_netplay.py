@@ -0,0 +1,27 @@
+from headless import HeadlessInvasion
+from netplay import HOST_SHIP, PARTNER_SHIP, NetHost
+
+
+def test_entity_ids_skip_live_ids_after_wrapping():
+    ai_game = HeadlessInvasion(seed=0)
+    # _state() never touches the link.
+    host = NetHost(ai_game, link=None)
+    state = host._state()
+    ship_ids = {entity for entity, record in state.items()
+                if record[0] in (HOST_SHIP, PARTNER_SHIP)}
+
+    # Bullets fired now get the last ids before the wrap and the first
+    # ones after it, which the ships and aliens still hold.
+    host._next_id = 0xffff - 1
+    for _ in range(ai_game.settings.bullets_allowed):
+        ai_game._fire_bullet()
+    for _ in range(3):
+        state = host._state()
+        sprites = (2 + len(ai_game.aliens) + len(ai_game.bullets)
+                   + len(ai_game.alien_bullets))
+        assert len(state) == sprites
+        assert len(set(host._ids.values())) == sprites
+        assert {entity for entity, record in state.items()
+                if record[0] in (HOST_SHIP, PARTNER_SHIP)} == ship_ids
+        ai_game.step(HeadlessInvasion.FIRE)
+    assert host._next_id < 0xffff - 1
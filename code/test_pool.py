@@ -0,0 +1,62 @@
+from pool import ObjectPool
+
+
+class Thing:
+    def __init__(self, value):
+        self.value = value
+        self.resets = 0
+
+    def reset(self, value):
+        self.value = value
+        self.resets += 1
+
+
+def test_released_objects_are_reused_and_counted():
+    pool = ObjectPool(Thing)
+    first = pool.acquire(1)
+    second = pool.acquire(2)
+    assert pool.stats()['created'] == 2
+    pool.release(first)
+
+    again = pool.acquire(3)
+    assert again is first
+    assert (again.value, again.resets) == (3, 1)
+    stats = pool.stats()
+    assert (stats['created'], stats['reused'], stats['released']) == (2, 1, 1)
+    assert (stats['in_use'], stats['peak_in_use']) == (2, 2)
+
+    pool.release(second)
+    pool.release(again)
+    assert pool.stats()['in_use'] == 0
+    assert len(pool) == 2
+
+
+def test_releasing_twice_is_counted_once():
+    pool = ObjectPool(Thing)
+    thing = pool.acquire(0)
+    pool.release(thing)
+    pool.release(thing)
+    assert pool.stats()['released'] == 1
+    assert len(pool) == 1
+    assert pool.acquire(1) is thing
+    assert pool.acquire(2) is not thing
+
+
+def test_objects_beyond_capacity_are_discarded():
+    pool = ObjectPool(Thing, capacity=2)
+    things = [pool.acquire(n) for n in range(4)]
+    for thing in things:
+        pool.release(thing)
+    stats = pool.stats()
+    assert (stats['free'], stats['released'], stats['discarded']) == (2, 4, 2)
+    assert stats['peak_in_use'] == 4
+
+
+def test_prewarmed_objects_are_hits_for_the_next_acquires():
+    pool = ObjectPool(Thing, capacity=3)
+    pool.prewarm(5, 0)
+    assert pool.stats()['created'] == 3
+    for n in range(4):
+        pool.acquire(n)
+    stats = pool.stats()
+    assert (stats['created'], stats['reused']) == (4, 3)
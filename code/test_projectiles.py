@@ -0,0 +1,68 @@
+import pytest
+from pygame import Rect
+
+from projectiles import ProjectileStore
+
+
+def _allocate(store, x=0, y=0.0):
+    return store.allocate(object(), Rect(x, round(y), 3, 15), y, -1.5)
+
+
+def test_released_slots_are_reused_before_new_ones():
+    store = ProjectileStore(4)
+    assert [_allocate(store) for _ in range(3)] == [0, 1, 2]
+    store.release(1)
+    assert store.live_slots().tolist() == [0, 2]
+    assert _allocate(store) == 1
+    assert _allocate(store) == 3
+
+
+def test_full_store_doubles_and_keeps_what_it_holds():
+    store = ProjectileStore(2)
+    for x in range(3):
+        _allocate(store, x=x, y=10.0 * x)
+    assert store.capacity == 4
+    assert store.x[:3].tolist() == [0, 1, 2]
+    assert store.y[:3].tolist() == [0.0, 10.0, 20.0]
+    assert store.alive.tolist() == [True, True, True, False]
+    assert store.free_slots() == [3]
+
+
+def test_empty_store_grows_to_sixteen():
+    store = ProjectileStore(0)
+    assert _allocate(store) == 0
+    assert store.capacity == 16
+
+
+def test_restore_free_slots_hands_out_slots_in_the_saved_order():
+    store = ProjectileStore(4)
+    for _ in range(4):
+        _allocate(store)
+    store.release(2)
+    store.release(0)
+    saved = store.free_slots()
+    # A store that has already grown hands out its extra slots last.
+    store.reserve(8)
+    store.restore_free_slots(4, saved)
+    assert [_allocate(store) for _ in range(4)] == [0, 2, 4, 5]
+
+
+@pytest.mark.parametrize('free_slots', [[0], [0, 1, 2], [0, 3], [0, 2, 2]])
+def test_restore_free_slots_rejects_slots_that_do_not_match(free_slots):
+    store = ProjectileStore(4)
+    for _ in range(4):
+        _allocate(store)
+    store.release(2)
+    store.release(0)
+    with pytest.raises(ValueError):
+        store.restore_free_slots(4, free_slots)
+
+
+def test_move_returns_only_the_slots_whose_top_changed():
+    store = ProjectileStore(4)
+    store.allocate(object(), Rect(0, 10, 3, 15), 10.0, -0.4)
+    store.allocate(object(), Rect(0, 10, 3, 15), 10.0, -1.0)
+    assert store.move().tolist() == [1]
+    assert store.top[:2].tolist() == [10.0, 9.0]
+    assert store.move().tolist() == [0, 1]
+    assert store.top[:2].tolist() == [9.0, 8.0]
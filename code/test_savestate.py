@@ -0,0 +1,66 @@
+import pytest
+
+import savestate
+from headless import HeadlessInvasion
+from input_log import state_hash
+from sweep import ScriptedBot
+
+
+def _play(ai_game, bot, steps, start=0):
+    for step in range(start, start + steps):
+        ai_game.step(bot.act(step))
+
+
+@pytest.mark.parametrize('partner', [False, True])
+def test_loaded_state_plays_on_like_an_uninterrupted_game(partner):
+    ai_game = HeadlessInvasion(seed=4)
+    if partner:
+        ai_game.add_partner()
+    bot = ScriptedBot(ai_game)
+    _play(ai_game, bot, 900)
+    data = savestate.dump(ai_game)
+
+    # Restore into a game that has been somewhere else entirely.
+    restored = HeadlessInvasion(seed=99)
+    _play(restored, ScriptedBot(restored), 300)
+    savestate.load(restored, data)
+    assert state_hash(restored) == state_hash(ai_game)
+    assert savestate.dump(restored) == data
+
+    bot.ai_game = restored
+    for step in range(900, 2400):
+        action = bot.act(step)
+        ai_game.step(action)
+        restored.step(action)
+    assert state_hash(restored) == state_hash(ai_game)
+
+
+def test_load_rejects_other_data():
+    ai_game = HeadlessInvasion(seed=0)
+    with pytest.raises(savestate.StateError):
+        savestate.load(ai_game, b'AIRP' + bytes(64))
+
+
+def test_rollback_restores_an_earlier_step():
+    ai_game = HeadlessInvasion(seed=2)
+    bot = ScriptedBot(ai_game)
+    buffer = savestate.RollbackBuffer(capacity=50)
+    hashes = {}
+    for step in range(120):
+        ai_game.step(bot.act(step))
+        buffer.push(ai_game)
+        hashes[ai_game.ticks] = state_hash(ai_game)
+    assert len(buffer) == 50
+
+    ticks = buffer.rollback(ai_game, steps=10)
+    assert ticks == ai_game.ticks == 110
+    assert state_hash(ai_game) == hashes[110]
+    assert len(buffer) == 40
+    # Rolling back further than the buffer reaches stops at its oldest state.
+    assert buffer.rollback(ai_game, steps=1000) == 71
+    assert state_hash(ai_game) == hashes[71]
+
+
+def test_rollback_of_an_empty_buffer_raises():
+    with pytest.raises(savestate.StateError):
+        savestate.RollbackBuffer().rollback(HeadlessInvasion(seed=0))
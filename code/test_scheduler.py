@@ -0,0 +1,79 @@
+from scheduler import Scheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_timers_fire_once_they_are_due_in_time_order():
+    clock = Clock()
+    scheduler = Scheduler(clock)
+    fired = []
+    scheduler.schedule(300, fired.append, 'late')
+    scheduler.schedule(100, fired.append, 'early')
+    clock.now = 99
+    assert scheduler.advance() == 0
+    clock.now = 500
+    assert scheduler.advance() == 2
+    assert fired == ['early', 'late']
+    assert len(scheduler) == 0
+
+
+def test_timers_due_at_the_same_time_fire_in_the_order_scheduled():
+    clock = Clock()
+    scheduler = Scheduler(clock)
+    fired = []
+    for name in 'abcde':
+        scheduler.schedule_at(200, fired.append, name)
+    scheduler.schedule_at(100, fired.append, 'first')
+    assert [timer.args for timer in scheduler.pending()] == [
+        ('first',), ('a',), ('b',), ('c',), ('d',), ('e',)]
+    clock.now = 200
+    scheduler.advance()
+    assert fired == ['first', 'a', 'b', 'c', 'd', 'e']
+
+
+def test_cancelled_timers_never_fire():
+    clock = Clock()
+    scheduler = Scheduler(clock)
+    fired = []
+    keep = scheduler.schedule(10, fired.append, 'keep')
+    drop = scheduler.schedule(10, fired.append, 'drop')
+    drop.cancel()
+    assert scheduler.pending() == [keep]
+    clock.now = 10
+    assert scheduler.advance() == 1
+    assert fired == ['keep']
+
+
+def test_clear_cancels_every_waiting_timer():
+    clock = Clock()
+    scheduler = Scheduler(clock)
+    fired = []
+    timers = [scheduler.schedule(delay, fired.append, delay)
+              for delay in (5, 10, 15)]
+    scheduler.clear()
+    assert all(timer.cancelled for timer in timers)
+    assert scheduler.pending() == []
+    clock.now = 20
+    assert scheduler.advance() == 0
+    assert fired == []
+
+
+def test_a_callback_can_schedule_a_timer_that_is_already_due():
+    clock = Clock()
+    scheduler = Scheduler(clock)
+    fired = []
+
+    def chain():
+        fired.append('chain')
+        scheduler.schedule(0, fired.append, 'follow-up')
+
+    scheduler.schedule(5, chain)
+    clock.now = 5
+    assert scheduler.advance() == 2
+    assert fired == ['chain', 'follow-up']
@@ -0,0 +1,159 @@
+import queue
+import threading
+from collections import namedtuple
+from time import perf_counter
+
+# What the renderer needs from one simulation step. Snapshots are built
+# by the simulation thread and never changed afterwards.
+Snapshot = namedtuple(
+    'Snapshot',
+    'time game_active ship bullets fleet alien_bullets particles hud')
+# Ship position and shield; rect is a copy taken for the snapshot.
+ShipState = namedtuple(
+    'ShipState', 'rect x previous_x shield_active shield_hits')
+# One bullet: its rect as a tuple, distance per step and colour.
+ProjectileState = namedtuple('ProjectileState', 'rect velocity color')
+# Alien rects as placed, and Fleet.step_shift() for drawing between steps.
+FleetState = namedtuple('FleetState', 'rects shift')
+# The numbers the scoreboard shows; it reads them like GameStats.
+HudState = namedtuple('HudState', 'score high_score level ships_left')
+
+
+def take_snapshot(ai_game, time):
+    """Return a Snapshot of ai_game for the step scheduled at time."""
+    ship = ai_game.ship
+    fleet = ai_game.aliens
+    stats = ai_game.stats
+    return Snapshot(
+        time=time,
+        game_active=ai_game.game_active,
+        ship=ShipState(ship.rect.copy(), ship.x, ship.previous_x,
+                       ship.shield_active, ship.shield_hits),
+        bullets=_projectiles(ai_game.bullets),
+        fleet=FleetState(
+            tuple(tuple(alien.rect) for alien in fleet.spritedict),
+            fleet.step_shift()),
+        alien_bullets=_projectiles(ai_game.alien_bullets),
+        particles=ai_game.particles.state(),
+        hud=HudState(stats.score, stats.high_score, stats.level,
+                     stats.ships_left),
+    )
+
+
+def _projectiles(group):
+    return tuple(ProjectileState(tuple(sprite.rect), sprite.velocity,
+                                 sprite.color)
+                 for sprite in group.sprites())
+
+
+class SnapshotBuffer:
+    """Two snapshot slots: one being read, the other being replaced.
+
+    The simulation thread writes into the back slot and then flips which
+    slot is the front one, so the renderer always gets a whole snapshot
+    without waiting for a step to finish.
+    """
+
+    def __init__(self, snapshot):
+        """Start with snapshot in both slots."""
+        self._slots = [snapshot, snapshot]
+        self._front = 0
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def publish(self, snapshot):
+        """Make snapshot the newest one."""
+        back = 1 - self._front
+        self._slots[back] = snapshot
+        with self._lock:
+            self._front = back
+            self.published += 1
+
+    def latest(self):
+        """Return the newest snapshot."""
+        with self._lock:
+            return self._slots[self._front]
+
+
+class SimulationThread(threading.Thread):
+    """Step the game at its fixed simulation rate on its own thread.
+
+    After each batch of steps the thread publishes a Snapshot, which the
+    main thread draws while the next steps run. Functions passed to
+    call() run on this thread between steps, in the order they were
+    queued, so input reaches the game at a step boundary just as it does
+    when events and steps share a thread.
+
+    Like run_game(), the thread runs at most max_frame_steps steps to
+    catch up, and beyond that lets the game slow down. Every step is one
+    frame of the game's step_profiler.
+    """
+
+    def __init__(self, ai_game):
+        """Prepare to step ai_game; start() starts the thread."""
+        super().__init__(name='Simulation', daemon=True)
+        self.ai_game = ai_game
+        self.step_time = 1 / ai_game.settings.sim_rate
+        self.max_steps = ai_game.settings.max_frame_steps
+        self.snapshots = SnapshotBuffer(take_snapshot(ai_game, perf_counter()))
+        self._calls = queue.SimpleQueue()
+        self._stopping = threading.Event()
+
+    def call(self, function, *args):
+        """Run function(*args) on the simulation thread before a step."""
+        self._calls.put((function, args))
+
+    def latest(self):
+        """Return the newest snapshot and how far it is towards the next
+        step, from 0 to 1.
+        """
+        snapshot = self.snapshots.latest()
+        if not snapshot.game_active:
+            return snapshot, 1.0
+        alpha = (perf_counter() - snapshot.time) / self.step_time
+        return snapshot, min(max(alpha, 0.0), 1.0)
+
+    def stop(self):
+        """Stop stepping and wait for the step under way to finish."""
+        self._stopping.set()
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        ai_game = self.ai_game
+        profiler = ai_game.step_profiler
+        step_time = self.step_time
+        next_step = perf_counter()
+        while not self._stopping.is_set():
+            changed = self._run_calls()
+            now = perf_counter()
+            if not ai_game.game_active:
+                next_step = now + step_time
+            steps = 0
+            while (next_step <= now and ai_game.game_active
+                   and steps < self.max_steps):
+                profiler.start_frame()
+                ai_game._run_simulation_step()
+                profiler.end_frame(ai_game)
+                next_step += step_time
+                steps += 1
+            if steps:
+                ai_game.audio.update()
+                ai_game._autosave()
+                # Too far behind to catch up: the game slows down instead.
+                next_step = max(next_step, now)
+            if steps or changed:
+                self.snapshots.publish(
+                    take_snapshot(ai_game, next_step - step_time))
+            self._stopping.wait(max(next_step - perf_counter(), 0))
+
+    def _run_calls(self):
+        """Run the queued calls; return True if there were any."""
+        ran = False
+        while True:
+            try:
+                function, args = self._calls.get_nowait()
+            except queue.Empty:
+                return ran
+            function(*args)
+            ran = True